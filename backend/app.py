@@ -2,15 +2,44 @@
 
 import os
 import re
+import hashlib
+import json
+import queue
+import threading
+import time
 import frontmatter
 import logging
-from flask import Flask, request, jsonify
+import cProfile
+import pstats
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, request, jsonify, Response, redirect, send_file, g
 from flask_cors import CORS
+from collections import OrderedDict
 import unicodedata # For robust ID generation
+try:
+    import brotli # Optional: smaller responses for browsers that accept 'br'
+except ImportError:
+    brotli = None
+from parse_cache_store import ParseCacheStore
+from file_discovery import MarkdownScanner
+from library_index import LibraryIndex, FACET_FIELDS, MAX_PAGE_SIZE, RELEVANCE_SORT_KEY
+from search_index import SearchIndex
+from folder_watcher import FolderWatcher
+from series_rules import SeriesRules, rule_pack_paths
+from game_record import GameRecord
+from response_bodies import EncodedBody, encode_json, join_json_array
+from snapshot_file import SnapshotReader, SnapshotError, write_snapshot, FILE_EXTENSION as SNAPSHOT_FILE_EXTENSION
+from metrics import MetricsRegistry, LoadStats, FILE_PARSE_BUCKETS
+from thumbnails import ThumbnailCache, ThumbnailError, ALLOWED_WIDTHS, MIME_TYPES, is_local_image_ref, resolve_local_image
 
 app = Flask(__name__)
 CORS(app)
 
+# Bump whenever parsing output changes so persisted records from older parsers are discarded.
+# 2: series inference runs on the finished record (see SeriesRules.derive)
+PARSER_VERSION = "2"
+
 # --- Helper for ID generation ---
 def generate_safe_id(text):
     if not text:
@@ -34,10 +63,12 @@ def get_duration_tier(hours):
     if hours < 50: return "长篇"
     return "超长篇"
 
+_DURATION_HOURS_RE = re.compile(r'([\d.]+)\s*h', re.IGNORECASE)
+
 def parse_duration_to_hours(duration_str):
     if not duration_str or not isinstance(duration_str, str):
         return None
-    match = re.search(r'([\d.]+)\s*h', duration_str, re.IGNORECASE)
+    match = _DURATION_HOURS_RE.search(duration_str)
     if match:
         try:
             val = float(match.group(1))
@@ -46,8 +77,153 @@ def parse_duration_to_hours(duration_str):
             return None
     return None
 
+# --- Series inference rules ---
+# GALGAME_SERIES_RULES: extra rule pack files (os.pathsep separated) applied on top of series_rules.json.
+SERIES_RULE_PACKS = rule_pack_paths(os.environ.get("GALGAME_SERIES_RULES", ""))
+_series_rules = SeriesRules.load(SERIES_RULE_PACKS)
+
 # --- Markdown Parsing Logic (Enhancements) ---
-def parse_markdown_file_content(content_str, initial_data):
+# Patterns are compiled once at import instead of being looked up on every line of every file.
+_SECTION_HEADER_RE = re.compile(r'^##\s+(.*)')
+_IMAGE_URL_RE = re.compile(r'!\[.*?\]\((.*?)\)')
+_DOWNLOAD_LINK_RE = re.compile(r'-\s*\[(.*?)\]\((.*?)\)')
+_RELEASE_DATE_RE = re.compile(r'^\d{4}[-/.]\d{1,2}[-/.]\d{1,2}$')
+_EDIT_PAGE_MARKER = "[编辑此页面]"
+_PASSWORD_PREFIXES = ("- 解压密码：", "- Password:")
+_NAME_LABELS = {"- 日文：": 'japanese', "- 英文：": 'english', "- 中文：": 'chinese'}
+def _clean_none_string(value):
+    return None if isinstance(value, str) and value.lower() == 'none' else value
+
+def _line_label(line):
+    """'- 开发者：Yuzusoft' -> '- 开发者：' (labels end at the first full-width colon), else None."""
+    if line.startswith("- "):
+        colon = line.find("：")
+        if colon != -1:
+            return line[:colon + 1]
+    return None
+
+def _label_value(line, label):
+    # Same result as line.replace(label, "").strip() for a line that starts with label
+    return line[len(label):].replace(label, "").strip()
+
+def _parse_cover_section(game_data, lines):
+    for line in lines:
+        match = _IMAGE_URL_RE.search(line)
+        if match:
+            game_data['cover_image'] = match.group(1).strip()
+            return
+
+def _parse_names_section(game_data, lines):
+    names = game_data['names']
+    for line in lines:
+        line = line.strip()
+        label = _line_label(line)
+        name_key = _NAME_LABELS.get(label)
+        if name_key is not None:
+            names[name_key] = _clean_none_string(_label_value(line, label))
+        elif label == "- 别名：":
+            aliases_str = _label_value(line, label)
+            if aliases_str and aliases_str.lower() != 'none':
+                names['aliases'] = [a.strip() for a in aliases_str.split(',') if a.strip()]
+
+def _set_duration(game_data, value):
+    duration_val_str = _clean_none_string(value)
+    game_data['info']['duration_str'] = duration_val_str
+    hours = parse_duration_to_hours(duration_val_str)
+    game_data['info']['duration_hours'] = hours
+    game_data['info']['duration_tier'] = get_duration_tier(hours) # Update tier
+
+def _set_developer(game_data, value):
+    game_data['info']['developer'] = _clean_none_string(value)
+
+def _set_release_date(game_data, value):
+    date_str = _clean_none_string(str(value))
+    if date_str and _RELEASE_DATE_RE.match(date_str):
+        game_data['info']['release_date'] = date_str.replace('.', '-').replace('/', '-') # Normalize date
+    elif date_str:
+        app.logger.warning(f"Invalid date format '{date_str}' for file {game_data.get('source_filename', 'Unknown')}. Setting to None.")
+        game_data['info']['release_date'] = None
+    else:
+        game_data['info']['release_date'] = None
+
+def _set_platforms(game_data, value):
+    if value and value.lower() != 'none':
+        game_data['info']['platforms'] = [p.strip() for p in value.split(',') if p.strip()]
+
+_INFO_LABEL_HANDLERS = {
+    "- 时长：": _set_duration,
+    "- 开发者：": _set_developer,
+    "- 发售日期：": _set_release_date,
+    "- 游戏平台：": _set_platforms,
+}
+
+def _add_related_work(game_data, line):
+    try:
+        work_type_name_part = line.lstrip("- ").strip()
+        work_type, work_name = work_type_name_part.split("：", 1)
+        game_data['info']['related_works'].append({'type': work_type.strip(), 'name': work_name.strip()})
+    except ValueError:
+        app.logger.warning(f"Could not parse related work line: '{line}' in file {game_data.get('source_filename', 'Unknown File')}")
+
+def _parse_info_section(game_data, lines):
+    in_related_works_section = False
+    for line in lines:
+        line = line.strip()
+        label = _line_label(line)
+        handler = _INFO_LABEL_HANDLERS.get(label)
+        if handler is not None:
+            handler(game_data, _label_value(line, label))
+        elif label == "- 相关作品：":
+            in_related_works_section = True
+        elif in_related_works_section:
+            if label is not None: # "- 前作：..." style item
+                _add_related_work(game_data, line)
+            elif not line.startswith("-"): # End of related works list
+                in_related_works_section = False
+
+def _parse_description_section(game_data, lines):
+    # "[编辑此页面]" lines were already dropped while the section was collected
+    description_text = "\n".join(lines).strip()
+    game_data['description'] = description_text if description_text else None
+
+def _parse_download_links_section(game_data, lines):
+    current_link_object = None
+    for line in lines:
+        line = line.strip()
+        link_match = _DOWNLOAD_LINK_RE.match(line)
+        if link_match:
+            if current_link_object:
+                game_data['download_links'].append(current_link_object)
+            current_link_object = {'name': link_match.group(1).strip(), 'url': link_match.group(2).strip(), 'password': None}
+        elif current_link_object and line.startswith(_PASSWORD_PREFIXES):
+            pw = line.replace("- 解压密码：", "").replace("- Password:", "").strip()
+            current_link_object['password'] = pw if pw and pw.lower() != 'none' else None
+    if current_link_object: # Add the last processed link
+        game_data['download_links'].append(current_link_object)
+
+def _parse_screenshots_section(game_data, lines):
+    for line in lines:
+        if "![" in line:
+            game_data['screenshots'].extend(s.strip() for s in _IMAGE_URL_RE.findall(line) if s.strip())
+
+# Section title -> parser(game_data, raw section lines). Sections with other titles are skipped.
+_SECTION_PARSERS = {
+    "游戏封面": _parse_cover_section,
+    "游戏名称": _parse_names_section,
+    "游戏信息": _parse_info_section,
+    "游戏简介": _parse_description_section,
+    "下载链接": _parse_download_links_section,
+    "游戏截图": _parse_screenshots_section,
+}
+
+def _process_section(game_data, title, lines):
+    try:
+        _SECTION_PARSERS[title](game_data, lines)
+    except Exception as e:
+        app.logger.error(f"Error processing section '{title}' for file {game_data.get('source_filename', 'Unknown File')}: {e}", exc_info=True)
+        game_data['parse_warning'] = (game_data.get('parse_warning') or "") + f"Error in section '{title}'. "
+
+def parse_markdown_file_content(content_str, initial_data, timings=None):
     game_data = initial_data.copy()
     # Initialize with comprehensive structure
     game_data.update({
@@ -71,205 +247,195 @@ def parse_markdown_file_content(content_str, initial_data):
         'parse_warning': game_data.get('parse_warning', None)
     })
 
+    # Single pass over the body: a "## " header closes the previous section and hands its lines to the
+    # section's parser. Lines of sections without a parser are not even collected.
     current_section_title = None
-    current_section_lines = []
-
-    def process_collected_section(title, lines_content_list):
-        nonlocal game_data
-        section_text = "\n".join(lines_content_list).strip()
-        if not title: return
+    current_section_lines = None
+    for line_content in content_str.splitlines():
+        if line_content.startswith("##"):
+            header_match = _SECTION_HEADER_RE.match(line_content)
+            if header_match:
+                if current_section_lines: # Process previous section
+                    _process_section(game_data, current_section_title, current_section_lines)
+                current_section_title = header_match.group(1).strip()
+                current_section_lines = [] if current_section_title in _SECTION_PARSERS else None
+                continue
+        if current_section_lines is not None:
+            # Exclude specific unwanted lines from section content
+            stripped_line = line_content.strip()
+            if stripped_line and not stripped_line.startswith(_EDIT_PAGE_MARKER):
+                current_section_lines.append(line_content)
 
-        def clean_none_string(value):
-            return None if isinstance(value, str) and value.lower() == 'none' else value
+    if current_section_lines: # Process the last section
+        _process_section(game_data, current_section_title, current_section_lines)
 
-        try:
-            if title == "游戏封面":
-                match = re.search(r'!\[.*?\]\((.*?)\)', section_text)
-                if match: game_data['cover_image'] = match.group(1).strip()
-            
-            elif title == "游戏名称":
-                name_lines = section_text.split('\n')
-                for line in name_lines:
-                    line = line.strip()
-                    if line.startswith("- 日文："): game_data['names']['japanese'] = clean_none_string(line.replace("- 日文：", "").strip())
-                    elif line.startswith("- 英文："): game_data['names']['english'] = clean_none_string(line.replace("- 英文：", "").strip())
-                    elif line.startswith("- 中文："): game_data['names']['chinese'] = clean_none_string(line.replace("- 中文：", "").strip())
-                    elif line.startswith("- 别名："):
-                        aliases_str = line.replace("- 别名：", "").strip()
-                        if aliases_str and aliases_str.lower() != 'none':
-                            game_data['names']['aliases'] = [a.strip() for a in aliases_str.split(',') if a.strip()]
-            
-            elif title == "游戏信息":
-                info_lines = section_text.split('\n')
-                in_related_works_section = False
-                for line in info_lines:
-                    line = line.strip()
-                    if line.startswith("- 时长："):
-                        duration_val_str = clean_none_string(line.replace("- 时长：", "").strip())
-                        game_data['info']['duration_str'] = duration_val_str
-                        hours = parse_duration_to_hours(duration_val_str)
-                        game_data['info']['duration_hours'] = hours
-                        game_data['info']['duration_tier'] = get_duration_tier(hours) # Update tier
-                    elif line.startswith("- 开发者："): game_data['info']['developer'] = clean_none_string(line.replace("- 开发者：", "").strip())
-                    elif line.startswith("- 发售日期："): 
-                        date_str = clean_none_string(str(line.replace("- 发售日期：", "").strip()))
-                        if date_str and re.match(r'^\d{4}[-/.]\d{1,2}[-/.]\d{1,2}$', date_str):
-                             game_data['info']['release_date'] = date_str.replace('.', '-').replace('/', '-') # Normalize date
-                        elif date_str:
-                            app.logger.warning(f"Invalid date format '{date_str}' for file {game_data.get('source_filename', 'Unknown')}. Setting to None.")
-                            game_data['info']['release_date'] = None
-                        else:
-                            game_data['info']['release_date'] = None
-
-                    elif line.startswith("- 游戏平台："):
-                        platforms_str = line.replace("- 游戏平台：", "").strip()
-                        if platforms_str and platforms_str.lower() != 'none':
-                            game_data['info']['platforms'] = [p.strip() for p in platforms_str.split(',') if p.strip()]
-                    elif line.startswith("- 相关作品："):
-                        in_related_works_section = True
-                    elif in_related_works_section and line.startswith("- ") and "：" in line:
-                        try:
-                            work_type_name_part = line.lstrip("- ").strip()
-                            work_type, work_name = work_type_name_part.split("：", 1)
-                            game_data['info']['related_works'].append({'type': work_type.strip(), 'name': work_name.strip()})
-                            # Attempt to infer series_name if not already set and related work implies series
-                            if not game_data['series_name'] and ('系列' in work_type or '前作' in work_type or '续作' in work_type or '本篇' in work_type):
-                                # A simple heuristic: if the related work's name is a substring of the current game's title (or vice versa for common base)
-                                current_title_base_for_series = game_data.get('title', '').split(' ')[0].lower() # Often first word is series
-                                related_name_for_series = work_name.split(' ')[0].lower()
-
-                                if current_title_base_for_series and related_name_for_series and len(related_name_for_series) > 2:
-                                     # More robust: check if one is a prefix of another or shares a common significant prefix
-                                    if current_title_base_for_series.startswith(related_name_for_series) or \
-                                       related_name_for_series.startswith(current_title_base_for_series) or \
-                                       any(current_title_base_for_series.startswith(alias.split(' ')[0].lower()) for alias in game_data['names']['aliases']):
-                                        game_data['series_name'] = work_name.split(' ')[0].strip().title() # Use the related work's base name for series, capitalized
-                                        app.logger.debug(f"Inferred series name '{game_data['series_name']}' from related work '{work_name}' for {game_data.get('source_filename')}")
-
-
-                        except ValueError:
-                            app.logger.warning(f"Could not parse related work line: '{line}' in file {game_data.get('source_filename', 'Unknown File')}")
-                    elif in_related_works_section and not (line.startswith(" ") or line.startswith("-")): # End of related works list
-                        in_related_works_section = False
-            
-            elif title == "游戏简介":
-                description_text = re.sub(r'^\s*\[编辑此页面\].*?\n?', '', section_text, flags=re.MULTILINE).strip()
-                game_data['description'] = description_text if description_text else None
-
-            elif title == "下载链接":
-                link_lines = section_text.split('\n')
-                current_link_object = None
-                for line_idx, line_content in enumerate(link_lines):
-                    line = line_content.strip()
-                    link_match = re.match(r'-\s*\[(.*?)\]\((.*?)\)', line)
-                    if link_match:
-                        if current_link_object: 
-                            game_data['download_links'].append(current_link_object)
-                        current_link_object = {'name': link_match.group(1).strip(), 'url': link_match.group(2).strip(), 'password': None}
-                    elif line.startswith(("- 解压密码：", "- Password:")) and current_link_object:
-                        pw = line.replace("- 解压密码：", "").replace("- Password:", "").strip()
-                        current_link_object['password'] = pw if pw and pw.lower() != 'none' else None
-                if current_link_object: # Add the last processed link
-                    game_data['download_links'].append(current_link_object)
-
-
-            elif title == "游戏截图":
-                screenshot_matches = re.findall(r'!\[.*?\]\((.*?)\)', section_text)
-                game_data['screenshots'].extend(s.strip() for s in screenshot_matches if s.strip()) 
+    # Series Name and Tag inference, see series_rules.py
+    series_start = time.perf_counter()
+    game_data['series_name'], game_data['series_tag'] = _series_rules.derive(
+        game_data['title'], game_data['names']['aliases'], ((w['type'], w['name']) for w in game_data['info']['related_works']))
+    if timings is not None:
+        timings['series'] = time.perf_counter() - series_start
 
-        except Exception as e:
-            app.logger.error(f"Error processing section '{title}' for file {game_data.get('source_filename', 'Unknown File')}: {e}", exc_info=True)
-            game_data['parse_warning'] = (game_data.get('parse_warning') or "") + f"Error in section '{title}'. "
-
-
-    content_lines = content_str.splitlines()
-    for line_idx, line_content in enumerate(content_lines):
-        header_match = re.match(r'^##\s+(.*)', line_content)
-        if header_match:
-            if current_section_title and current_section_lines: # Process previous section
-                process_collected_section(current_section_title, current_section_lines)
-            current_section_title = header_match.group(1).strip()
-            current_section_lines = []
-        elif current_section_title: # If we are inside a section
-            # Exclude specific unwanted lines from section content
-            if line_content.strip() and not line_content.strip().startswith("[编辑此页面]"):
-                current_section_lines.append(line_content)
-    
-    if current_section_title and current_section_lines: # Process the last section
-        process_collected_section(current_section_title, current_section_lines)
-
-    # Series Name and Tag inference (refined)
-    if not game_data['series_name'] and game_data.get('title'):
-        title_lower = game_data['title'].lower()
-        # More specific prefixes first
-        common_prefixes_tags = {
-            # Format: "lowercase_prefix_to_match": ("Display Series Name", "Optional Tag Prefix")
-            "9-nine-": ("9-nine-", None),
-            "nekopara vol.": ("Nekopara", "Vol."),
-            "nekopara": ("Nekopara", None), # General fallback if vol. not specified
-            "steins;gate": ("Steins;Gate", None),
-            "robotics;notes": ("Robotics;Notes", None),
-            "chaos;head": ("Chaos;Head", None),
-            "chaos;child": ("Chaos;Child", None),
-            "grisaia no kajitsu": ("Grisaia", "Kajitsu"),
-            "grisaia no meikyuu": ("Grisaia", "Meikyuu"),
-            "grisaia no rakuen": ("Grisaia", "Rakuen"),
-            "grisaia phantom trigger": ("Grisaia Phantom Trigger", "Vol."),
-            "riddle joker": ("Riddle Joker", None), 
-        }
-        series_found = False
-        for prefix, (series_display_name, tag_prefix) in common_prefixes_tags.items():
-            if title_lower.startswith(prefix):
-                game_data['series_name'] = series_display_name
-                remaining_title = title_lower.replace(prefix, "", 1).strip() # Replace only first occurrence
-                
-                # Try to extract a tag (e.g., episode number, volume number)
-                tag_match = re.match(r'^(ep\s*\d+|vol\.\s*\d+|\d+|[ivxlcdm]+)(?:\s|$)', remaining_title, re.IGNORECASE)
-                if tag_match:
-                    tag = tag_match.group(1).upper()
-                    if tag_prefix and not tag.startswith(tag_prefix.upper()):
-                        game_data['series_tag'] = tag_prefix.strip() + " " + tag
-                    elif not tag_prefix and tag.isdigit() and not game_data['series_tag']: # Avoid overwriting if already set
-                         game_data['series_tag'] = "EP" + tag # Default tag prefix for numbers
-                    elif not game_data['series_tag']:
-                         game_data['series_tag'] = tag
-                series_found = True
-                break
-        
-        if not series_found: # Generic series parsing if no specific prefix matched
-            # Matches patterns like "Series Name: Episode 1", "Series Name - Vol 2", "Series Name IV"
-            match_series_ep = re.match(r'^(.*?)(?:[\s:_-]+(?:ep(?:isode)?|vol(?:ume)?|chapter|part|ภาค)[\s#.]*([a-z0-9]+)|[\s:_-]+([ivxlcdm]+)(?![a-z])|\s+(\d+)\s*作)$', title_lower, re.IGNORECASE)
-            if match_series_ep:
-                series_base_name = match_series_ep.group(1).strip()
-                # Filter out common game suffixes that are not part of a series name if they appear at the end of series_base_name
-                common_suffixes_to_remove = ['hd remaster', 'complete edition', 'plus', 'full voice']
-                for suffix in common_suffixes_to_remove:
-                    if series_base_name.lower().endswith(suffix): # case-insensitive check for suffix
-                        series_base_name = series_base_name[:-len(suffix)].strip()
-                
-                if len(series_base_name) > 2 : # Avoid very short or empty series names
-                    game_data['series_name'] = series_base_name.title()
-                    tag_part = (match_series_ep.group(2) or match_series_ep.group(3) or match_series_ep.group(4) or "").upper()
-                    if tag_part:
-                        # Prepend "EP" if it's purely numeric and no other context suggests "Vol" etc.
-                        if tag_part.isdigit() and not any(kw in title_lower for kw in ["vol", "volume", "chapter", "part"]):
-                             game_data['series_tag'] = "EP" + tag_part
-                        else:
-                            game_data['series_tag'] = tag_part
-    
     # Final check for duration tier if hours is known but tier wasn't set (e.g. direct metadata)
     if game_data['info']['duration_hours'] is not None and game_data['info']['duration_tier'] == "未知时长":
         game_data['info']['duration_tier'] = get_duration_tier(game_data['info']['duration_hours'])
 
     return game_data
 
-_all_games_cache = {} 
-_current_folder_path_cache = None 
+def get_display_title(game):
+    # Prefer Chinese, then English, then Japanese, then original 'title' metadata, then a fallback
+    return game.chinese_name or \
+           game.english_name or \
+           game.japanese_name or \
+           game.title or \
+           f"Untitled ({game.source_filename or 'N/A'})"
+
+def thumbnail_url(game_uid, image_ref, kind):
+    """/api/thumbnail URL for a local image of a game, None for remote images or when thumbnails are off."""
+    if _thumbnail_cache is None or not is_local_image_ref(image_ref):
+        return None
+    return f"/api/thumbnail/{game_uid}/{kind}"
+
+def build_game_payload(game, library_id=None):
+    """Full game object as the frontend expects it: the parsed record plus top-level display/sort fields."""
+    payload = game.to_dict() # Built straight from the GameRecord, nothing cached is copied
+
+    # Ensure 'title_display' is set for card rendering
+    payload['title_display'] = get_display_title(game)
+
+    # Ensure essential top-level fields for direct frontend access (sorting, card display)
+    # These are also in payload['info'], but having them top-level simplifies JS
+    payload['developer'] = game.developer
+    payload['release_date'] = game.release_date
+    payload['duration_tier'] = game.duration_tier
+    payload['duration_hours'] = game.duration_hours
+    # series_name, series_tag, parse_error, parse_warning are already handled by parse_markdown_file_content
+    if library_id:
+        game_uid = make_game_uid(library_id, game.id)
+        payload['cover_thumbnail'] = thumbnail_url(game_uid, game.cover_image, "cover")
+        payload['screenshot_thumbnails'] = [thumbnail_url(game_uid, screenshot, f"screenshot-{n}")
+                                            for n, screenshot in enumerate(game.screenshots)]
+    return payload
+
+def build_card_record(game, library_id=None):
+    """
+    Lightweight projection of a GameRecord with only what a list card needs (no description, links, screenshots).
+    'uid' namespaces the ID with the library it came from, so cards from different folders never collide.
+    """
+    game_uid = make_game_uid(library_id, game.id) if library_id else game.id
+    return {
+        'id': game.id,
+        'uid': game_uid,
+        'library_id': library_id,
+        'title_display': get_display_title(game),
+        'cover_image': game.cover_image,
+        'cover_thumbnail': thumbnail_url(game_uid, game.cover_image, "cover") if library_id else None,
+        'developer': game.developer,
+        'release_date': game.release_date,
+        'duration_tier': game.duration_tier,
+        'duration_hours': game.duration_hours,
+        'platforms': game.platforms,
+        'series_name': game.series_name,
+        'series_tag': game.series_tag,
+        'source_filename': game.source_filename,
+        'parse_error': game.parse_error,
+        'parse_warning': game.parse_warning,
+    }
+
+# --- Libraries ---
+# Every loaded folder is a GameLibrary with its own cache tables, indexes, lock and watcher (see below).
+# GALGAME_LIBRARY_MEMORY_MB bounds their estimated total size; least recently used libraries are evicted
+# first, never the one used last. 0 disables the limit.
+LIBRARY_MEMORY_BUDGET_BYTES = int(float(os.environ.get("GALGAME_LIBRARY_MEMORY_MB", "1024") or 0) * 1024 * 1024)
+# Cards, search postings and sort orders take roughly as much again as the records themselves
+LIBRARY_INDEX_OVERHEAD_FACTOR = 2.0
+
+# Serialized /api/game_details bodies kept per library (least recently requested are dropped first)
+DETAIL_BODY_CACHE_SIZE = int(os.environ.get("GALGAME_DETAIL_CACHE_SIZE", "2000") or 0)
+
+# Above this many touched IDs a bulk rebuild of the search index is cheaper than per-game updates
+SEARCH_INDEX_BULK_REBUILD_THRESHOLD = 1000
+
+# Optionally confirm mtime/size changes with a content hash before reparsing
+# (useful when a sync tool touches files without changing them).
+FINGERPRINT_USE_CONTENT_HASH = os.environ.get("GALGAME_FINGERPRINT_HASH", "0").lower() in ("1", "true", "yes")
+
+# --- Folder discovery ---
+# GALGAME_SCAN_DEPTH: subdirectory levels to walk, 0 = the folder only, empty/-1 = no limit.
+# GALGAME_SCAN_INCLUDE / GALGAME_SCAN_EXCLUDE: comma-separated globs relative to the folder, e.g. "2019/*,2020/*" or "drafts,*.bak.md".
+# GALGAME_SCAN_SYMLINKS: "skip", "files" (linked files only) or "follow" (linked directories too).
+_scan_depth = int(os.environ.get("GALGAME_SCAN_DEPTH", "-1") or -1)
+_md_scanner = MarkdownScanner(
+    max_depth=None if _scan_depth < 0 else _scan_depth,
+    include=[p.strip() for p in os.environ.get("GALGAME_SCAN_INCLUDE", "").split(",") if p.strip()],
+    exclude=[p.strip() for p in os.environ.get("GALGAME_SCAN_EXCLUDE", "").split(",") if p.strip()],
+    symlinks=os.environ.get("GALGAME_SCAN_SYMLINKS", "files").lower(),
+)
 
-def parse_single_md_file(file_path):
+# --- Parallel parsing ---
+# GALGAME_PARSE_WORKERS: 0 = one worker per CPU core, 1 = always parse serially in-process.
+PARSE_WORKERS = int(os.environ.get("GALGAME_PARSE_WORKERS", "0") or 0)
+# Below this many stale files the process pool startup/IPC cost outweighs the gain.
+PARALLEL_PARSE_MIN_FILES = int(os.environ.get("GALGAME_PARALLEL_MIN_FILES", "256") or 256)
+_parse_pool = None
+_parse_pool_workers = 0
+_parse_pool_lock = threading.Lock() # The pool is shared by every library
+
+# --- Folder watching and live updates ---
+# GALGAME_WATCH: "auto" (watchdog if installed, else polling), "poll" or "off".
+WATCH_MODE = os.environ.get("GALGAME_WATCH", "auto").lower()
+WATCH_POLL_INTERVAL = float(os.environ.get("GALGAME_WATCH_INTERVAL", "3") or 3)
+# Deltas bigger than this are announced as a "reload" event instead of shipping every record
+LIVE_DELTA_MAX_RECORDS = 500
+_event_subscribers = set() # One queue.Queue per connected /api/events client
+_event_subscribers_lock = threading.Lock()
+
+# --- Persistent parse cache ---
+# GALGAME_PARSE_CACHE: path of the SQLite file, or "off" to keep everything in memory only.
+_parse_cache_setting = os.environ.get("GALGAME_PARSE_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".parse_cache", "parse_cache.sqlite3"))
+_parse_cache_store = None if _parse_cache_setting.lower() in ("off", "0", "false", "") else ParseCacheStore(_parse_cache_setting, PARSER_VERSION)
+
+# --- Image thumbnails (needs Pillow) ---
+# GALGAME_THUMBNAIL_CACHE: directory for generated thumbnails, or "off".
+_thumbnail_cache_setting = os.environ.get("GALGAME_THUMBNAIL_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".thumbnail_cache"))
+THUMBNAIL_CACHE_MAX_BYTES = int(float(os.environ.get("GALGAME_THUMBNAIL_CACHE_MB", "512") or 512) * 1024 * 1024)
+THUMBNAIL_WORKERS = int(os.environ.get("GALGAME_THUMBNAIL_WORKERS", "2") or 2)
+# Default widths: card covers are shown at ~250 CSS px (x1.3 for denser screens), screenshots in a modal grid
+THUMBNAIL_DEFAULT_WIDTHS = {"cover": 320, "screenshot": 480}
+_thumbnail_cache = None
+if _thumbnail_cache_setting.lower() not in ("off", "0", "false", ""):
+    _thumbnail_cache = ThumbnailCache(_thumbnail_cache_setting, THUMBNAIL_CACHE_MAX_BYTES, workers=THUMBNAIL_WORKERS)
+    if not _thumbnail_cache.enabled:
+        _thumbnail_cache = None
+
+# --- Metrics and profiling ---
+# GALGAME_PROFILE_DIR: where armed load profiles (see /api/profiler/arm) are written.
+PROFILE_DIR = os.environ.get("GALGAME_PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profiles"))
+# GALGAME_SNAPSHOT_DIR: where /api/libraries/export writes snapshot files before sending them.
+SNAPSHOT_DIR = os.environ.get("GALGAME_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshots"))
+SLOWEST_FILES_COUNT = 10 # Slowest parsed files kept in every scan's LoadStats
+_profile_request = None  # Folder path (or "" for any folder) whose next full load gets profiled
+_profile_request_lock = threading.Lock()
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram("galgame_http_request_duration_seconds",
+                                    "Time to produce a response by route (for streams: until the headers are sent).")
+SERIALIZATION_SECONDS = metrics.histogram("galgame_response_serialization_seconds",
+                                          "JSON encoding, ETag and compression of JSON responses by endpoint.")
+REFRESH_SECONDS = metrics.histogram("galgame_library_refresh_seconds", "Duration of library scans: full, targeted (watcher events) or unchanged (nothing reparsed or removed).")
+FILE_PARSE_SECONDS = metrics.histogram("galgame_file_parse_seconds", "Time to parse one Markdown file.", FILE_PARSE_BUCKETS)
+LOAD_PHASE_SECONDS = metrics.counter("galgame_load_phase_seconds_total",
+                                     "Time spent per scan phase; frontmatter/body/series are summed over parsed files.")
+FILES_PARSED = metrics.counter("galgame_files_parsed_total", "Markdown files parsed.")
+PARSE_ERRORS = metrics.counter("galgame_parse_errors_total", "Parsed files that produced an error record.")
+PARSE_WARNINGS = metrics.counter("galgame_parse_warnings_total", "Parsed files whose record carries a parse warning.")
+
+def parse_single_md_file(file_path, timings=None):
+    # timings, if a dict is given, receives the seconds spent per phase: 'frontmatter', 'body' and 'series'
     try:
+        start = time.perf_counter()
         with open(file_path, 'r', encoding='utf-8') as f:
             post = frontmatter.load(f)
+        frontmatter_done = time.perf_counter()
         
         metadata = post.metadata
         filename_base = os.path.basename(file_path)
@@ -311,7 +477,10 @@ def parse_single_md_file(file_path):
         if 'cover' in metadata: initial_data['cover_image'] = metadata['cover']
 
 
-        game_details = parse_markdown_file_content(post.content, initial_data)
+        game_details = parse_markdown_file_content(post.content, initial_data, timings)
+        if timings is not None:
+            timings['frontmatter'] = frontmatter_done - start
+            timings['body'] = time.perf_counter() - frontmatter_done - timings.get('series', 0.0)
         
         # Ensure ID is not None (should be caught earlier, but as a safeguard)
         if not game_details.get('id'):
@@ -344,171 +513,1654 @@ def parse_single_md_file(file_path):
             'parse_warning': f"File-level parsing exception: {str(e)}"
         }
 
+def _parse_md_file_timed(file_path):
+    # Pool worker entry point when the caller wants to know where the parse time went
+    timings = {}
+    start = time.perf_counter()
+    game = parse_single_md_file(file_path, timings)
+    timings['total'] = time.perf_counter() - start
+    return game, timings
+
+def get_parse_worker_count():
+    if PARSE_WORKERS > 0:
+        return PARSE_WORKERS
+    return os.cpu_count() or 1
+
+def _get_parse_pool(workers):
+    global _parse_pool, _parse_pool_workers
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_workers != workers:
+            if _parse_pool is not None:
+                _parse_pool.shutdown(wait=False)
+            _parse_pool = ProcessPoolExecutor(max_workers=workers)
+            _parse_pool_workers = workers
+        return _parse_pool
+
+def _shutdown_parse_pool():
+    global _parse_pool, _parse_pool_workers
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False) # Batches already submitted by other libraries still finish
+        _parse_pool = None
+        _parse_pool_workers = 0
+
+def iter_parsed_md_files(file_paths, workers=None, with_timings=False):
+    """
+    Yields (file_path, parsed_game) for every path, always in input order so duplicate-ID
+    resolution stays deterministic. Large batches are chunked across a process pool;
+    results stream back as soon as the next chunk in order is done.
+    with_timings yields (file_path, parsed_game, timings) instead, see _parse_md_file_timed.
+    """
+    workers = get_parse_worker_count() if workers is None else workers
+    parse = _parse_md_file_timed if with_timings else parse_single_md_file
+    done_count = 0
+    if workers > 1 and len(file_paths) >= PARALLEL_PARSE_MIN_FILES:
+        # A few chunks per worker keeps cores busy when some files are much slower than others
+        chunksize = max(1, min(64, len(file_paths) // (workers * 4)))
+        try:
+            pool = _get_parse_pool(workers)
+            for file_path, result in zip(file_paths, pool.map(parse, file_paths, chunksize=chunksize)):
+                done_count += 1
+                yield (file_path,) + result if with_timings else (file_path, result)
+            return
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            app.logger.error(f"Parallel parsing failed after {done_count} file(s) ({e}). Falling back to serial parsing.", exc_info=True)
+            _shutdown_parse_pool()
+
+    for file_path in file_paths[done_count:]:
+        result = parse(file_path)
+        yield (file_path,) + result if with_timings else (file_path, result)
+
+def scan_md_files(directory_path):
+    """{file path: (mtime_ns, size)} of the .md files under directory_path, or None if it can't be read."""
+    return _md_scanner.scan(directory_path)
+
 def list_md_files_from_directory(directory_path):
-    md_file_paths = []
-    if not os.path.isdir(directory_path):
-        app.logger.error(f"Provided path is not a directory: {directory_path}")
-        return None 
-    
+    md_files = scan_md_files(directory_path)
+    return None if md_files is None else list(md_files)
+
+def get_file_fingerprint(file_path, with_hash=False):
+    """Returns (mtime_ns, size, sha1-or-None) for a file, or None if it can't be stat'ed."""
     try:
-        for item_name in os.listdir(directory_path):
-            if item_name.lower().endswith(".md") and not item_name.startswith("~$"): # Ignore temp Word files
-                full_path = os.path.join(directory_path, item_name)
-                if os.path.isfile(full_path): # Ensure it's a file
-                    md_file_paths.append(full_path)
+        stat_result = os.stat(file_path)
+        digest = None
+        if with_hash:
+            with open(file_path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        return (stat_result.st_mtime_ns, stat_result.st_size, digest)
     except OSError as e:
-        app.logger.error(f"Error listing directory {directory_path}: {e}")
+        app.logger.warning(f"Could not fingerprint file {file_path}: {e}")
         return None
-    return md_file_paths
 
-@app.route('/api/games_basic', methods=['POST'])
-def get_games_basic_info():
-    global _all_games_cache, _current_folder_path_cache
-    request_data = request.get_json()
-    if not request_data or 'folder_path' not in request_data:
-        return jsonify({"error": "Request body must be JSON and include 'folder_path'"}), 400
+def _publish_event(event_name, payload):
+    """Queues an event for every /api/events client. A client that stopped reading gets a single "reload" instead."""
+    data = encode_json(payload).decode('utf-8')
+    with _event_subscribers_lock:
+        for subscriber_queue in _event_subscribers:
+            try:
+                subscriber_queue.put_nowait((event_name, data))
+            except queue.Full:
+                try:
+                    while True: # Its stream may take events meanwhile, so the queue can run out at any point
+                        subscriber_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber_queue.put_nowait(("reload", encode_json({"folder_path": payload.get("folder_path"), "library_id": payload.get("library_id")}).decode('utf-8')))
 
-    md_folder_path = request_data['folder_path']
-    # Basic path validation (more robust validation might be needed for security in a real app)
-    if not md_folder_path or ".." in md_folder_path or not os.path.isabs(md_folder_path):
-         return jsonify({"error": "Invalid or relative folder path provided."}), 400
-    app.logger.info(f"Request for game info from: {md_folder_path}")
+def is_valid_folder_path(md_folder_path):
+    """Folder paths from requests must be absolute and free of "..", or a scan could start anywhere."""
+    return bool(md_folder_path) and ".." not in md_folder_path and os.path.isabs(md_folder_path)
 
-    # Cache invalidation logic: if path changes or cache is empty
-    if _current_folder_path_cache != md_folder_path or not _all_games_cache:
-        _all_games_cache = {} # Clear previous cache
-        _current_folder_path_cache = md_folder_path
-        app.logger.info(f"Folder path changed to '{md_folder_path}' or cache empty. Reparsing all files.")
-    
-        md_files = list_md_files_from_directory(md_folder_path)
-        if md_files is None: # Error accessing directory
-            return jsonify({"error": f"Could not access or read directory: {md_folder_path}. Check path and permissions."}), 404
-        if not md_files: # No MD files found
-            _all_games_cache = {} 
-            return jsonify({"message": "No .md files found in the specified directory.", "games": []}), 200
+def library_id_for(folder_path):
+    """Short stable ID of a folder, used to namespace game IDs across libraries."""
+    folder_key = os.path.normcase(os.path.normpath(folder_path))
+    return hashlib.sha1(folder_key.encode('utf-8')).hexdigest()[:10]
+
+def make_game_uid(library_id, game_id):
+    return f"{library_id}:{game_id}"
+
+def split_game_uid(game_uid):
+    """Returns (library_id, game_id); library_id is None for a plain game ID (IDs never contain ':')."""
+    if ':' in game_uid:
+        library_id, game_id = game_uid.split(':', 1)
+        return library_id, game_id
+    return None, game_uid
+
+
+class LibrarySnapshot:
+    """
+    What readers see of a library: the served records and the LibraryIndex built from them. A rescan
+    works on a private copy and publishes a new snapshot with a single assignment, so a request never
+    sees a half-updated cache. Snapshots are never modified once published (cards_body is only filled in).
+    """
+
+    __slots__ = ('games', 'index', 'generation', 'card_fragments', 'cards_body')
+
+    def __init__(self, games, index, generation, card_fragments=()):
+        self.games = games           # game_id -> GameRecord served by the API (duplicate markers applied)
+        self.index = index
+        self.generation = generation # Bumped whenever games changes
+        self.card_fragments = card_fragments # Encoded JSON of index.cards, row by row
+        self.cards_body = None       # EncodedBody of the /api/games_basic payload, built on first request
+
+    def card(self, game_id):
+        """The card served for game_id in this snapshot, or None. Shared with the index, never modify it."""
+        row = self.index.row_of_id.get(game_id)
+        return None if row is None else self.index.cards[row]
+
+
+class LoadJob:
+    """
+    One full scan of a library, run on a background thread. Callers asking for the same folder while it
+    runs join this job (single flight) instead of scanning again. Progress is readable at any time.
+    """
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self.state = "running"  # "running", "done" or "failed"
+        self.files_total = 0    # .md files found in the folder
+        self.files_to_parse = 0 # Of those, new or modified
+        self.files_parsed = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self.result = None      # (md_files, warnings) once done
+        self.error = None
+        self._listeners = []    # Called with every freshly parsed GameRecord
+        self._done = threading.Event()
+        self.stats = None       # LoadStats of the scan, filled in while it runs
+        self.profile = False    # Run under cProfile, see arm_load_profiler()
+        self.profile_path = None
+
+    def add_listener(self, on_parsed):
+        self._listeners.append(on_parsed)
+
+    def file_parsed(self, game):
+        # Runs on the job thread; a GameRecord of None means the file yielded no usable record
+        self.files_parsed += 1
+        if game is not None:
+            for on_parsed in list(self._listeners):
+                on_parsed(game)
+
+    def finish(self, result=None, error=None):
+        self.result, self.error = result, error
+        self.state = "failed" if error is not None else "done"
+        self.finished_at = time.time()
+        self._done.set()
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def wait(self):
+        """Blocks until the job is over and returns its (md_files, warnings); re-raises its exception if it failed."""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def status(self):
+        return {
+            "state": self.state,
+            "files_total": self.files_total,
+            "files_to_parse": self.files_to_parse,
+            "files_parsed": self.files_parsed,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "error": str(self.error) if self.error is not None else None,
+            "stats": self.stats.to_dict() if self.stats is not None else None,
+            "profile_path": self.profile_path,
+        }
+
+
+class GameLibrary:
+    """
+    One loaded Markdown folder: its parsed records, fingerprint table, indexes and folder watcher.
+    Each library has its own lock, so rescanning one folder never holds up requests for another.
+    Game IDs are only unique within a library; cards also carry a 'uid' ("<library_id>:<game_id>")
+    that stays unique when several folders are loaded.
+    """
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self.library_id = library_id_for(folder_path)
+        self.lock = threading.RLock() # Serializes rescans from request threads and the folder watcher
+        # Published state, replaced whole after every change so readers never need the lock
+        self.snapshot = LibrarySnapshot({}, LibraryIndex({}, build_card_record), 0)
+        self._pending_games = None    # Private copy of snapshot.games a rescan is editing, see _writable_games()
+        # Incremental rescan bookkeeping, every entry keyed by the absolute .md file path
+        self.fingerprints = {}        # file path -> (mtime_ns, size, sha1 hex or None)
+        self.parsed_files = {}        # file path -> GameRecord of what parse_single_md_file returned for it
+        self.id_to_source_paths = {}  # game_id -> [file paths], in directory listing order (last one wins in all_games)
+        self.file_order = {}          # file path -> position in the last directory listing (files seen later by the watcher are appended)
+        self.search_index = SearchIndex() # Full-text index over all_games, updated per touched game ID
+        self._search_lock = threading.Lock() # Incremental index updates and searches must not interleave
+        self.approx_bytes = 0         # Estimated memory held by this library, for the LRU budget
+        self.loaded = False           # Set once a full scan (after restoring from the parse cache) has run
+        self.closed = False           # Set on eviction; a closed library stops watching its folder
+        self._watcher = None
+        self._load_job = None         # Latest LoadJob, see start_load()
+        self._load_job_lock = threading.Lock()
+        self.last_load_stats = None   # LoadStats of the latest scan, full or targeted
+        # Serialized forms, reused while the record they were built from is still the one served
+        self._card_cache = {}         # game_id -> (GameRecord, card dict, card JSON bytes)
+        self._detail_bodies = OrderedDict() # game_id -> (GameRecord, EncodedBody), least recently used first
+        self._detail_bodies_lock = threading.Lock()
+        # Imported snapshot (SnapshotReader) the first load restores from instead of the parse cache store.
+        # A read-only library has no folder on this machine and is served from its snapshot alone.
+        read_only_source = _read_only_snapshots.get(self.library_id)
+        self.snapshot_file = read_only_source[1] if read_only_source else None
+        self.read_only = read_only_source is not None
+
+    def __repr__(self):
+        return f"GameLibrary({self.library_id}, {self.folder_path!r}, {len(self.all_games)} games)"
+
+    @property
+    def all_games(self):
+        return self.snapshot.games
+
+    @property
+    def index(self):
+        return self.snapshot.index
+
+    @property
+    def generation(self):
+        return self.snapshot.generation
+
+    @property
+    def load_job(self):
+        return self._load_job
 
-        temp_parsed_games = {}
-        processed_ids = set()
-        parsing_warnings_summary = [] # Renamed to avoid conflict with local 'warnings' in loop
+    def _writable_games(self):
+        # Copy-on-write: changes go to a private copy that _commit_changes() publishes in one assignment
+        if self._pending_games is None:
+            self._pending_games = dict(self.snapshot.games)
+        return self._pending_games
+
+    def search(self, query, limit=None):
+        with self._search_lock:
+            return self.search_index.search(query, limit=limit)
+
+    def _card_entry(self, game):
+        # (GameRecord, card dict, card JSON bytes); only called while committing, under self.lock
+        cached = self._card_cache.get(game.id)
+        if cached is None or cached[0] is not game:
+            card = build_card_record(game, self.library_id)
+            cached = self._card_cache[game.id] = (game, card, encode_json(card))
+        return cached
+
+    def cards_body(self):
+        """EncodedBody of the /api/games_basic payload, assembled once per snapshot from the per-card bytes."""
+        snapshot = self.snapshot
+        body = snapshot.cards_body
+        if body is None:
+            data = b'{"games":' + join_json_array(snapshot.card_fragments)
+            duplicate_id_messages = self.duplicate_id_warnings(snapshot)
+            if duplicate_id_messages:
+                # The client-side already displays per-game parse_warning messages; these go into the status bar
+                data += b',"warnings":' + encode_json(duplicate_id_messages)
+            body = snapshot.cards_body = EncodedBody(data + b'}')
+        return body
+
+    def detail_body(self, game):
+        """EncodedBody of the /api/game_details payload for game, reused until that record is replaced."""
+        with self._detail_bodies_lock:
+            cached = self._detail_bodies.get(game.id)
+            if cached is not None and cached[0] is game:
+                self._detail_bodies.move_to_end(game.id)
+                return cached[1]
+        body = EncodedBody(encode_json(build_game_payload(game, self.library_id)))
+        with self._detail_bodies_lock:
+            self._detail_bodies[game.id] = (game, body)
+            self._detail_bodies.move_to_end(game.id)
+            while len(self._detail_bodies) > DETAIL_BODY_CACHE_SIZE:
+                self._detail_bodies.popitem(last=False)
+        return body
+
+    def lookup(self, game_id):
+        """
+        The GameRecord for game_id, checked against its source files first: files changed since they were
+        parsed (the watcher may not have caught up yet) are reparsed on their own, and an ID that isn't
+        cached is looked for through the persistent ID index and the file name it may derive from,
+        never by rescanning the folder. None if no file yields that ID.
+        """
+        if self.read_only:
+            return self.all_games.get(game_id)
+        if game_id in self.all_games:
+            source_paths = tuple(self.id_to_source_paths.get(game_id, ()))
+            changed_paths = [p for p in source_paths if not self._source_file_current(p)]
+        else:
+            changed_paths = self._candidate_source_paths(game_id)
+        if changed_paths:
+            self.refresh(changed_paths=changed_paths)
+        return self.all_games.get(game_id)
+
+    def _source_file_current(self, file_path):
+        fingerprint = get_file_fingerprint(file_path)
+        stored_fingerprint = self.fingerprints.get(file_path)
+        return fingerprint is not None and stored_fingerprint is not None and fingerprint[:2] == stored_fingerprint[:2]
+
+    def _candidate_source_paths(self, game_id):
+        candidates = set()
+        if _parse_cache_store is not None:
+            candidates.update(_parse_cache_store.find_by_id(self.folder_path, game_id))
+        # Without abbrlink/id/title the ID is derived from the file name, e.g. "some-game.md" -> "some-game-md";
+        # files named after their abbrlink are common too
+        candidates.add(os.path.join(self.folder_path, f"{game_id}.md"))
+        if game_id.endswith("-md"):
+            candidates.add(os.path.join(self.folder_path, f"{game_id[:-3]}.md"))
+        return [p for p in candidates if p in self.parsed_files and not self._source_file_current(p)
+                or p not in self.parsed_files and os.path.isfile(p)]
+
+    def _fingerprint_unchanged(self, file_path, new_fp):
+        """Compares against the stored fingerprint, upgrading it in place if only mtime moved but content didn't."""
+        old_fp = self.fingerprints.get(file_path)
+        if old_fp is None or file_path not in self.parsed_files:
+            return False
+        if old_fp[:2] == new_fp[:2]:
+            return True
+        # Hashes are stored in content hash mode and by snapshot exports, where a copied file keeps its content
+        # but not its mtime; a size change can't be the same content
+        if old_fp[2] is not None and old_fp[1] == new_fp[1]:
+            new_digest = get_file_fingerprint(file_path, with_hash=True)
+            if new_digest and new_digest[2] == old_fp[2]:
+                self.fingerprints[file_path] = new_digest # Touched but identical, keep the parsed entry
+                return True
+        return False
+
+    def _detach_source_path(self, game_id, file_path):
+        owners = self.id_to_source_paths.get(game_id)
+        if owners and file_path in owners:
+            owners.remove(file_path)
+            if not owners:
+                del self.id_to_source_paths[game_id]
+
+    def _attach_source_path(self, game_id, file_path):
+        owners = self.id_to_source_paths.setdefault(game_id, [])
+        if file_path not in owners:
+            owners.append(file_path)
+        owners.sort(key=lambda p: self.file_order.get(p, len(self.file_order)))
+
+    def _in_file_order(self, game_ids):
+        """
+        game_ids ordered by their first source file in the listing, so records are added to the served dict
+        (and to card lists and sort ties) in file order, as a full load would, not in set iteration order.
+        """
+        unlisted = len(self.file_order)
+        def position(game_id):
+            owners = self.id_to_source_paths.get(game_id) # Kept in file order
+            return self.file_order.get(owners[0], unlisted) if owners else unlisted
+        return sorted(game_ids, key=lambda game_id: (position(game_id), str(game_id)))
+
+    def _materialize_cache_entry(self, game_id):
+        """Rebuilds the served record for game_id from the files currently claiming that ID."""
+        games = self._writable_games()
+        owners = self.id_to_source_paths.get(game_id)
+        if not owners:
+            games.pop(game_id, None)
+            return None
+        winner = self.parsed_files[owners[-1]]
+        if len(owners) > 1:
+            # Same semantics as a full load: later files overwrite earlier ones and carry the duplicate marker
+            entry = winner.replace(parse_warning=(winner.parse_warning or "") + "Duplicate ID. ")
+            warning_msg = f"Duplicate game ID '{game_id}' detected. File '{winner.source_filename}' conflicts with a previously processed file. This entry might be overwritten or unstable."
+            app.logger.warning(warning_msg)
+            games[game_id] = entry
+            return warning_msg
+        games[game_id] = winner
+        return None
+
+    def _rederive_series_fields(self, file_paths):
+        """
+        Re-applies the current series rules to already parsed files, without reparsing them.
+        Changed records are replaced by updated copies. Returns {file path: (fingerprint, game dict)} for those,
+        ready for ParseCacheStore.save_changes.
+        """
+        changed_entries = {}
+        for file_path in file_paths:
+            game = self.parsed_files[file_path]
+            if game.parse_error: # Failed parses never had series inference applied
+                continue
+            series_name, series_tag = _series_rules.derive(game.title, game.aliases, game.related_works)
+            if series_name != game.series_name or series_tag != game.series_tag:
+                game = game.replace(series_name=series_name, series_tag=series_tag)
+                self.parsed_files[file_path] = game
+                changed_entries[file_path] = (self.fingerprints[file_path], game.to_dict())
+        return changed_entries
+
+    def _restore_from_parse_cache_store(self):
+        """Seeds the per-file tables from the persistent store. Returns the set of restored game IDs."""
+        if _parse_cache_store is None:
+            return set()
+        restored_ids = set()
+        for file_path, (fingerprint, game_dict) in _parse_cache_store.load_folder(self.folder_path).items():
+            game = GameRecord.from_dict(game_dict)
+            self.parsed_files[file_path] = game
+            self.fingerprints[file_path] = fingerprint
+            self._attach_source_path(game.id, file_path)
+            restored_ids.add(game.id)
+        # The rule packs may have changed since these records were stored
+        changed_entries = self._rederive_series_fields(list(self.parsed_files))
+        if changed_entries:
+            _parse_cache_store.save_changes(self.folder_path, changed_entries, [])
+        if restored_ids:
+            app.logger.info(f"Restored {len(self.parsed_files)} parsed file(s) for {self.folder_path} from the parse cache.")
+        return restored_ids
+
+    def _restore_from_snapshot_file(self):
+        """Seeds the per-file tables from the imported snapshot. Returns the set of restored game IDs."""
+        restored_ids = set()
+        for relative_path, fingerprint, game in self.snapshot_file.entries():
+            file_path = os.path.join(self.folder_path, *relative_path.split('/'))
+            self.parsed_files[file_path] = game
+            self.fingerprints[file_path] = fingerprint
+            self.file_order.setdefault(file_path, len(self.file_order)) # Snapshot rows are in listing order
+            self._attach_source_path(game.id, file_path)
+            restored_ids.add(game.id)
+        # The snapshot's records carry the series rules of the machine that exported them
+        self._rederive_series_fields(list(self.parsed_files))
+        if _parse_cache_store is not None and not self.read_only:
+            # From now on restarts restore from the store; files copied since the export are caught by the rescan
+            _parse_cache_store.save_changes(self.folder_path, {p: (self.fingerprints[p], game.to_dict()) for p, game in self.parsed_files.items()}, [])
+        app.logger.info(f"Restored {len(self.parsed_files)} parsed file(s) for {self.folder_path} from the snapshot {self.snapshot_file.path}.")
+        if not self.read_only:
+            self.snapshot_file.close() # Only the first load uses it
+            self.snapshot_file = None
+        return restored_ids
+
+    def release_snapshot_file(self):
+        """Closes the imported snapshot, which no load of this library will read any more. Called when it is replaced."""
+        with self.lock: # Waits for a load that is still restoring from it
+            reader, self.snapshot_file = self.snapshot_file, None
+        if reader is not None:
+            reader.close()
+
+    def _load_read_only_locked(self, job):
+        # Nothing on disk to scan or watch: the first load restores the snapshot, later ones change nothing
+        if self.loaded:
+            return list(self.parsed_files), []
+        if self.snapshot_file is None: # Replaced by another snapshot before it was loaded
+            return None, []
+        stats = LoadStats(SLOWEST_FILES_COUNT)
+        if job is not None:
+            job.stats = stats
+        refresh_start = time.perf_counter()
+        with stats.phase("restore"):
+            touched_ids = self._in_file_order(self._restore_from_snapshot_file())
+        if job is not None:
+            job.files_total, job.files_to_parse = len(self.parsed_files), 0
+        with stats.phase("index"):
+            warnings = [message for message in map(self._materialize_cache_entry, touched_ids) if message]
+            self._update_search_index(touched_ids)
+            self._commit_changes()
+        self.loaded = True
+        self.last_load_stats = stats
+        _record_load_metrics(stats, time.perf_counter() - refresh_start, "snapshot")
+        app.logger.info(f"Loaded read-only library {self.folder_path} from its snapshot: {len(self.all_games)} games cached.")
+        return list(self.parsed_files), warnings
+
+    def export_snapshot(self, path):
+        """
+        Writes every parsed file's record and fingerprint to a snapshot file at path, with paths relative
+        to the folder so it can be imported under another one. Returns the snapshot metadata.
+        """
+        with self.lock:
+            file_paths = sorted(self.parsed_files, key=lambda p: self.file_order.get(p, len(self.file_order)))
+            rows = [(p, self.fingerprints[p], self.parsed_files[p]) for p in file_paths]
+            game_count = len(self.all_games)
+        entries = []
+        for file_path, fingerprint, game in rows:
+            if fingerprint[2] is None and not self.read_only:
+                # The content hash lets the importing machine keep records of copied files whose mtime changed
+                current = get_file_fingerprint(file_path, with_hash=True)
+                if current is not None and current[:2] == fingerprint[:2]:
+                    fingerprint = current
+            entries.append((os.path.relpath(file_path, self.folder_path).replace(os.sep, '/'), fingerprint, game))
+        meta = {"folder_path": self.folder_path, "library_id": self.library_id, "parser_version": PARSER_VERSION, "games": game_count}
+        return write_snapshot(path, meta, entries)
+
+    def _update_search_index(self, touched_ids):
+        if not touched_ids:
+            return
+        games = self._writable_games()
+        if len(touched_ids) > SEARCH_INDEX_BULK_REBUILD_THRESHOLD:
+            # Built aside and swapped in, searches keep using the old index meanwhile
+            search_index = SearchIndex()
+            search_index.rebuild(games)
+            self.search_index = search_index
+            return
+        with self._search_lock:
+            for game_id in touched_ids:
+                if game_id in games:
+                    self.search_index.update(game_id, games[game_id])
+                else:
+                    self.search_index.remove(game_id)
+
+    def _commit_changes(self):
+        # Build sort orders and facet indexes now rather than on the first query
+        games = self._writable_games()
+        card_entries = {} # The bytes of exactly the cards the index holds
+        def card_for(game):
+            card_entries[game.id] = entry = self._card_entry(game) # Only new or replaced records get a new card
+            return entry[1]
+        index = LibraryIndex(games, card_for)
+        card_fragments = [card_entries[game_id][2] for game_id in index.ids]
+        self.snapshot = LibrarySnapshot(games, index, self.snapshot.generation + 1, card_fragments)
+        self._pending_games = None
+        # Forget the serialized forms of records that are no longer served
+        for game_id in [i for i, cached in list(self._card_cache.items()) if games.get(i) is not cached[0]]:
+            del self._card_cache[game_id]
+        with self._detail_bodies_lock:
+            for game_id in [i for i, cached in self._detail_bodies.items() if games.get(i) is not cached[0]]:
+                del self._detail_bodies[game_id]
+        self.approx_bytes = int(sum(game.approx_size() for game in self.parsed_files.values()) * LIBRARY_INDEX_OVERHEAD_FACTOR)
+
+    def _publish_cache_delta(self, previously_cached_ids, touched_ids):
+        added, updated, removed = [], [], []
+        for game_id in touched_ids:
+            if game_id not in self.all_games:
+                if game_id in previously_cached_ids:
+                    removed.append(game_id)
+            elif game_id in previously_cached_ids:
+                updated.append(game_id)
+            else:
+                added.append(game_id)
+        if not (added or updated or removed) or not _event_subscribers:
+            return
+        if len(added) + len(updated) + len(removed) > LIVE_DELTA_MAX_RECORDS:
+            _publish_event("reload", {"folder_path": self.folder_path, "library_id": self.library_id})
+            return
+        _publish_event("delta", {
+            "folder_path": self.folder_path,
+            "library_id": self.library_id,
+            "added": [self.snapshot.card(i) for i in added],
+            "updated": [self.snapshot.card(i) for i in updated],
+            "removed": removed,
+        })
+
+    def _on_folder_changed(self, md_folder_path, changed_paths):
+        # The watcher may fire once more right after the library was evicted; that event is stale
+        if not self.closed:
+            self.refresh(changed_paths=changed_paths)
+
+    def _ensure_folder_watcher(self):
+        if WATCH_MODE == "off" or self._watcher is not None or self.closed:
+            return
+        self._watcher = FolderWatcher(self.folder_path, self._on_folder_changed, poll_interval=WATCH_POLL_INTERVAL,
+                                      use_watchdog=(WATCH_MODE != "poll"), recursive=_md_scanner.recursive,
+                                      listing=scan_md_files) # Polls that find the same files and mtimes don't rescan
+        self._watcher.start()
+
+    def close(self):
+        """Stops watching the folder. Called when the library is evicted from the registry."""
+        self.closed = True
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def apply_series_rules(self):
+        """Re-derives series fields with the current rules. Returns the number of games whose series changed."""
+        with self.lock:
+            changed_entries = self._rederive_series_fields(list(self.parsed_files))
+            touched_ids = self._in_file_order({self.parsed_files[file_path].id for file_path in changed_entries})
+            previously_cached_ids = set(self.all_games)
+            for game_id in touched_ids:
+                self._materialize_cache_entry(game_id)
+            self._update_search_index(touched_ids)
+            if _parse_cache_store is not None and changed_entries:
+                _parse_cache_store.save_changes(self.folder_path, changed_entries, [])
+            if touched_ids:
+                self._commit_changes()
+                self._publish_cache_delta(previously_cached_ids, touched_ids)
+            return len(touched_ids)
+
+    def duplicate_id_warnings(self, snapshot=None):
+        """User-friendly messages for the cached games that carry a "Duplicate ID" parse warning."""
+        # Collect IDs of games that have "Duplicate ID" in their parse_warning field
+        games = (snapshot or self.snapshot).games
+        duplicates = [game for game in games.values() if "Duplicate ID" in (game.parse_warning or "")]
+        return [f"ID '{game.id or 'N/A'}' in file '{game.source_filename or 'N/A'}' is reported as a duplicate." for game in duplicates]
+
+    def start_load(self):
+        """Starts a full scan on a background thread unless one is already running. Returns its LoadJob."""
+        with self._load_job_lock:
+            job = self._load_job
+            if job is not None and not job.finished:
+                return job # Single flight: join the scan in progress
+            job = LoadJob(self.folder_path)
+            job.profile = _take_profile_request(self.folder_path)
+            self._load_job = job
+        threading.Thread(target=self._run_load_job, args=(job,), name="library-load", daemon=True).start()
+        return job
+
+    def _run_load_job(self, job):
+        profiler = _start_profiler() if job.profile else None
+        try:
+            result = self.refresh(job=job)
+        except Exception as e:
+            app.logger.error(f"Loading {self.folder_path} failed: {e}", exc_info=True)
+            result = e
+        if profiler is not None:
+            job.profile_path = _dump_load_profile(profiler, self, job.stats)
+        if isinstance(result, Exception):
+            job.finish(error=result)
+            return
+        if result[0] is None and not self.loaded:
+            _discard_library(self) # Don't keep a library for a folder that couldn't be read
+        job.finish(result=result)
 
+    def refresh(self, changed_paths=None, job=None):
+        """
+        Brings all_games in line with the folder contents, reparsing only new or modified files.
+        changed_paths (from the folder watcher) limits the check to those files instead of listing the folder.
+        job, if given, is the LoadJob to report progress and freshly parsed GameRecords to.
+        Returns (md_files, warnings) where md_files is None if the directory couldn't be read.
+        """
+        with self.lock:
+            result = self._refresh_locked(changed_paths, job)
+        _enforce_library_memory_budget()
+        return result
+
+    def _refresh_locked(self, changed_paths, job=None):
+        md_folder_path = self.folder_path
+        if not self.loaded and changed_paths is not None:
+            return None, [] # Targeted refreshes only make sense once the folder has been scanned
+        if self.read_only:
+            return self._load_read_only_locked(job) if changed_paths is None else (None, [])
+
+        stats = LoadStats(SLOWEST_FILES_COUNT)
+        if job is not None:
+            job.stats = stats
+        refresh_start = phase_start = time.perf_counter()
+        touched_ids = set()
+        scanned = None # file path -> (mtime_ns, size) from the directory scan, full rescans only
+        if changed_paths is None:
+            scanned = scan_md_files(md_folder_path)
+            if scanned is None: # Error accessing directory
+                return None, []
+            md_files = list(scanned)
+            self.file_order.clear()
+            self.file_order.update((path, idx) for idx, path in enumerate(md_files))
+            stats.add_phase("listing", time.perf_counter() - phase_start)
+            if not self.loaded:
+                # Records persisted by a previous run are validated by the fingerprint checks below like any other
+                with stats.phase("restore"):
+                    if self.snapshot_file is not None:
+                        touched_ids |= self._restore_from_snapshot_file()
+                    else:
+                        touched_ids |= self._restore_from_parse_cache_store()
+            vanished_paths = [p for p in self.parsed_files if p not in self.file_order]
+        else:
+            md_files = sorted((p for p in changed_paths
+                               if _md_scanner.accepts(md_folder_path, p) and os.path.isfile(p)),
+                              key=lambda p: self.file_order.get(p, len(self.file_order)))
+            for path in md_files:
+                self.file_order.setdefault(path, len(self.file_order))
+            vanished_paths = [p for p in changed_paths if p in self.parsed_files and p not in md_files]
+            stats.add_phase("listing", time.perf_counter() - phase_start)
+
+        previously_cached_ids = set(self.all_games)
+        removed_paths = []
+        parsing_warnings_summary = []
+        removed_count = 0
+        reparsed_count = 0
+
+        # 1. Drop entries for files that disappeared since the last scan
+        for file_path in vanished_paths:
+            old_game = self.parsed_files.pop(file_path)
+            self.fingerprints.pop(file_path, None)
+            self.file_order.pop(file_path, None)
+            self._detach_source_path(old_game.id, file_path)
+            touched_ids.add(old_game.id)
+            removed_paths.append(file_path)
+            removed_count += 1
+        # 2. Reparse new files and files whose fingerprint changed
+        phase_start = time.perf_counter()
+        stale_files = []
+        stale_fingerprints = {}
+        rehashed_paths = [] # Unchanged content under a new mtime (e.g. files copied along with a snapshot)
         for md_file_path in md_files:
-            parsed_game_info = parse_single_md_file(md_file_path)
-            
+            if scanned is not None:
+                mtime_ns, size = scanned[md_file_path]
+                fingerprint = (mtime_ns, size, None) # The scan already stat'ed it
+            else:
+                fingerprint = get_file_fingerprint(md_file_path)
+            if fingerprint is None: # Vanished between listing and stat
+                old_game = self.parsed_files.pop(md_file_path, None)
+                self.fingerprints.pop(md_file_path, None)
+                if old_game:
+                    self._detach_source_path(old_game.id, md_file_path)
+                    touched_ids.add(old_game.id)
+                    removed_paths.append(md_file_path)
+                    removed_count += 1
+                continue
+            stored_fingerprint = self.fingerprints.get(md_file_path)
+            if self._fingerprint_unchanged(md_file_path, fingerprint):
+                if self.fingerprints[md_file_path] is not stored_fingerprint:
+                    rehashed_paths.append(md_file_path)
+                continue
+            if FINGERPRINT_USE_CONTENT_HASH:
+                fingerprint = get_file_fingerprint(md_file_path, with_hash=True) or fingerprint
+            stale_files.append(md_file_path)
+            stale_fingerprints[md_file_path] = fingerprint
+        stats.add_phase("fingerprint", time.perf_counter() - phase_start)
+        if job is not None:
+            job.files_total, job.files_to_parse = len(md_files), len(stale_files)
+
+        phase_start = time.perf_counter()
+        updated_entries = {}
+        # A profiled load parses in-process, cProfile can't see into the pool workers
+        parse_workers = 1 if job is not None and job.profile else None
+        for md_file_path, parsed_game_info, timings in iter_parsed_md_files(stale_files, workers=parse_workers, with_timings=True):
+            reparsed_count += 1
+            stats.add_file(md_file_path, timings, parsed_game_info)
+            FILE_PARSE_SECONDS.observe(timings['total'])
+            old_game = self.parsed_files.pop(md_file_path, None)
+            if old_game:
+                self._detach_source_path(old_game.id, md_file_path)
+                touched_ids.add(old_game.id)
+
             if parsed_game_info and parsed_game_info.get('id'):
-                game_id = parsed_game_info['id']
-                if game_id in processed_ids:
-                    warning_msg = f"Duplicate game ID '{game_id}' detected. File '{parsed_game_info['source_filename']}' conflicts with a previously processed file. This entry might be overwritten or unstable."
-                    app.logger.warning(warning_msg)
-                    parsing_warnings_summary.append(warning_msg) # Add to summary
-                    # Add a parse warning to the new game object as well
-                    parsed_game_info['parse_warning'] = (parsed_game_info.get('parse_warning') or "") + "Duplicate ID. "
-                
-                temp_parsed_games[game_id] = parsed_game_info
-                processed_ids.add(game_id)
+                game = GameRecord.from_dict(parsed_game_info)
+                self.parsed_files[md_file_path] = game
+                self.fingerprints[md_file_path] = stale_fingerprints[md_file_path]
+                updated_entries[md_file_path] = (stale_fingerprints[md_file_path], parsed_game_info)
+                self._attach_source_path(game.id, md_file_path)
+                touched_ids.add(game.id)
+                if job is not None:
+                    job.file_parsed(game)
             else:
                 # This case should be rare if parse_single_md_file always returns an ID
+                self.fingerprints.pop(md_file_path, None)
+                removed_paths.append(md_file_path)
                 err_file_name = os.path.basename(md_file_path) if md_file_path else "Unknown file"
                 app.logger.error(f"Failed to generate ID or parse {err_file_name}. Skipping file.")
                 parsing_warnings_summary.append(f"Skipped file {err_file_name} due to parsing/ID error.")
-        
-        _all_games_cache = temp_parsed_games
-        app.logger.info(f"Parsed and cached {len(_all_games_cache)} games from {md_folder_path}.")
-        if parsing_warnings_summary: # Use the renamed summary list
+                if job is not None:
+                    job.file_parsed(None)
+
+        stats.add_phase("parse", time.perf_counter() - phase_start)
+
+        # 3. Only IDs whose set of source files changed need their cache entry (and duplicate marker) rebuilt
+        phase_start = time.perf_counter()
+        touched_ids = self._in_file_order(touched_ids)
+        for game_id in touched_ids:
+            warning_msg = self._materialize_cache_entry(game_id)
+            if warning_msg:
+                parsing_warnings_summary.append(warning_msg)
+        self._update_search_index(touched_ids)
+        if touched_ids or not self.loaded:
+            self._commit_changes()
+        stats.add_phase("index", time.perf_counter() - phase_start)
+
+        unchanged = self.loaded and not touched_ids and not reparsed_count and not removed_count
+        if _parse_cache_store is not None:
+            with stats.phase("store"):
+                for file_path in rehashed_paths: # So the next restart doesn't hash them again
+                    updated_entries.setdefault(file_path, (self.fingerprints[file_path], self.parsed_files[file_path].to_dict()))
+                _parse_cache_store.save_changes(md_folder_path, updated_entries, removed_paths)
+        self.loaded = True
+        self._publish_cache_delta(previously_cached_ids, touched_ids)
+        if changed_paths is None:
+            self._ensure_folder_watcher()
+
+        refresh_seconds = time.perf_counter() - refresh_start
+        self.last_load_stats = stats
+        # Rescans that found nothing to do (e.g. a repeated /api/games_basic) don't count as loads
+        _record_load_metrics(stats, refresh_seconds, "unchanged" if unchanged else "full" if changed_paths is None else "targeted")
+        (app.logger.debug if unchanged else app.logger.info)(f"Rescanned {md_folder_path} in {refresh_seconds:.2f}s: {reparsed_count} file(s) reparsed, {removed_count} removed, "
+                        f"{len(md_files) - reparsed_count} unchanged. {len(self.all_games)} games cached.")
+        if parsing_warnings_summary:
              app.logger.warning(f"Total parsing warnings during load: {len(parsing_warnings_summary)}")
+        return md_files, parsing_warnings_summary
 
 
-    # Prepare the list of games to return (now full objects)
-    games_to_return = []
-    for game_id, game_data_full in _all_games_cache.items():
-        current_game_copy = game_data_full.copy() # Work on a copy
-
-        # Ensure 'title_display' is set for card rendering
-        # Prefer Chinese, then English, then Japanese, then original 'title' metadata, then a fallback
-        display_title = current_game_copy.get('names', {}).get('chinese') or \
-                        current_game_copy.get('names', {}).get('english') or \
-                        current_game_copy.get('names', {}).get('japanese') or \
-                        current_game_copy.get('title') or \
-                        f"Untitled ({current_game_copy.get('source_filename', 'N/A')})"
-        current_game_copy['title_display'] = display_title
-
-        # Ensure essential top-level fields for direct frontend access (sorting, card display)
-        # These might also be in game_data_full.info, but having them top-level simplifies JS
-        current_game_copy['developer'] = current_game_copy.get('info', {}).get('developer')
-        current_game_copy['release_date'] = current_game_copy.get('info', {}).get('release_date')
-        current_game_copy['duration_tier'] = current_game_copy.get('info', {}).get('duration_tier', "未知时长")
-        current_game_copy['duration_hours'] = current_game_copy.get('info', {}).get('duration_hours')
-        # series_name, series_tag, parse_error, parse_warning are already handled by parse_markdown_file_content
-
-        games_to_return.append(current_game_copy)
-            
-    app.logger.info(f"Returning full data for {len(games_to_return)} games.")
-    response_payload = {"games": games_to_return}
-    
-    # Collect IDs of games that have "Duplicate ID" in their parse_warning field
-    # THIS IS THE CORRECTED LINE:
-    path_warning_ids = [w_id for w_id, w_data in _all_games_cache.items() if "Duplicate ID" in (w_data.get('parse_warning') or "")]
-
-    if path_warning_ids:
-        # Construct user-friendly messages for these specific duplicate ID warnings
-        duplicate_id_messages = []
-        for w_id in path_warning_ids:
-            game_info_for_warning = _all_games_cache.get(w_id)
-            if game_info_for_warning: # Should always be true here
-                 duplicate_id_messages.append(f"ID '{game_info_for_warning.get('id', 'N/A')}' in file '{game_info_for_warning.get('source_filename', 'N/A')}' is reported as a duplicate.")
-        
-        if duplicate_id_messages:
-            # Add these to the response payload.
-            # If 'warnings' already exists (e.g. from parsing_warnings_summary), append to it.
-            # Otherwise, create it.
-            # For simplicity, let's just send these specific duplicate ID warnings to the client.
-            # The client-side already displays per-game parse_warning messages.
-            response_payload['warnings'] = duplicate_id_messages
+# --- Library registry ---
+_libraries = OrderedDict() # library_id -> GameLibrary, least recently used first
+_libraries_lock = threading.Lock() # Only guards the registry itself, never held while a library is scanned
+_merged_index = None       # LibraryIndex over the cards of every library, see get_merged_index()
+_merged_index_sources = ()
+_merged_index_lock = threading.Lock()
+# library_id -> (folder path, SnapshotReader) of the libraries served from a snapshot alone, see open_snapshot_library().
+# Kept apart from the registry so an evicted read-only library can be loaded again.
+_read_only_snapshots = {}
+
+def get_library(folder_path=None, create=False):
+    """
+    Returns the GameLibrary for folder_path, creating it if create is set, and marks it most recently used.
+    Without folder_path, returns the most recently used library. None if there is no such library.
+    """
+    with _libraries_lock:
+        if folder_path is None:
+            return next(reversed(_libraries.values()), None)
+        library_id = library_id_for(folder_path)
+        library = _libraries.get(library_id)
+        if library is None:
+            if not create:
+                return None
+            library = GameLibrary(folder_path)
+            _libraries[library_id] = library
+        _libraries.move_to_end(library_id)
+        return library
+
+def get_library_by_id(library_id):
+    with _libraries_lock:
+        return _libraries.get(library_id)
+
+def list_libraries():
+    """Loaded libraries, least recently used first."""
+    with _libraries_lock:
+        return [library for library in _libraries.values() if library.loaded]
+
+def _discard_library(library):
+    with _libraries_lock:
+        if _libraries.get(library.library_id) is library:
+            del _libraries[library.library_id]
+    library.close()
+
+def _enforce_library_memory_budget():
+    """Evicts least recently used libraries (never the most recent one) until the estimated total fits the budget."""
+    if LIBRARY_MEMORY_BUDGET_BYTES <= 0:
+        return
+    evicted = []
+    with _libraries_lock:
+        total_bytes = sum(library.approx_bytes for library in _libraries.values())
+        while total_bytes > LIBRARY_MEMORY_BUDGET_BYTES and len(_libraries) > 1:
+            _, library = _libraries.popitem(last=False)
+            total_bytes -= library.approx_bytes
+            evicted.append(library)
+    for library in evicted:
+        library.close()
+        # Its parsed records stay in the parse cache store, so loading it again only costs a restore
+        app.logger.info(f"Evicted library {library.folder_path} (~{library.approx_bytes // 1024} KiB) to stay within the memory budget.")
+
+def start_library_load(md_folder_path):
+    """
+    Starts (or joins) the background full scan of md_folder_path, creating its library on first use.
+    Returns (library, LoadJob).
+    """
+    library = get_library(md_folder_path, create=True)
+    return library, library.start_load()
+
+def refresh_library(md_folder_path, on_parsed=None):
+    """
+    Full rescan of the library for md_folder_path, waiting for it to finish. Concurrent calls for the
+    same folder share one scan. on_parsed is called with every GameRecord parsed from then on.
+    Returns (library, md_files, warnings); a folder that can't be read gives md_files None and isn't kept.
+    """
+    library, job = start_library_load(md_folder_path)
+    if on_parsed is not None:
+        job.add_listener(on_parsed)
+    md_files, warnings = job.wait()
+    return library, md_files, warnings
+
+def open_snapshot_library(snapshot_path, folder_path=None, read_only=None):
+    """
+    Registers the library stored in a snapshot file, replacing any library for the same folder, and
+    returns it unloaded: its first load restores the snapshot instead of parsing. folder_path overrides
+    the folder recorded in the snapshot (where the copied .md files live on this machine). A folder that
+    exists is then rescanned against the snapshot's fingerprints, so only files that differ get parsed;
+    without one (or with read_only) the library is served from the snapshot alone.
+    Raises SnapshotError or OSError if the file can't be read.
+    """
+    reader = SnapshotReader(snapshot_path)
+    folder_path = folder_path or reader.folder_path
+    if not folder_path:
+        reader.close()
+        raise SnapshotError(f"{snapshot_path} doesn't record its folder; pass one.")
+    if read_only is None:
+        read_only = not os.path.isdir(folder_path)
+    if not read_only and reader.parser_version != PARSER_VERSION:
+        # Its records can't stand in for this parser's output; the folder is parsed as usual
+        app.logger.warning(f"Snapshot {snapshot_path} was written by parser version {reader.parser_version}, not {PARSER_VERSION}. Reparsing {folder_path}.")
+        reader.close()
+        reader = None
+    library_id = library_id_for(folder_path)
+    with _libraries_lock:
+        previous = _libraries.pop(library_id, None)
+        previous_source = _read_only_snapshots.pop(library_id, None)
+        if read_only:
+            _read_only_snapshots[library_id] = (folder_path, reader)
+        library = GameLibrary(folder_path)
+        if not read_only:
+            library.snapshot_file = reader
+        _libraries[library_id] = library
+    if previous is not None:
+        previous.close()
+        previous.release_snapshot_file()
+    if previous_source is not None:
+        previous_source[1].close() # Also held by the replaced read-only library, if one was registered; closing twice is harmless
+    app.logger.info(f"Opened snapshot {snapshot_path} ({reader.meta.get('rows') if reader else 0} files) for {folder_path}"
+                    f"{' (read-only)' if read_only else ''}.")
+    return library
+
+def is_snapshot_only_folder(md_folder_path):
+    """Whether md_folder_path names a read-only library served from a snapshot, with no folder on disk."""
+    return library_id_for(md_folder_path) in _read_only_snapshots
+
+def lookup_snapshot_game(reader, game_id):
+    """Detail lookup in a snapshot that isn't loaded yet: a binary search over its ID index, decoding only the matching rows."""
+    rows = reader.rows_for_id(game_id)
+    if not rows:
+        return None
+    game = reader.record(rows[-1]) # Later files win, as in a full load
+    if not game.parse_error:
+        series_name, series_tag = _series_rules.derive(game.title, game.aliases, game.related_works)
+        game = game.replace(series_name=series_name, series_tag=series_tag)
+    if len(rows) > 1:
+        game = game.replace(parse_warning=(game.parse_warning or "") + "Duplicate ID. ")
+    return game
+
+def stored_folder_for_library_id(library_id):
+    """Folder path of a library that isn't loaded (e.g. after a restart), from the folders in the parse cache store."""
+    if library_id in _read_only_snapshots:
+        return _read_only_snapshots[library_id][0]
+    if _parse_cache_store is None:
+        return None
+    return next((folder for folder in _parse_cache_store.folders() if library_id_for(folder) == library_id), None)
+
+def lookup_stored_game(md_folder_path, game_id):
+    """
+    Detail lookup for a folder that isn't loaded: the persistent ID index names the source file, whose
+    stored record is used while the file is unchanged and which is reparsed on its own otherwise.
+    A read-only library is answered from its snapshot. Returns a GameRecord or None.
+    """
+    read_only_source = _read_only_snapshots.get(library_id_for(md_folder_path))
+    if read_only_source is not None:
+        return lookup_snapshot_game(read_only_source[1], game_id)
+    if _parse_cache_store is None:
+        return None
+    matches = []
+    # No directory listing to order by here; the last path stands in for "later files win"
+    for file_path, (stored_fingerprint, game_dict) in sorted(_parse_cache_store.find_by_id(md_folder_path, game_id).items()):
+        fingerprint = get_file_fingerprint(file_path)
+        if fingerprint is None:
+            continue
+        if fingerprint[:2] != stored_fingerprint[:2]:
+            game_dict = parse_single_md_file(file_path)
+            _parse_cache_store.save_changes(md_folder_path, {file_path: (fingerprint, game_dict)}, [])
+            if game_dict.get('id') != game_id:
+                continue
+        matches.append(GameRecord.from_dict(game_dict))
+    if not matches:
+        return None
+    game = matches[-1]
+    if not game.parse_error: # The rule packs may have changed since the record was stored
+        series_name, series_tag = _series_rules.derive(game.title, game.aliases, game.related_works)
+        game = game.replace(series_name=series_name, series_tag=series_tag)
+    if len(matches) > 1:
+        game = game.replace(parse_warning=(game.parse_warning or "") + "Duplicate ID. ")
+    return game
+
+# GALGAME_SNAPSHOTS: snapshot files opened at startup, separated by the OS path separator, each optionally
+# followed by "=<folder>" to serve it under another folder path. Nothing is decoded until a folder is requested,
+# so a read-only viewer started from snapshots alone is up at once.
+for _snapshot_setting in filter(None, os.environ.get("GALGAME_SNAPSHOTS", "").split(os.pathsep)):
+    _snapshot_path, _, _snapshot_folder = _snapshot_setting.partition("=")
+    try:
+        open_snapshot_library(_snapshot_path, _snapshot_folder or None)
+    except (OSError, SnapshotError) as e:
+        app.logger.error(f"Could not open snapshot {_snapshot_path}: {e}")
+
+def get_merged_index(libraries):
+    """LibraryIndex over the cards of all given libraries, keyed by uid. Rebuilt only when one of them changed."""
+    global _merged_index, _merged_index_sources
+    source_indexes = tuple(library.index for library in libraries)
+    with _merged_index_lock:
+        if _merged_index is None or len(source_indexes) != len(_merged_index_sources) or \
+           any(a is not b for a, b in zip(source_indexes, _merged_index_sources)):
+            # The per-library cards are reused as they are, nothing is rebuilt from the records
+            _merged_index = LibraryIndex({card['uid']: card for index in source_indexes for card in index.cards}, lambda card: card)
+            _merged_index_sources = source_indexes
+        return _merged_index
 
+def search_libraries(libraries, search_term):
+    """Ranked [(uid, score)] over several libraries, best first."""
+    results = []
+    for library in libraries:
+        results.extend((make_game_uid(library.library_id, game_id), score) for game_id, score in library.search(search_term))
+    results.sort(key=lambda item: -item[1])
+    return results
 
-    return jsonify(response_payload)
+def _record_load_metrics(stats, refresh_seconds, kind):
+    REFRESH_SECONDS.observe(refresh_seconds, kind=kind)
+    for phase, seconds in stats.phases.items():
+        LOAD_PHASE_SECONDS.inc(seconds, phase=phase)
+    FILES_PARSED.inc(stats.files_parsed)
+    PARSE_ERRORS.inc(stats.parse_errors)
+    PARSE_WARNINGS.inc(stats.parse_warnings)
+
+def _library_gauge(attribute):
+    def read():
+        with _libraries_lock:
+            libraries = list(_libraries.values())
+        return [({"library_id": library.library_id}, attribute(library)) for library in libraries if library.loaded]
+    return read
+
+metrics.gauge_callback("galgame_library_games", "Games served per loaded library.", _library_gauge(lambda library: len(library.all_games)))
+metrics.gauge_callback("galgame_library_approx_bytes", "Estimated memory held per loaded library.", _library_gauge(lambda library: library.approx_bytes))
+
+def arm_load_profiler(md_folder_path=None):
+    """Makes the next full load of md_folder_path (of any folder if None) run under cProfile."""
+    global _profile_request
+    with _profile_request_lock:
+        _profile_request = md_folder_path or ""
+
+def _take_profile_request(md_folder_path):
+    global _profile_request
+    with _profile_request_lock:
+        if _profile_request is None or _profile_request not in ("", md_folder_path):
+            return False
+        _profile_request = None # One load only
+        return True
+
+def _start_profiler():
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e: # Another profiler is already active in this process
+        app.logger.warning(f"Could not profile the load: {e}")
+        return None
+    return profiler
+
+def _dump_load_profile(profiler, library, stats):
+    """Writes <PROFILE_DIR>/load-<library_id>-<time>.pstats plus a readable .txt summary. Returns the .pstats path."""
+    profiler.disable()
+    base_path = os.path.join(PROFILE_DIR, f"load-{library.library_id}-{time.strftime('%Y%m%d-%H%M%S')}")
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(base_path + ".pstats")
+        with open(base_path + ".txt", 'w', encoding='utf-8') as f:
+            f.write(f"Load of {library.folder_path}\n")
+            if stats is not None:
+                f.write("Slowest files:\n")
+                for file_path, seconds in stats.slowest_files():
+                    f.write(f"  {seconds * 1000:10.2f} ms  {file_path}\n")
+                f.write("\n")
+            pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+    except OSError as e:
+        app.logger.error(f"Could not write the load profile to {PROFILE_DIR}: {e}")
+        return None
+    app.logger.info(f"Load profile written to {base_path}.pstats")
+    return base_path + ".pstats"
+
+def reload_series_rules():
+    """
+    Reloads the series rule packs and re-derives series_name/series_tag for every cached game
+    without reparsing any Markdown. Returns the number of games whose series fields changed.
+    """
+    global _series_rules
+    _series_rules = SeriesRules.load(SERIES_RULE_PACKS)
+    _shutdown_parse_pool() # Pool workers were started with the old rules
+    changed_count = sum(library.apply_series_rules() for library in list_libraries())
+    app.logger.info(f"Reloaded series rules from {len(_series_rules.sources)} pack(s): "
+                    f"{len(_series_rules.prefix_trie)} prefixes, {len(_series_rules.title_patterns)} title patterns. "
+                    f"Series changed for {changed_count} game(s).")
+    return changed_count
+
+# Responses smaller than this aren't worth compressing
+COMPRESSION_MIN_BYTES = 1024
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _observe_request_latency(response):
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        # The route template, not the URL, keeps the label set small
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method,
+                                status=f"{response.status_code // 100}xx")
+    return response
+
+def _accepted_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def make_cached_json_response(payload):
+    """
+    JSON response with a weak ETag over the body. payload is data to encode or a ready EncodedBody, whose
+    stored compressed variants are reused. GET requests carrying a matching If-None-Match get an empty
+    304; everything else is compressed when the client allows it.
+    """
+    start = time.perf_counter()
+    body = payload if isinstance(payload, EncodedBody) else EncodedBody(encode_json(payload))
+    response = app.response_class(body.data, mimetype='application/json')
+    response.set_etag(body.etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache' # Cache, but revalidate every time
+    response.make_conditional(request)
+    if response.status_code == 200:
+        response.vary.add('Accept-Encoding')
+        encoding = _accepted_encoding() if len(body.data) >= COMPRESSION_MIN_BYTES else None
+        if encoding is not None:
+            response.set_data(body.variant(encoding))
+            response.headers['Content-Encoding'] = encoding
+    SERIALIZATION_SECONDS.observe(time.perf_counter() - start, endpoint=request.endpoint or "")
+    return response
+
+@app.route('/api/games_basic', methods=['GET', 'POST'])
+def get_games_basic_info():
+    """
+    Card records (see build_card_record) for every game in the folder. Full details come from
+    /api/game_details/<game_id>. GET ?folder_path= lets the browser revalidate with If-None-Match.
+    """
+    request_data = request.get_json(silent=True) if request.method == 'POST' else request.args
+    if not request_data or 'folder_path' not in request_data:
+        return jsonify({"error": "Request must include 'folder_path' (JSON body or query parameter)"}), 400
+
+    md_folder_path = request_data['folder_path']
+    # Basic path validation (more robust validation might be needed for security in a real app)
+    if not is_valid_folder_path(md_folder_path):
+         return jsonify({"error": "Invalid or relative folder path provided."}), 400
+    app.logger.info(f"Request for game info from: {md_folder_path}")
+
+    # Incremental rescan: only new/modified files are reparsed, deleted files are dropped
+    library, md_files, _ = refresh_library(md_folder_path)
+    if md_files is None: # Error accessing directory
+        return jsonify({"error": f"Could not access or read directory: {md_folder_path}. Check path and permissions."}), 404
+    if not md_files: # No MD files found
+        return jsonify({"message": "No .md files found in the specified directory.", "games": []}), 200
+
+
+    # The body is serialized once per cache generation, from card bytes encoded once per record
+    app.logger.info(f"Returning card data for {len(library.all_games)} games.")
+    return make_cached_json_response(library.cards_body())
+
+
+# Streaming load: cards are flushed after this many records or this many seconds, whichever comes first
+STREAM_BATCH_SIZE = 200
+STREAM_FLUSH_SECONDS = 0.1
+
+def _ndjson_line(payload):
+    return encode_json(payload) + b"\n" # Same encoding as /api/games_basic
+
+def _stream_games_ndjson(md_folder_path):
+    """
+    Generator behind /api/games_stream. The rescan runs on a helper thread; every freshly parsed game is
+    streamed as soon as it arrives, then the cards that didn't need parsing (unchanged or restored files)
+    and those that changed during the rescan (duplicate IDs) follow, then an "end" trailer.
+    """
+    parsed_games = queue.Queue()
+    outcome = {}
+
+    def run_refresh():
+        try:
+            outcome['library'], outcome['md_files'], _ = refresh_library(md_folder_path, on_parsed=parsed_games.put)
+        except Exception as e:
+            app.logger.error(f"Streaming load of {md_folder_path} failed: {e}", exc_info=True)
+            outcome['error'] = str(e)
+        finally:
+            parsed_games.put(None) # End of parsing
+
+    library_id = library_id_for(md_folder_path)
+    threading.Thread(target=run_refresh, name="games-stream-refresh", daemon=True).start()
+    yield _ndjson_line({"type": "start", "folder_path": md_folder_path, "library_id": library_id})
+
+    streamed_ids = set()
+    parsing_done = False
+    while not parsing_done:
+        batch = []
+        flush_at = time.monotonic() + STREAM_FLUSH_SECONDS
+        while len(batch) < STREAM_BATCH_SIZE:
+            try:
+                game = parsed_games.get(timeout=max(0.0, flush_at - time.monotonic()))
+            except queue.Empty:
+                break
+            if game is None:
+                parsing_done = True
+                break
+            batch.append(build_card_record(game, library_id))
+        if batch:
+            streamed_ids.update(card['id'] for card in batch)
+            yield _ndjson_line({"type": "games", "games": batch})
+
+    if 'error' in outcome or outcome.get('md_files') is None:
+        yield _ndjson_line({"type": "error", "error": outcome.get('error') or f"Could not access or read directory: {md_folder_path}. Check path and permissions."})
+        return
+    if not outcome['md_files']:
+        yield _ndjson_line({"type": "end", "total": 0, "message": "No .md files found in the specified directory."})
+        return
+
+    library = outcome['library']
+    cards = library.index.cards # Immutable for this cache generation
+    # Clients replace cards by ID, so an updated card simply overrides the provisional one
+    remaining = [card for card in cards if card['id'] not in streamed_ids or "Duplicate ID" in (card['parse_warning'] or "")]
+    for start in range(0, len(remaining), STREAM_BATCH_SIZE):
+        yield _ndjson_line({"type": "games", "games": remaining[start:start + STREAM_BATCH_SIZE]})
+    trailer = {"type": "end", "total": len(cards)}
+    duplicate_id_messages = library.duplicate_id_warnings()
+    if duplicate_id_messages:
+        trailer['warnings'] = duplicate_id_messages
+    yield _ndjson_line(trailer)
+
+@app.route('/api/games_stream', methods=['GET'])
+def stream_games_basic_info():
+    """
+    Same cards as /api/games_basic, as newline-delimited JSON sent while the folder is still being parsed:
+    {"type": "start"}, any number of {"type": "games", "games": [...]} batches (a card for an ID replaces
+    any card sent earlier for it), then {"type": "end", "total", "warnings"?, "message"?} or {"type": "error"}.
+    """
+    md_folder_path = request.args.get('folder_path')
+    if not is_valid_folder_path(md_folder_path):
+        return jsonify({"error": "Invalid or relative folder path provided."}), 400
+    if not os.path.isdir(md_folder_path) and not is_snapshot_only_folder(md_folder_path):
+        return jsonify({"error": f"Could not access or read directory: {md_folder_path}. Check path and permissions."}), 404
+    app.logger.info(f"Streaming game info from: {md_folder_path}")
+    response = Response(_stream_games_ndjson(md_folder_path), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no' # Don't let a reverse proxy hold the batches back
+    return response
+
+
+def _favorite_ids_for(favorite_ids, libraries, merged):
+    """
+    Favorites may be stored as plain game IDs or as uids. The merged index is keyed by uid, a single
+    library's index by plain ID; a plain ID matches that game in every library.
+    """
+    if favorite_ids is None:
+        return None
+    if merged:
+        uids = set()
+        for favorite_id in favorite_ids:
+            library_id, game_id = split_game_uid(favorite_id)
+            if library_id:
+                uids.add(favorite_id)
+            else:
+                uids.update(make_game_uid(library.library_id, game_id) for library in libraries)
+        return uids
+    library_prefix = libraries[0].library_id + ":"
+    return {favorite_id[len(library_prefix):] if favorite_id.startswith(library_prefix) else favorite_id
+            for favorite_id in favorite_ids}
+
+def _resolve_query_libraries(request_data):
+    """
+    The libraries a /api/games/query or /api/games/facets request targets: (libraries, merged, None),
+    or (None, False, error response) when the request can't be served.
+    """
+    merged = request_data.get('scope') == 'all'
+    md_folder_path = request_data.get('folder_path')
+    if merged:
+        libraries = list_libraries()
+        if not libraries:
+            return None, False, (jsonify({"error": "No library loaded yet. Load a folder via /api/games_basic first."}), 400)
+    elif md_folder_path:
+        if not is_valid_folder_path(md_folder_path):
+            return None, False, (jsonify({"error": "Invalid or relative folder path provided."}), 400)
+        library = get_library(md_folder_path)
+        if library is None or not library.loaded:
+            library, md_files, _ = refresh_library(md_folder_path)
+            if md_files is None:
+                return None, False, (jsonify({"error": f"Could not access or read directory: {md_folder_path}. Check path and permissions."}), 404)
+        libraries = [library]
+    else:
+        library = get_library()
+        if library is None:
+            return None, False, (jsonify({"error": "No library loaded yet. Load a folder via /api/games_basic or pass 'folder_path'."}), 400)
+        libraries = [library]
+    return libraries, merged, None
+
+def _query_filters(request_data, libraries, merged):
+    """(index, search_results, favorite IDs, {facet name: selected value}) for a query/facets request body."""
+    favorite_ids = request_data.get('favorite_ids')
+    if favorite_ids is not None and not (isinstance(favorite_ids, list) and all(isinstance(i, str) for i in favorite_ids)):
+        raise ValueError("'favorite_ids' must be a list of game IDs (strings).")
+    search_term = (request_data.get('search') or '').strip()
+    if merged:
+        index = get_merged_index(libraries)
+        search_results = search_libraries(libraries, search_term) if search_term else None
+    else:
+        index = libraries[0].index
+        search_results = libraries[0].search(search_term) if search_term else None
+    facet_values = {name: str(request_data[name]) for name in FACET_FIELDS if request_data.get(name)}
+    return index, search_results, _favorite_ids_for(favorite_ids, libraries, merged), facet_values
+
+@app.route('/api/games/query', methods=['POST'])
+def query_games():
+    """
+    Server-side search/filter/sort/pagination over the loaded library.
+    Body: {folder_path?, scope?, search?, developer?, duration_tier?, series?, platform?, year?, favorite_ids?,
+           sort_key?, sort_direction?, page?, page_size?}
+    Without folder_path the most recently used library is queried; scope "all" queries every loaded
+    library at once (cards are then told apart by their 'uid').
+    sort_key may also be "relevance" when a search term is given.
+    Returns one page of card records plus the total number of matches.
+    """
+    request_data = request.get_json(silent=True) or {}
+
+    libraries, merged, error_response = _resolve_query_libraries(request_data)
+    if error_response is not None:
+        return error_response
+    try:
+        page = int(request_data.get('page', 1))
+        page_size = int(request_data.get('page_size', 12))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'page' and 'page_size' must be integers."}), 400
+    try:
+        index, search_results, favorite_ids, facet_values = _query_filters(request_data, libraries, merged)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sort_key = request_data.get('sort_key', 'title_display')
+    total, cards = index.query(
+        search_results=search_results,
+        favorite_ids=favorite_ids,
+        sort_key=sort_key,
+        sort_direction=request_data.get('sort_direction', 'desc' if sort_key == RELEVANCE_SORT_KEY else 'asc'),
+        page=page, page_size=page_size,
+        **facet_values)
+
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    return jsonify({
+        "games": cards,
+        "total": total,
+        "page": max(1, page),
+        "page_size": page_size,
+        "total_pages": (total + page_size - 1) // page_size,
+        "libraries": [{"library_id": library.library_id, "folder_path": library.folder_path} for library in libraries],
+    })
+
+
+@app.route('/api/games/facets', methods=['POST'])
+def get_game_facets():
+    """
+    Number of matching games per developer, duration_tier, series, platform and year value under the
+    filters of the body, which takes the same fields as /api/games/query (paging and sorting are ignored).
+    Each facet is counted without its own selection, so a dropdown can show what every choice would give.
+    "facets": [names] limits the answer to those facets.
+    """
+    request_data = request.get_json(silent=True) or {}
+
+    facet_names = request_data.get('facets')
+    if facet_names is not None and (not isinstance(facet_names, list) or any(name not in FACET_FIELDS for name in facet_names)):
+        return jsonify({"error": f"'facets' must be a list of facet names ({', '.join(FACET_FIELDS)})."}), 400
+    libraries, merged, error_response = _resolve_query_libraries(request_data)
+    if error_response is not None:
+        return error_response
+    try:
+        index, search_results, favorite_ids, facet_values = _query_filters(request_data, libraries, merged)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    counts, total = index.facet_counts(search_results=search_results, favorite_ids=favorite_ids,
+                                       facet_names=facet_names, **facet_values)
+    return jsonify({
+        "facets": counts,
+        "total": total,
+        "libraries": [{"library_id": library.library_id, "folder_path": library.folder_path} for library in libraries],
+    })
+
+def _library_status(library):
+    job = library.load_job
+    return {
+        "library_id": library.library_id,
+        "folder_path": library.folder_path,
+        "loaded": library.loaded,
+        "read_only": library.read_only,
+        "games": len(library.all_games),
+        "generation": library.generation,
+        "approx_bytes": library.approx_bytes,
+        "load": job.status() if job is not None else None,
+        # Also covers the targeted rescans triggered by the folder watcher
+        "last_scan": library.last_load_stats.to_dict() if library.last_load_stats is not None else None,
+    }
+
+@app.route('/api/libraries', methods=['GET'])
+def get_libraries():
+    """The libraries currently held in memory, least recently used first."""
+    return jsonify({
+        "memory_budget_bytes": LIBRARY_MEMORY_BUDGET_BYTES,
+        "libraries": [_library_status(library) for library in list_libraries()],
+    })
+
+@app.route('/api/libraries/load', methods=['POST'])
+def load_library_in_background():
+    """
+    Starts loading {folder_path} in the background and answers 202 right away. A load already running
+    for that folder is joined rather than repeated. Poll /api/libraries/status until load.state is "done".
+    With "profile": true a newly started load runs under cProfile, see /api/profiler/arm.
+    """
+    request_data = request.get_json(silent=True) or {}
+    md_folder_path = request_data.get('folder_path')
+    if not is_valid_folder_path(md_folder_path):
+        return jsonify({"error": "Invalid or relative folder path provided."}), 400
+    if not os.path.isdir(md_folder_path) and not is_snapshot_only_folder(md_folder_path):
+        return jsonify({"error": f"Could not access or read directory: {md_folder_path}. Check path and permissions."}), 404
+    if request_data.get('profile'):
+        arm_load_profiler(md_folder_path)
+    library, _ = start_library_load(md_folder_path)
+    return jsonify(_library_status(library)), 202
+
+@app.route('/api/libraries/export', methods=['GET'])
+def export_library_snapshot():
+    """
+    Downloads the parsed library for ?folder_path= (loaded first if needed) as a snapshot file, which
+    /api/libraries/import or GALGAME_SNAPSHOTS can load on another machine without parsing.
+    """
+    md_folder_path = request.args.get('folder_path')
+    if not is_valid_folder_path(md_folder_path):
+        return jsonify({"error": "Invalid or relative folder path provided."}), 400
+    library = get_library(md_folder_path)
+    if library is None or not library.loaded:
+        library, md_files, _ = refresh_library(md_folder_path)
+        if md_files is None:
+            return jsonify({"error": f"Could not access or read directory: {md_folder_path}. Check path and permissions."}), 404
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    snapshot_path = os.path.join(SNAPSHOT_DIR, library.library_id + SNAPSHOT_FILE_EXTENSION)
+    meta = library.export_snapshot(snapshot_path)
+    app.logger.info(f"Exported {meta['rows']} parsed file(s) of {md_folder_path} to {snapshot_path}.")
+    download_name = (os.path.basename(os.path.normpath(md_folder_path)) or library.library_id) + SNAPSHOT_FILE_EXTENSION
+    return send_file(snapshot_path, mimetype='application/octet-stream', as_attachment=True, download_name=download_name)
+
+@app.route('/api/libraries/import', methods=['POST'])
+def import_library_snapshot():
+    """
+    Opens the snapshot file at {path} on this machine and starts loading its library in the background
+    (answers 202 like /api/libraries/load). {folder_path} overrides the folder recorded in the snapshot;
+    without a folder on disk, or with "read_only": true, the library is served from the snapshot alone.
+    """
+    request_data = request.get_json(silent=True) or {}
+    snapshot_path = request_data.get('path')
+    md_folder_path = request_data.get('folder_path')
+    if not snapshot_path or not os.path.isabs(snapshot_path):
+        return jsonify({"error": "'path' must be the absolute path of a snapshot file."}), 400
+    if md_folder_path and not is_valid_folder_path(md_folder_path):
+        return jsonify({"error": "Invalid or relative folder path provided."}), 400
+    try:
+        library = open_snapshot_library(snapshot_path, md_folder_path, read_only=True if request_data.get('read_only') else None)
+    except (OSError, SnapshotError) as e:
+        return jsonify({"error": f"Could not read snapshot: {e}"}), 400
+    library.start_load()
+    return jsonify(_library_status(library)), 202
+
+@app.route('/api/libraries/status', methods=['GET'])
+def get_library_status():
+    """Load progress (files parsed / to parse) and cache state of the library for ?folder_path=."""
+    md_folder_path = request.args.get('folder_path')
+    if not md_folder_path:
+        return jsonify({"error": "Query parameter 'folder_path' is required."}), 400
+    library = get_library_by_id(library_id_for(md_folder_path)) # Polling doesn't count as using the library
+    if library is None:
+        return jsonify({"error": "This folder is not loaded."}), 404
+    return jsonify(_library_status(library))
+
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of cache changes made by the folder watcher (or by other clients' reloads).
+    Events: "delta" {folder_path, library_id, added: [cards], updated: [cards], removed: [ids]}
+            "reload" {folder_path, library_id} when too much changed to send record by record.
+    """
+    subscriber_queue = queue.Queue(maxsize=100)
+    with _event_subscribers_lock:
+        _event_subscribers.add(subscriber_queue)
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n" # Tell EventSource how long to wait before reconnecting
+            while True:
+                try:
+                    event_name, data = subscriber_queue.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n" # Comment line, keeps proxies from closing an idle stream
+                    continue
+                yield f"event: {event_name}\ndata: {data}\n\n"
+        finally:
+            with _event_subscribers_lock:
+                _event_subscribers.discard(subscriber_queue)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/search', methods=['GET'])
+def search_games():
+    """
+    Ranked full-text search over titles, names, aliases, developer, series and description.
+    Searches the library for ?folder_path= (the most recently used one if omitted).
+    """
+    query_text = (request.args.get('q') or '').strip()
+    if not query_text:
+        return jsonify({"error": "Query parameter 'q' is required."}), 400
+    md_folder_path = request.args.get('folder_path')
+    library = get_library(md_folder_path) if md_folder_path else get_library()
+    if library is None:
+        return jsonify({"error": "No library loaded for this folder. Load it via /api/games_basic first."}), 404
+    if request.args.get('ids_only') in ('1', 'true'):
+        # Every matching ID, best first, for clients that filter their own card list
+        return jsonify({"query": query_text, "ids": [game_id for game_id, _ in library.search(query_text)]})
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer."}), 400
+
+    results = []
+    snapshot = library.snapshot # Cards of one generation, never built here
+    for game_id, score in library.search(query_text, limit=limit):
+        card = snapshot.card(game_id)
+        if card is not None:
+            results.append(dict(card, score=score)) # Cards are shared with the index, never modify them
+    return jsonify({"query": query_text, "results": results})
+
+
+@app.route('/api/series_rules/reload', methods=['POST'])
+def reload_series_rules_endpoint():
+    """Re-reads the series rule packs and applies them to the loaded games, without reparsing any file."""
+    changed_count = reload_series_rules()
+    return jsonify({
+        "rule_packs": list(_series_rules.sources),
+        "prefix_rules": len(_series_rules.prefix_trie),
+        "title_patterns": len(_series_rules.title_patterns),
+        "changed_games": changed_count,
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request latencies, scan phase timings and parse counters in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiler/arm', methods=['POST'])
+def arm_profiler_endpoint():
+    """
+    Profiles the next full load of {folder_path} (of any folder if omitted) with cProfile. The load's status
+    then carries profile_path; next to that .pstats file is a .txt with the slowest files and the top functions.
+    """
+    request_data = request.get_json(silent=True) or {}
+    md_folder_path = request_data.get('folder_path')
+    arm_load_profiler(md_folder_path)
+    return jsonify({"armed": True, "folder_path": md_folder_path, "profile_dir": PROFILE_DIR})
+
+
+@app.route('/api/thumbnail/<game_uid>/<kind>', methods=['GET'])
+def get_game_thumbnail(game_uid, kind):
+    """
+    Resized copy of a game's local cover ("cover") or nth screenshot ("screenshot-<n>"), ?w= one of
+    thumbnails.ALLOWED_WIDTHS. Redirects to the content-addressed /api/thumbnails/<key> file, which
+    never changes and can be cached by the browser for good; this redirect itself is only cached briefly.
+    """
+    if _thumbnail_cache is None:
+        return jsonify({"error": "Thumbnails are not available (install Pillow to enable them)."}), 404
+    library_id, game_id = split_game_uid(game_uid)
+    library = get_library_by_id(library_id) if library_id else None
+    game = library.all_games.get(game_id) if library else None
+    if game is None:
+        return jsonify({"error": "Game not found. Its library may not be loaded."}), 404
+    if kind == "cover":
+        image_ref = game.cover_image
+    elif kind.startswith("screenshot-") and kind[len("screenshot-"):].isdigit() and int(kind[len("screenshot-"):]) < len(game.screenshots):
+        image_ref = game.screenshots[int(kind[len("screenshot-"):])]
+    else:
+        return jsonify({"error": f"Unknown image '{kind}'."}), 404
+    try:
+        width = int(request.args.get('w', THUMBNAIL_DEFAULT_WIDTHS[kind.split('-')[0]]))
+    except ValueError:
+        width = 0
+    if width not in ALLOWED_WIDTHS:
+        return jsonify({"error": f"'w' must be one of {list(ALLOWED_WIDTHS)}."}), 400
+
+    source_path = resolve_local_image(library.folder_path, image_ref)
+    if source_path is None:
+        return jsonify({"error": "This image is not a local file inside the library folder."}), 404
+    fmt = _thumbnail_cache.output_format(accept_webp='image/webp' in request.headers.get('Accept', ''))
+    try:
+        key = _thumbnail_cache.get_thumbnail(source_path, width, fmt)
+    except ThumbnailError as e:
+        app.logger.warning(f"Thumbnail for {game_uid}/{kind} failed: {e}")
+        return jsonify({"error": "Could not create a thumbnail for this image."}), 500
+    response = redirect(f"/api/thumbnails/{key}", code=302)
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    response.vary.add('Accept') # The format depends on whether the browser takes WebP
+    return response
+
+@app.route('/api/thumbnails/<key>', methods=['GET'])
+def serve_thumbnail(key):
+    """A generated thumbnail. Its name is a hash of its content, so it is cached as immutable."""
+    thumbnail_path = _thumbnail_cache.path_for_key(key) if _thumbnail_cache is not None else None
+    if thumbnail_path is None or not os.path.isfile(thumbnail_path):
+        return jsonify({"error": "Thumbnail not found."}), 404
+    response = send_file(thumbnail_path, mimetype=MIME_TYPES[key.rsplit('.', 1)[1]], conditional=True, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 
 @app.route('/api/game_details/<game_id>', methods=['GET'])
 def get_game_details(game_id):
+    """
+    Full record of one game. game_id is either a card's 'uid', which names its library, or a plain ID
+    looked up in the library for ?folder_path= (the most recently used one if omitted).
+    """
     app.logger.info(f"Request for details of game_id: {game_id}")
-    game_detail = _all_games_cache.get(game_id) # Get from the same cache
-
-    if game_detail:
-        # The cache now stores full game objects, so we can return it directly
-        # (after ensuring title_display for consistency, though not strictly needed for this endpoint)
-        current_game_copy = game_detail.copy()
-        display_title = current_game_copy.get('names', {}).get('chinese') or \
-                        current_game_copy.get('names', {}).get('english') or \
-                        current_game_copy.get('names', {}).get('japanese') or \
-                        current_game_copy.get('title') or \
-                        f"Untitled ({current_game_copy.get('source_filename', 'N/A')})"
-        current_game_copy['title_display'] = display_title
-        # Ensure all fields are present as expected by frontend modal
-        current_game_copy['developer'] = current_game_copy.get('info', {}).get('developer')
-        current_game_copy['release_date'] = current_game_copy.get('info', {}).get('release_date')
-        current_game_copy['duration_tier'] = current_game_copy.get('info', {}).get('duration_tier', "未知时长")
-        current_game_copy['duration_hours'] = current_game_copy.get('info', {}).get('duration_hours')
-
-
-        return jsonify(current_game_copy)
+    library_id, game_id = split_game_uid(game_id)
+    if library_id:
+        library = get_library_by_id(library_id)
+        md_folder_path = library.folder_path if library else stored_folder_for_library_id(library_id)
+    else:
+        md_folder_path = request.args.get('folder_path')
+        if md_folder_path and not is_valid_folder_path(md_folder_path):
+            return jsonify({"error": "Invalid or relative folder path provided."}), 400
+        library = get_library(md_folder_path) if md_folder_path else get_library()
+        if library is not None:
+            md_folder_path = library.folder_path
+
+    if library is not None and library.loaded:
+        game_detail = library.lookup(game_id)
+    elif md_folder_path:
+        # Not loaded (yet), e.g. right after a restart: answer from the persistent ID index and load the folder meanwhile
+        game_detail = lookup_stored_game(md_folder_path, game_id)
+        start_library_load(md_folder_path)
     else:
-        # Attempt to re-parse if not in cache and a folder path is known (e.g., server restarted, cache lost)
-        if _current_folder_path_cache:
-            app.logger.warning(f"Game ID {game_id} not in cache. Attempting to rescan folder {_current_folder_path_cache} to find it.")
-            # Trigger a re-scan (this is a simplified way; a more robust system might re-parse just one file if possible)
-            # For simplicity, we'll just re-trigger the main loading logic by clearing the cache path,
-            # then try to get the game again. This is not ideal for performance on single lookups.
-            # A better approach would be to find the specific file by ID if possible.
-            # However, since IDs are generated, we can't directly map ID to filename without a full scan or an index.
-            
-            # Force a full rescan by clearing the path cache.
-            # This is a heavy operation for a single miss.
-            # A better strategy for a production app would be needed.
-            # For now, we'll just indicate it's not found if not in the current cache.
-            app.logger.warning(f"Game ID {game_id} not found in cache. If files were recently added, a reload via UI might be needed.")
-
-
-        return jsonify({"error": "Game details not found. It might not be in the cache or the ID is incorrect."}), 404
+        return jsonify({"error": "Game details not found. Its library is not loaded; reload the folder."}), 404
+
+    if game_detail is None:
+        return jsonify({"error": "Game details not found. The ID is incorrect or its file was removed."}), 404
+    if library is not None and library.loaded:
+        return make_cached_json_response(library.detail_body(game_detail))
+    return make_cached_json_response(build_game_payload(game_detail, library_id_for(md_folder_path)))
 
 if __name__ == '__main__':
     log_level_str = os.environ.get("LOGLEVEL", "INFO").upper()
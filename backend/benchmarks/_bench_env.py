@@ -0,0 +1,13 @@
+# file: _bench_env.py
+# Setup shared by the benchmark scripts, imported by each of them before app (which reads its settings
+# at import time). Nothing may leak between runs or outlive the temporary corpus: the parse cache,
+# folder watchers and thumbnail cache are off unless the caller sets them. Add new knobs here.
+
+import os
+import sys
+
+os.environ.setdefault("GALGAME_PARSE_CACHE", "off")
+os.environ.setdefault("GALGAME_WATCH", "off")
+os.environ.setdefault("GALGAME_THUMBNAIL_CACHE", "off")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,102 @@
+# file: bench_discovery.py
+# Times folder discovery (listing + the mtime/size needed for change detection) on a sharded tree:
+# the scandir-based MarkdownScanner against a listdir + isfile + stat walk of the same tree.
+#
+# Usage (from the repository root):
+#   python backend/benchmarks/bench_discovery.py --files 100000
+#   python backend/benchmarks/bench_discovery.py --files 100000 --tree /tmp/galgame-tree   # reuse the generated tree
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import _bench_env  # noqa: F401  Environment and sys.path, before app is imported
+
+from file_discovery import MarkdownScanner, is_md_file_name  # noqa: E402
+
+YEARS = [str(year) for year in range(2000, 2025)]
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def generate_tree(root, file_count):
+    """<root>/<year>/<letter>/game_N.md plus a cover image next to every tenth file. Discovery never reads content."""
+    for index in range(file_count):
+        shard = os.path.join(root, YEARS[index % len(YEARS)], LETTERS[(index // len(YEARS)) % len(LETTERS)])
+        if index < len(YEARS) * len(LETTERS):
+            os.makedirs(shard, exist_ok=True)
+        with open(os.path.join(shard, f"game_{index:06d}.md"), 'w', encoding='utf-8') as f:
+            f.write(f"---\ntitle: Game {index}\nabbrlink: g{index:06d}\n---\n")
+        if index % 10 == 0:
+            open(os.path.join(shard, f"cover_{index:06d}.jpg"), 'wb').close()
+
+
+def listdir_walk(root):
+    # What extending the old os.listdir + os.path.isfile loop to subdirectories costs, plus the
+    # separate os.stat per file that change detection used to need
+    found = {}
+    pending = [root]
+    while pending:
+        dir_path = pending.pop()
+        for name in os.listdir(dir_path):
+            full_path = os.path.join(dir_path, name)
+            if os.path.isdir(full_path):
+                pending.append(full_path)
+            elif is_md_file_name(name) and os.path.isfile(full_path):
+                stat_result = os.stat(full_path)
+                found[full_path] = (stat_result.st_mtime_ns, stat_result.st_size)
+    return found
+
+
+def best_time(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recursive .md discovery: scandir vs. listdir + stat.")
+    parser.add_argument("--files", type=int, default=100000, help="Number of .md files in the generated tree")
+    parser.add_argument("--tree", help="Directory to generate the tree in (kept, and reused if it already has files)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method (best time is reported)")
+    args = parser.parse_args()
+
+    temp_dir = None
+    root = args.tree
+    if root is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="galgame-bench-")
+        root = temp_dir.name
+    try:
+        if not os.path.isdir(root) or not os.listdir(root):
+            start = time.perf_counter()
+            generate_tree(root, args.files)
+            print(f"Generated {args.files} files in {time.perf_counter() - start:.1f}s")
+
+        scanner = MarkdownScanner()
+        scandir_time, scandir_found = best_time(lambda: scanner.scan(root), args.repeat)
+        listdir_time, listdir_found = best_time(lambda: listdir_walk(root), args.repeat)
+        if scandir_found != listdir_found:
+            print(f"ERROR: scandir found {len(scandir_found)} files, listdir walk found {len(listdir_found)}.")
+            sys.exit(1)
+        excluded_time, excluded_found = best_time(
+            lambda: MarkdownScanner(exclude=["2000", "2001", "2002"]).scan(root), args.repeat)
+
+        print(f"Tree: {len(scandir_found)} .md files in {root}")
+        print(f"{'method':>26} {'best (s)':>10} {'files/s':>10}")
+        for label, elapsed, found in (("listdir + isfile + stat", listdir_time, listdir_found),
+                                      ("scandir (MarkdownScanner)", scandir_time, scandir_found),
+                                      ("scandir, 3 dirs excluded", excluded_time, excluded_found)):
+            print(f"{label:>26} {elapsed:>10.3f} {len(found) / elapsed:>10.0f}")
+        print(f"scandir speedup: {listdir_time / scandir_time:.2f}x")
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# file: bench_memory.py
+# Compares the memory footprint of the game cache as plain parsed dicts (the old layout)
+# and as GameRecords, plus the cost of serializing cards/details from each.
+#
+# Usage (from the repository root):
+#   python backend/benchmarks/bench_memory.py --files 20000
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+import _bench_env  # noqa: F401  Environment and sys.path, before app is imported
+
+import app as galgame_app  # noqa: E402
+from game_record import GameRecord  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+
+def deep_sizeof(root):
+    """Bytes held by root and everything reachable from it; shared objects (interned strings) count once."""
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, GameRecord):
+            stack.extend(getattr(obj, name) for name in GameRecord.__slots__)
+    return total
+
+
+def legacy_details_payload(game):
+    # What build_game_payload did when the cache held parsed dicts
+    payload = game.copy()
+    payload['title_display'] = game['names'].get('chinese') or game['names'].get('english') or game['names'].get('japanese') or game.get('title')
+    for key in ('developer', 'release_date', 'duration_tier', 'duration_hours'):
+        payload[key] = game['info'].get(key)
+    return payload
+
+
+def time_serialization(label, games, payload_builder):
+    start = time.perf_counter()
+    body = json.dumps([payload_builder(game) for game in games], ensure_ascii=False)
+    print(f"{label:<34} {time.perf_counter() - start:>8.3f}s {len(body) / 1e6:>8.1f} MB JSON")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory footprint of the in-memory game cache.")
+    parser.add_argument("--files", type=int, default=20000, help="Number of synthetic .md files to parse")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="galgame-bench-") as corpus_dir:
+        file_paths = generate_corpus(corpus_dir, args.files)
+        # workers=1 parses in-process; like results coming back from the pool, no strings are shared between files
+        dict_cache = {path: game for path, game in galgame_app.iter_parsed_md_files(file_paths, workers=1)}
+    record_cache = {path: GameRecord.from_dict(game) for path, game in dict_cache.items()}
+
+    dict_bytes = deep_sizeof(dict_cache)
+    record_bytes = deep_sizeof(record_cache)
+    print(f"Corpus: {len(dict_cache)} parsed files")
+    print(f"{'layout':<14} {'total (MB)':>11} {'per game (B)':>13}")
+    print(f"{'dicts':<14} {dict_bytes / 1e6:>11.1f} {dict_bytes / len(dict_cache):>13.0f}")
+    print(f"{'GameRecord':<14} {record_bytes / 1e6:>11.1f} {record_bytes / len(record_cache):>13.0f}")
+    print(f"Saved {100 * (1 - record_bytes / dict_bytes):.1f}%")
+
+    time_serialization("details payloads from dicts", dict_cache.values(), legacy_details_payload)
+    time_serialization("details payloads from GameRecords", record_cache.values(), galgame_app.build_game_payload)
+    time_serialization("cards from GameRecords", record_cache.values(), galgame_app.build_card_record)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# file: bench_parallel_parse.py
+# Compares serial parsing against the process-pool parsing path for several worker counts.
+#
+# Usage (from the repository root):
+#   python backend/benchmarks/bench_parallel_parse.py --files 5000 --workers 1,2,4,8
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import _bench_env  # noqa: F401  Environment and sys.path, before app is imported
+
+import app as galgame_app  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+
+def time_parse(file_paths, workers):
+    # Worker count 1 never touches the pool, so this is the plain serial loop
+    start = time.perf_counter()
+    results = [game for _, game in galgame_app.iter_parsed_md_files(file_paths, workers=workers)]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs. multi-process Markdown parsing.")
+    parser.add_argument("--files", type=int, default=5000, help="Number of synthetic .md files to generate")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts to test")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count (best time is reported)")
+    args = parser.parse_args()
+
+    galgame_app.PARALLEL_PARSE_MIN_FILES = 1 # Benchmark the pool even for small corpora
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+
+    with tempfile.TemporaryDirectory(prefix="galgame-bench-") as corpus_dir:
+        generate_corpus(corpus_dir, args.files)
+        file_paths = galgame_app.list_md_files_from_directory(corpus_dir)
+        print(f"Corpus: {len(file_paths)} files, {os.cpu_count()} CPU(s)")
+
+        baseline_time, baseline_results = None, None
+        print(f"{'workers':>8} {'best (s)':>10} {'files/s':>10} {'speedup':>8}")
+        for workers in worker_counts:
+            if workers > 1:
+                galgame_app._get_parse_pool(workers).submit(int).result() # Warm up pool processes outside the timing
+            best_time, results = None, None
+            for _ in range(args.repeat):
+                elapsed, results = time_parse(file_paths, workers)
+                best_time = elapsed if best_time is None else min(best_time, elapsed)
+            if baseline_results is None:
+                baseline_time, baseline_results = best_time, results
+            elif results != baseline_results:
+                print(f"ERROR: output with {workers} workers differs from the first run.")
+                sys.exit(1)
+            print(f"{workers:>8} {best_time:>10.3f} {len(file_paths) / best_time:>10.0f} {baseline_time / best_time:>7.2f}x")
+        galgame_app._shutdown_parse_pool()
+
+
+if __name__ == '__main__':
+    main()
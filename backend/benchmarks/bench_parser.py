@@ -0,0 +1,114 @@
+# file: bench_parser.py
+# Golden-output regression check and per-file throughput benchmark for the Markdown parser.
+#
+# Every parser_golden/<name>.md has a parser_golden/<name>.expected.json holding the record
+# parse_single_md_file produced for it. A parser change must keep those files byte-identical
+# (or bump PARSER_VERSION and regenerate them on purpose with --update-golden).
+#
+# Usage (from the repository root):
+#   python backend/benchmarks/bench_parser.py --check
+#   python backend/benchmarks/bench_parser.py --files 5000 --repeat 3
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import _bench_env  # noqa: F401  Environment and sys.path, before app is imported
+
+import app as galgame_app  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parser_golden")
+
+
+def serialize_record(game):
+    return json.dumps(game, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
+
+
+def golden_cases():
+    """Yields (md path, expected json path) for every file in the golden corpus."""
+    for file_name in sorted(os.listdir(GOLDEN_DIR)):
+        if file_name.endswith(".md"):
+            md_path = os.path.join(GOLDEN_DIR, file_name)
+            yield md_path, os.path.splitext(md_path)[0] + ".expected.json"
+
+
+def check_golden(update=False):
+    failures = 0
+    for md_path, expected_path in golden_cases():
+        actual = serialize_record(galgame_app.parse_single_md_file(md_path))
+        if update:
+            with open(expected_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(actual)
+            continue
+        try:
+            with open(expected_path, 'r', encoding='utf-8', newline='') as f:
+                expected = f.read()
+        except FileNotFoundError:
+            expected = None
+        if actual != expected:
+            failures += 1
+            print(f"MISMATCH: {os.path.basename(md_path)}")
+    case_count = sum(1 for _ in golden_cases())
+    if update:
+        print(f"Wrote {case_count} expected outputs to {GOLDEN_DIR}")
+    else:
+        print(f"{case_count - failures}/{case_count} golden files match")
+    return failures == 0
+
+
+def bench_throughput(file_count, repeat):
+    with tempfile.TemporaryDirectory(prefix="galgame-bench-") as corpus_dir:
+        file_paths = generate_corpus(corpus_dir, file_count)
+        contents = []
+        for file_path in file_paths:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                post = galgame_app.frontmatter.load(f)
+            contents.append((post.content, {'id': os.path.basename(file_path), 'source_filename': os.path.basename(file_path), 'title': post.metadata.get('title')}))
+
+        # Body parsing alone, then the whole per-file path (open + frontmatter + body)
+        body_timings = []
+        for _ in range(repeat):
+            for content, initial_data in contents:
+                start = time.perf_counter()
+                galgame_app.parse_markdown_file_content(content, initial_data)
+                body_timings.append((time.perf_counter() - start) * 1e6)
+        file_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for file_path in file_paths:
+                galgame_app.parse_single_md_file(file_path)
+            file_times.append(time.perf_counter() - start)
+
+    body_timings.sort()
+    best_file_time = min(file_times)
+    print(f"Corpus: {file_count} files, {repeat} run(s)")
+    print(f"parse_markdown_file_content: p50 {statistics.median(body_timings):.1f} us, "
+          f"p99 {body_timings[int(len(body_timings) * 0.99) - 1]:.1f} us, "
+          f"{len(body_timings) / (sum(body_timings) / 1e6):.0f} files/s")
+    print(f"parse_single_md_file:        {best_file_time / file_count * 1e6:.1f} us/file, {file_count / best_file_time:.0f} files/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check parser output against the golden corpus and benchmark parse throughput.")
+    parser.add_argument("--check", action="store_true", help="Only compare against the golden corpus")
+    parser.add_argument("--update-golden", action="store_true", help="Rewrite the expected outputs from the current parser")
+    parser.add_argument("--files", type=int, default=2000, help="Number of synthetic .md files for the throughput run")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.update_golden:
+        check_golden(update=True)
+        return
+    if not check_golden():
+        sys.exit(1)
+    if not args.check:
+        bench_throughput(args.files, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# file: bench_search.py
+# Measures search index build time and per-query latency.
+#
+# Usage (from the repository root):
+#   python backend/benchmarks/bench_search.py --records 50000
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import _bench_env  # noqa: F401  Environment and sys.path, before app is imported
+
+import app as galgame_app  # noqa: E402
+from game_record import GameRecord  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+QUERIES = ["neko", "nekopara vol", "steins gate", "yuzusoft", "中文名12", "天使", "恋", "サクラノ詩", "grisaia kaj", "missingterm"]
+
+
+def build_records(record_count, template_count):
+    """Parses a small synthetic corpus once and clones it up to record_count records with unique IDs."""
+    with tempfile.TemporaryDirectory(prefix="galgame-bench-") as corpus_dir:
+        templates = [game for _, game in galgame_app.iter_parsed_md_files(generate_corpus(corpus_dir, template_count), workers=1)]
+    records = {}
+    for n in range(record_count):
+        template = templates[n % len(templates)]
+        records[f"bench-{n}"] = GameRecord.from_dict(dict(template, id=f"bench-{n}", title=f"{template['title']} {n}"))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the full-text search index.")
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--templates", type=int, default=1000, help="Distinct parsed files the records are cloned from")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per query (the query cache is cleared each time)")
+    args = parser.parse_args()
+
+    records = build_records(args.records, args.templates)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.rebuild(records)
+    print(f"Indexed {len(index)} records, {len(index.postings)} terms in {time.perf_counter() - start:.2f}s")
+
+    print(f"{'query':<16} {'hits':>7} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            index._query_cache.clear()
+            start = time.perf_counter()
+            hits = index.search(query, limit=50)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        total_hits = len(index.search(query))
+        print(f"{query:<16} {total_hits:>7} {statistics.median(timings):>9.3f} {timings[int(len(timings) * 0.99) - 1]:>9.3f}")
+
+    update_id = next(iter(records))
+    start = time.perf_counter()
+    index.update(update_id, records[update_id])
+    print(f"Single-record update: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# file: bench_suite.py
+# End-to-end benchmark of the parsing and API paths at several corpus sizes, with machine-readable output.
+# For every size it generates an ADV3-style corpus and measures:
+#   parse_single_md_file, parse_markdown_file_content      per-file latency over a sample of files
+#   games_basic_cold, games_basic_warm                     POST /api/games_basic through Flask's test client
+#   game_details                                           GET /api/game_details/<uid> for random games
+#   serialize_cards, serialize_details                     JSON encoding (response_bodies.encode_json) of the card
+#                                                          list / detail payloads, without the app's body caches
+# Each result has count, total_s, throughput_per_s, p50_ms and p99_ms; peak RSS is recorded per size.
+# App logging is lowered to errors so console output doesn't dominate the numbers.
+#
+# Usage (from the repository root):
+#   python backend/benchmarks/bench_suite.py --sizes 1000,10000,100000 --output bench.json
+#   python backend/benchmarks/bench_suite.py --sizes 1000,10000 --baseline bench.json   # exit 1 on regressions
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+try:
+    import resource # Not available on Windows
+except ImportError:
+    resource = None
+
+import _bench_env  # noqa: F401  Environment and sys.path, before app is imported
+
+import frontmatter  # noqa: E402
+import app as galgame_app  # noqa: E402
+from response_bodies import encode_json  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+# Throughput may drop and p99 may rise by this fraction before --baseline reports a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its (parse pool) children, or None if unknown."""
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss is bytes on macOS, KiB elsewhere
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {"self": round(self_rss / 2 ** 20, 1), "children": round(children_rss / 2 ** 20, 1)}
+
+
+def percentile(sorted_values, fraction):
+    # Nearest rank
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+
+def summarize(latencies, items=None):
+    """latencies in seconds, one per operation; items is how many units (files, games) the operations handled."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    items = len(ordered) if items is None else items
+    return {
+        "count": len(ordered),
+        "total_s": round(total, 6),
+        "throughput_per_s": round(items / total, 1) if total else None,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def timed_calls(func, args_list):
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_parser(file_paths, sample_size, rnd):
+    sample = rnd.sample(file_paths, min(sample_size, len(file_paths)))
+    results = {"parse_single_md_file": summarize(timed_calls(galgame_app.parse_single_md_file, [(p,) for p in sample]))}
+    # The body parser on its own, with the front matter already split off as parse_single_md_file does
+    prepared = []
+    for file_path in sample:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            post = frontmatter.load(f)
+        prepared.append((post.content, {'id': 'bench', 'source_filename': os.path.basename(file_path),
+                                        'title': post.metadata.get('title'), 'parse_error': False, 'parse_warning': None}))
+    results["parse_markdown_file_content"] = summarize(timed_calls(galgame_app.parse_markdown_file_content, prepared))
+    return results
+
+
+def bench_api(client, corpus_dir, file_count, warm_requests, detail_lookups, rnd):
+    results = {}
+    start = time.perf_counter()
+    response = client.post('/api/games_basic', json={'folder_path': corpus_dir})
+    results["games_basic_cold"] = summarize([time.perf_counter() - start], items=file_count)
+    cards = response.get_json()["games"]
+
+    latencies = []
+    for _ in range(warm_requests):
+        start = time.perf_counter()
+        response = client.post('/api/games_basic', json={'folder_path': corpus_dir})
+        response.get_data()
+        latencies.append(time.perf_counter() - start)
+    results["games_basic_warm"] = summarize(latencies, items=len(cards) * warm_requests)
+    results["games_basic_warm"]["response_bytes"] = len(response.get_data())
+
+    uids = [card["uid"] for card in cards]
+    latencies = []
+    for uid in (rnd.choice(uids) for _ in range(detail_lookups)):
+        start = time.perf_counter()
+        response = client.get(f'/api/game_details/{uid}')
+        response.get_data()
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/game_details/{uid} returned {response.status_code}")
+    results["game_details"] = summarize(latencies)
+    return results, cards
+
+
+def bench_serialization(library, cards, repeat):
+    results = {}
+    latencies = timed_calls(lambda: encode_json({"games": cards}), [()] * repeat)
+    results["serialize_cards"] = summarize(latencies, items=len(cards) * repeat)
+    games = list(library.all_games.values())
+    def serialize_details():
+        for game in games: # One at a time, as /api/game_details does; keeping every body would skew peak RSS
+            encode_json(galgame_app.build_game_payload(game, library.library_id))
+    latencies = timed_calls(serialize_details, [()] * repeat)
+    results["serialize_details"] = summarize(latencies, items=len(games) * repeat)
+    return results
+
+
+def run_size(client, file_count, args):
+    rnd = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="galgame-bench-") as corpus_dir:
+        start = time.perf_counter()
+        file_paths = generate_corpus(corpus_dir, file_count, seed=args.seed, long_tail_rate=0.02)
+        print(f"[{file_count}] corpus generated in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        results = bench_parser(file_paths, args.sample, rnd)
+        print(f"[{file_count}] parser done", file=sys.stderr)
+        api_results, cards = bench_api(client, corpus_dir, file_count, args.warm_requests, args.detail_lookups, rnd)
+        results.update(api_results)
+        print(f"[{file_count}] API done", file=sys.stderr)
+        library = galgame_app.get_library(corpus_dir)
+        results.update(bench_serialization(library, cards, args.serialize_repeat))
+        galgame_app._discard_library(library) # The next size starts cold
+        return {
+            "files": file_count,
+            "games": len(cards),
+            "corpus_bytes": sum(os.path.getsize(p) for p in file_paths),
+            "results": results,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """Lists the measurements that got slower than the baseline run of the same size by more than tolerance."""
+    baseline_runs = {run["files"]: run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in report["runs"]:
+        old_run = baseline_runs.get(run["files"])
+        if old_run is None:
+            continue
+        for name, result in run["results"].items():
+            old = old_run["results"].get(name)
+            if not old:
+                continue
+            if old.get("throughput_per_s") and result["throughput_per_s"] is not None and \
+                    result["throughput_per_s"] < old["throughput_per_s"] * (1 - tolerance):
+                regressions.append(f"{run['files']} files, {name}: throughput {old['throughput_per_s']} -> {result['throughput_per_s']}/s")
+            if result["count"] >= 100 and result["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+                regressions.append(f"{run['files']} files, {name}: p99 {old['p99_ms']} -> {result['p99_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing and the HTTP API at several corpus sizes.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated corpus sizes (number of .md files)")
+    parser.add_argument("--sample", type=int, default=5000, help="Files per size timed individually by the parser benchmarks")
+    parser.add_argument("--warm-requests", type=int, default=20, help="Warm /api/games_basic requests per size")
+    parser.add_argument("--detail-lookups", type=int, default=2000, help="/api/game_details requests per size")
+    parser.add_argument("--serialize-repeat", type=int, default=5, help="Runs of each serialization benchmark per size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against; exits with status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown fraction for --baseline")
+    args = parser.parse_args()
+
+    galgame_app.app.logger.setLevel(logging.ERROR)
+    galgame_app.LIBRARY_MEMORY_BUDGET_BYTES = 0 # Keep the measured library in memory whatever its size
+    client = galgame_app.app.test_client()
+    report = {
+        "benchmark": "bench_suite",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parser_version": galgame_app.PARSER_VERSION,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                    "parse_workers": galgame_app.get_parse_worker_count()},
+        "runs": [run_size(client, int(size), args) for size in args.sizes.split(",") if size.strip()],
+    }
+    galgame_app._shutdown_parse_pool()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
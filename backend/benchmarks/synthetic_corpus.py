@@ -0,0 +1,85 @@
+# file: synthetic_corpus.py
+# Generates ADV3-source style .md files for the benchmark scripts in this folder.
+
+import os
+import random
+
+DEVELOPERS = ["Yuzusoft", "Palette", "Key", "Frontwing", "Nitroplus", "5pb.", "SAGA PLANETS", "Navel", "ASa Project", "None"]
+TITLE_TEMPLATES = [
+    "Nekopara Vol. {n}", "9-nine-{color}iro{color}", "Steins;Gate {n}", "Grisaia no Kajitsu", "Senren Banka",
+    "Riddle Joker", "Chaos;Child", "Little Busters Episode {n}", "Cafe Stella {roman}", "Summer Pockets",
+    "天使☆騒々 RE-BOOT! {n}", "恋×シンアイ彼女", "サクラノ詩 {n}作", "Hoshi Ori Yume Mirai Part {n}",
+]
+DURATIONS = ["3h", "7.5h", "12h", "25h", "45h", "80h", "None", "unknown"]
+DATES = ["2019-01-02", "2020/3/4", "2018.12.1", "2021-07-30", "2015-1-9", "None", "TBA"]
+PLATFORMS = ["PC", "PC, PS4", "PC, Switch, PS Vita", "None", ""]
+COLORS = ["sora", "haru", "yuki", "natsu"]
+ROMANS = ["II", "III", "IV"]
+FILLER = ("这是一段用来填充游戏简介的文字，描述了故事背景、登场人物以及玩家可能体验到的各种结局。"
+          "The protagonist transfers to a new school and meets a cast of memorable heroines. ")
+
+
+def render_game_markdown(index, rnd, description_paragraphs=2, duplicate_of=None):
+    title = rnd.choice(TITLE_TEMPLATES).format(n=rnd.randint(1, 5), color=rnd.choice(COLORS), roman=rnd.choice(ROMANS))
+    abbrlink = f"g{duplicate_of if duplicate_of is not None else index:06d}"
+    aliases = ", ".join(f"{title.split(' ')[0]} alias{a}" for a in range(rnd.randint(0, 3))) or "None"
+    description = "\n".join(FILLER * rnd.randint(1, 4) for _ in range(description_paragraphs))
+    screenshots = "\n".join(f"![screenshot](https://img.example.com/{index}/{s}.jpg)" for s in range(rnd.randint(2, 8)))
+    related_works = "\n".join(f"  - {kind}：{title.split(' ')[0]} {kind} {r}" for r, kind in enumerate(rnd.sample(["前作", "续作", "系列", "外传"], rnd.randint(0, 3))))
+    return f"""---
+title: "{title}"
+abbrlink: {abbrlink}
+date: 2021-0{1 + index % 9}-1{index % 9} 12:00:00
+---
+
+## 游戏封面
+![cover](https://img.example.com/{index}/cover.jpg)
+
+## 游戏名称
+- 日文：{title} 日本語版
+- 英文：{title}
+- 中文：{'None' if index % 5 == 0 else f'中文名{index}'}
+- 别名：{aliases}
+
+## 游戏信息
+- 时长：{rnd.choice(DURATIONS)}
+- 开发者：{rnd.choice(DEVELOPERS)}
+- 发售日期：{rnd.choice(DATES)}
+- 游戏平台：{rnd.choice(PLATFORMS)}
+- 相关作品：
+{related_works}
+
+## 游戏简介
+[编辑此页面](https://github.com/ACG-3/ADV3-source)
+{description}
+
+## 下载链接
+- [百度网盘](https://pan.example.com/s/{index})
+- 解压密码：{'pw' + str(index) if index % 2 else 'None'}
+- [OneDrive](https://onedrive.example.com/{index})
+- Password: adv3
+
+## 游戏截图
+{screenshots}
+"""
+
+
+def generate_corpus(target_dir, file_count, seed=42, duplicate_rate=0.01, max_description_paragraphs=6, long_tail_rate=0.0):
+    """
+    Writes file_count .md files into target_dir and returns their paths (in creation order).
+    long_tail_rate is the share of files with a description ten times as long, like the few huge posts real sources have.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    rnd = random.Random(seed)
+    paths = []
+    for index in range(file_count):
+        duplicate_of = rnd.randrange(index) if index and rnd.random() < duplicate_rate else None
+        paragraphs = rnd.randint(1, max_description_paragraphs)
+        if long_tail_rate and rnd.random() < long_tail_rate:
+            paragraphs *= 10
+        content = render_game_markdown(index, rnd, paragraphs, duplicate_of)
+        file_path = os.path.join(target_dir, f"game_{index:06d}.md")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        paths.append(file_path)
+    return paths
@@ -0,0 +1,120 @@
+# file: file_discovery.py
+# Finds the .md files under a library folder with os.scandir. The scan returns the mtime/size it
+# already fetched for every file, so change detection needs no second stat per file.
+
+import os
+import re
+import fnmatch
+import logging
+
+logger = logging.getLogger(__name__)
+
+SYMLINK_POLICIES = ("skip", "files", "follow")
+
+
+def is_md_file_name(name):
+    return name.lower().endswith(".md") and not name.startswith("~$") # Ignore temp Word files
+
+
+def _compile_globs(patterns):
+    # One case-insensitive regex for all patterns, None if there are none
+    patterns = [fnmatch.translate(pattern) for pattern in patterns]
+    return re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+
+
+class MarkdownScanner:
+    """
+    Walks a folder and its subdirectories for Markdown files.
+    max_depth: directory levels below the folder to enter (0 = the folder only, None = no limit).
+    include/exclude: glob patterns, matched case-insensitively against a path relative to the folder
+    ('/' separated) and against the bare name. If include patterns are given a file must match one;
+    anything matching an exclude pattern is skipped, and excluded directories are not entered.
+    symlinks: "skip" ignores symbolic links, "files" accepts linked files but doesn't enter linked
+    directories, "follow" enters those too (every real directory is walked once, so link loops end).
+    """
+
+    def __init__(self, max_depth=None, include=(), exclude=(), symlinks="files"):
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy {symlinks!r}, expected one of {', '.join(SYMLINK_POLICIES)}")
+        self.max_depth = max_depth
+        self.include = _compile_globs(include)
+        self.exclude = _compile_globs(exclude)
+        self.symlinks = symlinks
+
+    @property
+    def recursive(self):
+        return self.max_depth != 0
+
+    @staticmethod
+    def _matches(pattern_re, rel_path, name):
+        return pattern_re is not None and (pattern_re.match(rel_path) is not None or pattern_re.match(name) is not None)
+
+    def _wanted_file(self, rel_path, name):
+        if not is_md_file_name(name) or self._matches(self.exclude, rel_path, name):
+            return False
+        return self.include is None or self._matches(self.include, rel_path, name)
+
+    def scan(self, root):
+        """
+        Returns {file path: (mtime_ns, size)} for every matching file, in walk order (a directory's files
+        before its subdirectories), or None if root can't be listed. Unreadable subdirectories are skipped.
+        """
+        if not os.path.isdir(root):
+            logger.error(f"Provided path is not a directory: {root}")
+            return None
+        found = {}
+        visited = {os.path.realpath(root)}
+        pending = [(root, "", 0)]
+        while pending:
+            dir_path, rel_dir, depth = pending.pop()
+            subdirs = []
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        rel_path = rel_dir + entry.name
+                        try:
+                            is_link = entry.is_symlink()
+                            if is_link and self.symlinks == "skip":
+                                continue
+                            if entry.is_dir():
+                                if (is_link and self.symlinks != "follow") or (self.max_depth is not None and depth >= self.max_depth) \
+                                        or self._matches(self.exclude, rel_path, entry.name):
+                                    continue
+                                if self.symlinks == "follow":
+                                    real_path = os.path.realpath(entry.path)
+                                    if real_path in visited:
+                                        continue
+                                    visited.add(real_path)
+                                subdirs.append((entry.path, rel_path + "/", depth + 1))
+                            elif entry.is_file() and self._wanted_file(rel_path, entry.name):
+                                # Free on Windows, one stat elsewhere; either way the only one this file costs
+                                stat_result = entry.stat()
+                                found[entry.path] = (stat_result.st_mtime_ns, stat_result.st_size)
+                        except OSError: # Broken link, or removed while we were listing
+                            continue
+            except OSError as e:
+                if dir_path is root:
+                    logger.error(f"Error listing directory {root}: {e}")
+                    return None
+                logger.warning(f"Skipping unreadable directory {dir_path}: {e}")
+                continue
+            pending.extend(reversed(subdirs))
+        return found
+
+    def accepts(self, root, path):
+        """Whether scan(root) would report path, judged from the path itself (for watcher events)."""
+        try:
+            rel_path = os.path.relpath(path, root)
+        except ValueError: # Different drives on Windows
+            return False
+        parts = rel_path.split(os.sep)
+        if parts[0] == os.pardir or os.path.isabs(rel_path):
+            return False
+        if self.max_depth is not None and len(parts) - 1 > self.max_depth:
+            return False
+        for level in range(1, len(parts)):
+            if self._matches(self.exclude, "/".join(parts[:level]), parts[level - 1]):
+                return False
+        if self.symlinks == "skip" and os.path.islink(path):
+            return False
+        return self._wanted_file("/".join(parts), parts[-1])
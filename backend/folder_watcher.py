@@ -0,0 +1,124 @@
+# file: folder_watcher.py
+# Background watcher for the active Markdown folder. Uses watchdog (inotify/ReadDirectoryChangesW/FSEvents)
+# when it is installed and falls back to periodic polling otherwise.
+
+import threading
+import logging
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError: # Optional dependency, polling works without it
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+
+class _MarkdownEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+            if path and str(path).lower().endswith(".md"):
+                self.watcher._queue_change(str(path))
+
+
+class FolderWatcher:
+    """
+    Calls on_change(folder_path, changed_paths) from a background thread whenever the folder changes.
+    With watchdog, changed_paths is the set of touched .md files (events are debounced so an editor's
+    save burst produces one call). In polling mode changed_paths is None, meaning "rescan everything";
+    given a listing callable (e.g. returning {path: (mtime_ns, size)}), a poll only calls back when the
+    listing differs from the previous one.
+    """
+
+    def __init__(self, folder_path, on_change, poll_interval=3.0, debounce_seconds=0.5, use_watchdog=True, recursive=False,
+                 listing=None):
+        self.folder_path = folder_path
+        self.recursive = recursive
+        self.on_change = on_change
+        self.listing = listing
+        self.poll_interval = poll_interval
+        self.debounce_seconds = debounce_seconds
+        self.use_watchdog = use_watchdog and Observer is not None
+        self._stop_event = threading.Event()
+        self._pending_paths = set()
+        self._pending_lock = threading.Lock()
+        self._debounce_timer = None
+        self._observer = None
+        self._poll_thread = None
+
+    @property
+    def mode(self):
+        return "watchdog" if self.use_watchdog else "polling"
+
+    def start(self):
+        if self.use_watchdog:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_MarkdownEventHandler(self), self.folder_path, recursive=self.recursive)
+                self._observer.daemon = True
+                self._observer.start()
+                logger.info(f"Watching {self.folder_path} for changes (watchdog).")
+                return
+            except Exception as e: # e.g. inotify watch limit reached
+                logger.warning(f"watchdog could not watch {self.folder_path} ({e}). Falling back to polling.")
+                self.use_watchdog = False
+        self._poll_thread = threading.Thread(target=self._poll_loop, name="folder-watcher-poll", daemon=True)
+        self._poll_thread.start()
+        logger.info(f"Watching {self.folder_path} for changes (polling every {self.poll_interval}s).")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+        with self._pending_lock:
+            if self._debounce_timer is not None:
+                self._debounce_timer.cancel()
+
+    def _poll_loop(self):
+        previous_listing = None # The first poll always calls back: the folder may have changed before the watcher started
+        while not self._stop_event.wait(self.poll_interval):
+            current_listing = self._poll_listing()
+            if current_listing is None or current_listing != previous_listing:
+                self._notify(None)
+            previous_listing = current_listing
+
+    def _poll_listing(self):
+        # None (always call back) without a listing callable or when it fails
+        if self.listing is None:
+            return None
+        try:
+            return self.listing(self.folder_path)
+        except Exception as e:
+            logger.warning(f"Could not list {self.folder_path} while polling: {e}")
+            return None
+
+    def _queue_change(self, path):
+        with self._pending_lock:
+            self._pending_paths.add(path)
+            if self._debounce_timer is not None:
+                self._debounce_timer.cancel()
+            self._debounce_timer = threading.Timer(self.debounce_seconds, self._flush_pending)
+            self._debounce_timer.daemon = True
+            self._debounce_timer.start()
+
+    def _flush_pending(self):
+        with self._pending_lock:
+            changed_paths, self._pending_paths = self._pending_paths, set()
+            self._debounce_timer = None
+        if changed_paths:
+            self._notify(changed_paths)
+
+    def _notify(self, changed_paths):
+        if self._stop_event.is_set():
+            return
+        try:
+            self.on_change(self.folder_path, changed_paths)
+        except Exception as e: # Never let one failed refresh kill the watcher thread
+            logger.error(f"Error while refreshing {self.folder_path} after a change: {e}", exc_info=True)
@@ -0,0 +1,121 @@
+# file: game_record.py
+# Compact in-memory form of a parsed game, used for everything the server keeps cached.
+
+import sys
+
+
+def _interned(value):
+    # Values repeated across games (developer, platforms, tiers, series, ...) share one string object
+    return sys.intern(value) if type(value) is str else value
+
+
+class GameRecord:
+    """
+    One parsed .md file. The nested 'names'/'info' dicts of parse_single_md_file's output are flattened
+    into slots, lists become tuples (related works and download links tuples of tuples), and the strings
+    that repeat across games are interned. to_dict() rebuilds exactly the dict the parser produced.
+    Records are treated as immutable; use replace() to derive a changed copy.
+    """
+
+    __slots__ = (
+        'id', 'source_filename', 'title', 'abbrlink', 'date', 'cover_image',
+        'japanese_name', 'english_name', 'chinese_name', 'aliases',
+        'duration_str', 'duration_hours', 'duration_tier', 'developer', 'release_date', 'platforms',
+        'related_works',   # ((type, name), ...)
+        'download_links',  # ((name, url, password), ...)
+        'screenshots', 'description', 'series_name', 'series_tag',
+        'parse_error', 'parse_warning',
+        'title_display',   # Only set on the error records parse_single_md_file returns for unreadable files
+    )
+
+    @classmethod
+    def from_dict(cls, game):
+        record = cls.__new__(cls)
+        names = game.get('names') or {}
+        info = game.get('info') or {}
+        record.id = game.get('id')
+        record.source_filename = game.get('source_filename')
+        record.title = game.get('title')
+        record.abbrlink = game.get('abbrlink')
+        record.date = game.get('date')
+        record.cover_image = game.get('cover_image')
+        record.japanese_name = names.get('japanese')
+        record.english_name = names.get('english')
+        record.chinese_name = names.get('chinese')
+        record.aliases = tuple(names.get('aliases') or ())
+        record.duration_str = _interned(info.get('duration_str'))
+        record.duration_hours = info.get('duration_hours')
+        record.duration_tier = _interned(info.get('duration_tier', "未知时长"))
+        record.developer = _interned(info.get('developer'))
+        record.release_date = _interned(info.get('release_date'))
+        record.platforms = tuple(_interned(p) for p in info.get('platforms') or ())
+        record.related_works = tuple((_interned(w.get('type')), w.get('name')) for w in info.get('related_works') or ())
+        record.download_links = tuple((_interned(link.get('name')), link.get('url'), link.get('password'))
+                                      for link in game.get('download_links') or ())
+        record.screenshots = tuple(game.get('screenshots') or ())
+        record.description = game.get('description')
+        record.series_name = _interned(game.get('series_name'))
+        record.series_tag = _interned(game.get('series_tag'))
+        record.parse_error = game.get('parse_error', False)
+        record.parse_warning = game.get('parse_warning')
+        record.title_display = game.get('title_display')
+        return record
+
+    def replace(self, **changes):
+        """Returns a copy with the given slots changed."""
+        record = GameRecord.__new__(GameRecord)
+        for name in GameRecord.__slots__:
+            setattr(record, name, changes[name] if name in changes else getattr(self, name))
+        return record
+
+    def to_dict(self):
+        game = {
+            'id': self.id,
+            'source_filename': self.source_filename,
+            'title': self.title,
+            'abbrlink': self.abbrlink,
+            'date': self.date,
+            'parse_error': self.parse_error,
+            'parse_warning': self.parse_warning,
+            'cover_image': self.cover_image,
+            'names': {'japanese': self.japanese_name, 'english': self.english_name, 'chinese': self.chinese_name,
+                      'aliases': list(self.aliases)},
+            'info': {
+                'duration_str': self.duration_str,
+                'duration_hours': self.duration_hours,
+                'duration_tier': self.duration_tier,
+                'developer': self.developer,
+                'release_date': self.release_date,
+                'platforms': list(self.platforms),
+                'related_works': [{'type': work_type, 'name': name} for work_type, name in self.related_works],
+            },
+            'download_links': [{'name': name, 'url': url, 'password': password} for name, url, password in self.download_links],
+            'screenshots': list(self.screenshots),
+            'description': self.description,
+            'series_name': self.series_name,
+            'series_tag': self.series_tag,
+        }
+        if self.title_display is not None:
+            game['title_display'] = self.title_display
+        return game
+
+    def approx_size(self):
+        """Rough number of bytes held by this record; interned strings shared with other records are counted too."""
+        size = sys.getsizeof(self)
+        for name in GameRecord.__slots__:
+            value = getattr(self, name)
+            size += sys.getsizeof(value)
+            if type(value) is tuple:
+                for item in value:
+                    size += sys.getsizeof(item)
+                    if type(item) is tuple: # related_works / download_links rows
+                        size += sum(sys.getsizeof(part) for part in item)
+        return size
+
+    def __eq__(self, other):
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in GameRecord.__slots__)
+
+    def __repr__(self):
+        return f"GameRecord(id={self.id!r}, source_filename={self.source_filename!r})"
@@ -0,0 +1,173 @@
+# file: library_index.py
+# Precomputed sort orders and facet indexes over the parsed game cache, used by /api/games/query
+# and /api/games/facets.
+
+import re
+import datetime
+from itertools import islice
+
+SORT_KEYS = ("title_display", "release_date", "duration_hours")
+RELEVANCE_SORT_KEY = "relevance" # Only meaningful together with a search
+# Query parameter name -> card field holding the facet value. A list field (platforms) gives a game
+# one value per element; "year" is the leading year of release_date.
+FACET_FIELDS = {
+    "developer": "developer",
+    "duration_tier": "duration_tier",
+    "series": "series_name",
+    "platform": "platforms",
+    "year": "release_date",
+}
+MAX_PAGE_SIZE = 200
+
+_YEAR_RE = re.compile(r'^\s*(\d{4})')
+
+
+def _release_date_key(value):
+    # Mirrors the frontend: anything that isn't a real calendar date counts as "no date"
+    if not value:
+        return None
+    try:
+        year, month, day = (int(part) for part in str(value).replace('.', '-').replace('/', '-').split('-'))
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _facet_values(param_name, value):
+    if param_name == "year":
+        match = _YEAR_RE.match(str(value)) if value else None
+        return (match.group(1),) if match else ()
+    if isinstance(value, (list, tuple)):
+        return [item for item in value if item and isinstance(item, str)]
+    return (value,) if value else ()
+
+
+class LibraryIndex:
+    """
+    Read-only view of one cache generation. Rows are positions in self.ids; every facet value
+    maps to the frozenset of rows carrying it, and each (sort key, direction) has its full row
+    order computed once, so a query is a few set intersections plus a slice.
+    """
+
+    def __init__(self, games_by_id, card_builder):
+        self.ids = list(games_by_id.keys())
+        self.row_of_id = {game_id: row for row, game_id in enumerate(self.ids)}
+        self.cards = [card_builder(games_by_id[game_id]) for game_id in self.ids]
+
+        self.facets = {}
+        for param_name, field in FACET_FIELDS.items():
+            value_rows = {}
+            for row, card in enumerate(self.cards):
+                for value in _facet_values(param_name, card.get(field)):
+                    value_rows.setdefault(value, []).append(row)
+            self.facets[param_name] = {value: frozenset(rows) for value, rows in value_rows.items()}
+
+        self.sort_orders = {}
+        self.sort_ranks = {}
+        for sort_key in SORT_KEYS:
+            for direction in ("asc", "desc"):
+                order = self._compute_sort_order(sort_key, direction == "asc")
+                self.sort_orders[(sort_key, direction)] = order
+                ranks = [0] * len(order)
+                for rank, row in enumerate(order):
+                    ranks[row] = rank
+                self.sort_ranks[(sort_key, direction)] = ranks
+
+    def _compute_sort_order(self, sort_key, ascending):
+        rows = range(len(self.cards))
+        if sort_key == "release_date":
+            dated = [(row, _release_date_key(self.cards[row].get('release_date'))) for row in rows]
+            valid = sorted((item for item in dated if item[1] is not None), key=lambda item: item[1], reverse=not ascending)
+            invalid = [row for row, key in dated if key is None]
+            # Undated games go last when ascending and first when descending, like the frontend sort
+            return [row for row, _ in valid] + invalid if ascending else invalid + [row for row, _ in valid]
+        if sort_key == "duration_hours":
+            timed = [row for row in rows if self.cards[row].get('duration_hours') is not None]
+            untimed = [row for row in rows if self.cards[row].get('duration_hours') is None]
+            # Unknown durations go last in both directions
+            return sorted(timed, key=lambda row: float(self.cards[row]['duration_hours']), reverse=not ascending) + untimed
+        return sorted(rows, key=lambda row: str(self.cards[row].get(sort_key) or '').lower(), reverse=not ascending)
+
+    def matching_rows(self, search_results=None, favorite_ids=None, **facet_values):
+        """
+        Returns a set of matching rows, or None when no filter applies (every row matches).
+        search_results is the ranked [(game_id, score)] list from the search index, if searching.
+        """
+        candidate_sets = []
+        if search_results is not None:
+            candidate_sets.append({self.row_of_id[i] for i, _ in search_results if i in self.row_of_id})
+        for param_name, value in facet_values.items():
+            if value:
+                candidate_sets.append(self.facets.get(param_name, {}).get(value, frozenset()))
+        if favorite_ids is not None:
+            candidate_sets.append({self.row_of_id[i] for i in favorite_ids if i in self.row_of_id})
+
+        rows = None
+        for candidate in sorted(candidate_sets, key=len): # Smallest first keeps intersections cheap
+            rows = set(candidate) if rows is None else rows & candidate
+            if not rows:
+                return set()
+        return rows
+
+    def facet_counts(self, search_results=None, favorite_ids=None, facet_names=None, **facet_values):
+        """
+        Returns ({facet name: {value: number of matching games}}, total match count). Each facet is counted
+        under every filter except its own selection, so its counts say what choosing another value would
+        give; values without matches are left out, a selected one is always kept.
+        """
+        counts = {}
+        for param_name in facet_names or FACET_FIELDS:
+            other_values = {name: value for name, value in facet_values.items() if name != param_name}
+            rows = self.matching_rows(search_results=search_results, favorite_ids=favorite_ids, **other_values)
+            value_index = self.facets.get(param_name, {})
+            value_counts = {}
+            if rows is not None and len(rows) < len(value_index):
+                # Fewer matches than values (a narrow search, say): reading the matching cards is cheaper
+                field = FACET_FIELDS[param_name]
+                for row in rows:
+                    for value in set(_facet_values(param_name, self.cards[row].get(field))):
+                        value_counts[value] = value_counts.get(value, 0) + 1
+            else:
+                for value, value_rows in value_index.items():
+                    count = len(value_rows) if rows is None else len(rows.intersection(value_rows))
+                    if count:
+                        value_counts[value] = count
+            selected = facet_values.get(param_name)
+            if selected and selected not in value_counts:
+                value_counts[selected] = 0
+            counts[param_name] = value_counts
+        rows = self.matching_rows(search_results=search_results, favorite_ids=favorite_ids, **facet_values)
+        return counts, len(self.cards) if rows is None else len(rows)
+
+    def query(self, search_results=None, favorite_ids=None, sort_key="title_display", sort_direction="asc",
+              page=1, page_size=12, **facet_values):
+        """Returns (total match count, list of card records for the requested page)."""
+        if sort_direction not in ("asc", "desc"):
+            sort_direction = "asc"
+        page_size = max(1, min(MAX_PAGE_SIZE, page_size))
+        start = (max(1, page) - 1) * page_size
+
+        rows = self.matching_rows(search_results=search_results, favorite_ids=favorite_ids, **facet_values)
+        if sort_key == RELEVANCE_SORT_KEY and search_results is not None:
+            # search_results is already ranked best-first ("desc"); keep that order for the surviving rows
+            ranked_rows = [self.row_of_id[i] for i, _ in search_results if i in self.row_of_id]
+            if sort_direction == "asc":
+                ranked_rows.reverse()
+            matching = [row for row in ranked_rows if row in rows]
+            return len(matching), [self.cards[row] for row in matching[start:start + page_size]]
+        if sort_key not in SORT_KEYS:
+            sort_key = "title_display"
+
+        order = self.sort_orders[(sort_key, sort_direction)]
+        if rows is None:
+            page_rows = order[start:start + page_size]
+            total = len(order)
+        else:
+            total = len(rows)
+            if total * 8 < len(order):
+                # Small result sets: sorting by precomputed rank beats walking the whole order
+                ranks = self.sort_ranks[(sort_key, sort_direction)]
+                page_rows = sorted(rows, key=ranks.__getitem__)[start:start + page_size]
+            else:
+                page_rows = list(islice((row for row in order if row in rows), start, start + page_size))
+        return total, [self.cards[row] for row in page_rows]
@@ -0,0 +1,181 @@
+# file: metrics.py
+# In-process counters and histograms rendered in the Prometheus text format for /api/metrics,
+# and LoadStats, the per-scan timing report (phases, slowest files, error/warning counts).
+
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds: requests range from sub-millisecond cache hits to minute-long cold loads
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FILE_PARSE_BUCKETS = (0.0002, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {} # sorted label tuple -> value
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in values)
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {} # sorted label tuple -> [per-bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(series[0]), series[1]) for labels, series in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', _format_value(upper_bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """A gauge read when the metrics are rendered; callback returns [(labels dict, value)]."""
+
+    def __init__(self, name, help_text, callback):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.callback():
+            lines.append(f"{self.name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def gauge_callback(self, name, help_text, callback):
+        return self._register(GaugeCallback(name, help_text, callback))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class LoadStats:
+    """
+    Where the time of one library scan went. Scan phases ('listing', 'fingerprint', 'parse', 'index', ...)
+    are wall time; the per-file parse phases ('frontmatter', 'body', 'series') are summed over the parsed
+    files, so with a process pool they can add up to more than the 'parse' wall time.
+    """
+
+    def __init__(self, slowest_count=10):
+        self.started_at = time.time()
+        self.phases = {}
+        self.files_parsed = 0
+        self.parse_errors = 0
+        self.parse_warnings = 0
+        self._slowest_count = slowest_count
+        self._slowest = [] # Min-heap of (seconds, file path), the slowest_count slowest files so far
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_file(self, file_path, timings, game):
+        """Records one parsed file; timings is the dict parse_single_md_file filled in, plus its 'total'."""
+        self.files_parsed += 1
+        for name in ('frontmatter', 'body', 'series'):
+            if name in timings:
+                self.add_phase(name, timings[name])
+        if game and game.get('parse_error'):
+            self.parse_errors += 1
+        elif game and game.get('parse_warning'):
+            self.parse_warnings += 1
+        entry = (timings.get('total', 0.0), file_path)
+        if len(self._slowest) < self._slowest_count:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest_files(self):
+        return [(file_path, seconds) for seconds, file_path in sorted(list(self._slowest), reverse=True)]
+
+    def to_dict(self):
+        return {
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in dict(self.phases).items()},
+            "files_parsed": self.files_parsed,
+            "parse_errors": self.parse_errors,
+            "parse_warnings": self.parse_warnings,
+            "slowest_files": [{"path": file_path, "ms": round(seconds * 1000, 3)} for file_path, seconds in self.slowest_files()],
+        }
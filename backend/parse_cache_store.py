@@ -0,0 +1,137 @@
+# file: parse_cache_store.py
+# Persists parsed game records between server restarts so only stale files get reparsed.
+
+import os
+import json
+import sqlite3
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ParseCacheStore:
+    """
+    SQLite-backed table of parsed game records, one row per .md file.
+    Rows are keyed by (folder path, parser version, file path) and carry the file fingerprint
+    (mtime_ns, size, sha1) that was current when the record was parsed. The indexed game_id column
+    maps an ID back to its source file(s) without loading the whole folder.
+    Every method swallows sqlite errors: the store is an optimization, never a requirement.
+    """
+
+    def __init__(self, db_path, parser_version):
+        self.db_path = db_path
+        self.parser_version = parser_version
+        self.enabled = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS parsed_files (
+                        folder TEXT NOT NULL,
+                        parser_version TEXT NOT NULL,
+                        path TEXT NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        sha1 TEXT,
+                        game_json TEXT NOT NULL,
+                        game_id TEXT,
+                        PRIMARY KEY (folder, parser_version, path)
+                    )""")
+                self._add_game_id_column(conn)
+                conn.execute("CREATE INDEX IF NOT EXISTS parsed_files_by_game_id ON parsed_files (folder, parser_version, game_id)")
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Parse cache disabled, could not open {db_path}: {e}")
+            self.enabled = False
+
+    @staticmethod
+    def _add_game_id_column(conn):
+        # Stores written before the ID index existed: add the column and fill it from the stored records
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(parsed_files)")]
+        if "game_id" in columns:
+            return
+        conn.execute("ALTER TABLE parsed_files ADD COLUMN game_id TEXT")
+        rows = conn.execute("SELECT rowid, game_json FROM parsed_files").fetchall()
+        conn.executemany("UPDATE parsed_files SET game_id = ? WHERE rowid = ?",
+                         ((json.loads(game_json).get('id'), rowid) for rowid, game_json in rows))
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps this safe to use from any request thread
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn: # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def load_folder(self, folder_path):
+        """Returns {file path: (fingerprint tuple, game dict)} for the folder at the current parser version."""
+        if not self.enabled:
+            return {}
+        entries = {}
+        try:
+            with self._connect() as conn:
+                # Records written by an older parser are useless, drop them instead of letting them pile up
+                conn.execute("DELETE FROM parsed_files WHERE folder = ? AND parser_version != ?",
+                             (folder_path, self.parser_version))
+                rows = conn.execute(
+                    "SELECT path, mtime_ns, size, sha1, game_json FROM parsed_files WHERE folder = ? AND parser_version = ?",
+                    (folder_path, self.parser_version))
+                for path, mtime_ns, size, sha1, game_json in rows:
+                    entries[path] = ((mtime_ns, size, sha1), json.loads(game_json))
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Could not load parse cache for {folder_path}: {e}")
+            return {}
+        return entries
+
+    def find_by_id(self, folder_path, game_id):
+        """Returns {file path: (fingerprint tuple, game dict)} for the stored files of the folder that yielded game_id."""
+        if not self.enabled:
+            return {}
+        entries = {}
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT path, mtime_ns, size, sha1, game_json FROM parsed_files WHERE folder = ? AND parser_version = ? AND game_id = ?",
+                    (folder_path, self.parser_version, game_id))
+                for path, mtime_ns, size, sha1, game_json in rows:
+                    entries[path] = ((mtime_ns, size, sha1), json.loads(game_json))
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Could not look up game ID {game_id} in the parse cache for {folder_path}: {e}")
+            return {}
+        return entries
+
+    def folders(self):
+        """Folder paths that have records at the current parser version."""
+        if not self.enabled:
+            return []
+        try:
+            with self._connect() as conn:
+                return [row[0] for row in conn.execute("SELECT DISTINCT folder FROM parsed_files WHERE parser_version = ?",
+                                                       (self.parser_version,))]
+        except sqlite3.Error as e:
+            logger.error(f"Could not list folders in the parse cache: {e}")
+            return []
+
+    def save_changes(self, folder_path, updated_entries, removed_paths):
+        """
+        updated_entries: {file path: (fingerprint tuple, game dict)} to insert or replace.
+        removed_paths: iterable of file paths whose rows should be deleted.
+        """
+        if not self.enabled or (not updated_entries and not removed_paths):
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "DELETE FROM parsed_files WHERE folder = ? AND parser_version = ? AND path = ?",
+                    ((folder_path, self.parser_version, path) for path in removed_paths))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO parsed_files (folder, parser_version, path, mtime_ns, size, sha1, game_json, game_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((folder_path, self.parser_version, path, fp[0], fp[1], fp[2], json.dumps(game, ensure_ascii=False, default=str), game.get('id'))
+                     for path, (fp, game) in updated_entries.items()))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Could not persist parse cache for {folder_path}: {e}")
@@ -0,0 +1,68 @@
+# file: response_bodies.py
+# JSON encoding to bytes (orjson when installed) and EncodedBody, a serialized response body that
+# keeps its ETag and compressed variants so a cached payload is encoded and compressed only once.
+
+import os
+import json
+import gzip
+import hashlib
+
+try:
+    import orjson # Optional: several times faster than the stdlib encoder
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# GALGAME_JSON_ENCODER: "auto" (orjson if installed), "orjson" or "stdlib"
+JSON_ENCODER = os.environ.get("GALGAME_JSON_ENCODER", "auto").lower()
+USE_ORJSON = orjson is not None and JSON_ENCODER != "stdlib"
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _json_default(value):
+    # Frontmatter can hold YAML dates and other non-JSON values: written as str(), like the parse cache stores them
+    return str(value)
+
+
+def encode_json(payload):
+    """
+    UTF-8 JSON bytes of payload (plain dicts/lists/str/numbers, as the payload builders produce). Any other
+    value, such as a date from the frontmatter, is written as its str() with either encoder.
+    """
+    if USE_ORJSON:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def join_json_array(fragments):
+    """JSON array bytes from already encoded element bytes."""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+class EncodedBody:
+    """
+    Immutable JSON response body. The weak ETag is derived from the bytes; gzip and brotli variants
+    are built on first use and kept, so serving the same body again costs no encoding or compression.
+    """
+
+    __slots__ = ('data', 'etag', '_variants')
+
+    def __init__(self, data):
+        self.data = data
+        self.etag = hashlib.sha1(data).hexdigest()
+        self._variants = {}
+
+    def variant(self, encoding):
+        """The body compressed with 'gzip' or 'br'."""
+        compressed = self._variants.get(encoding)
+        if compressed is None:
+            if encoding == 'br':
+                compressed = brotli.compress(self.data, quality=BROTLI_QUALITY)
+            else:
+                compressed = gzip.compress(self.data, compresslevel=GZIP_LEVEL)
+            self._variants[encoding] = compressed # Two threads may both compress once; either result is fine
+        return compressed
@@ -0,0 +1,203 @@
+# file: search_index.py
+# Inverted full-text index over parsed game records, with CJK-aware tokenization.
+
+import re
+import heapq
+import bisect
+import unicodedata
+
+# Field weights used for ranking: a hit in a name counts more than a hit in the description
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'names': 3.0,
+    'aliases': 2.0,
+    'series_name': 2.0,
+    'developer': 1.5,
+    'description': 0.5,
+}
+# Descriptions can be long; indexing only their beginning keeps postings (and memory) bounded
+DESCRIPTION_INDEX_CHARS = 300
+PREFIX_MATCH_FACTOR = 0.8 # A prefix hit ranks below an exact term hit
+QUERY_CACHE_SIZE = 256
+
+# Iteration marks, Hiragana/Katakana, CJK ideographs (incl. Extension A and compatibility) and Hangul syllables
+_CJK_CHARS = '\u3005-\u3007\u3040-\u30ff\u31f0-\u31ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+# A run is either all-CJK (group 1) or a word without CJK characters (group 2)
+_TOKEN_RUN_RE = re.compile(f'([{_CJK_CHARS}]+)|([^\\W{_CJK_CHARS}]+)')
+
+
+def normalize_text(text):
+    # NFKC folds full-width Latin and half-width Katakana, casefold handles case
+    return unicodedata.normalize('NFKC', str(text)).casefold()
+
+
+def tokenize(text):
+    """
+    Splits text into (words, cjk_grams). Non-CJK runs become whole-word tokens; CJK runs
+    become character unigrams and bigrams, since they have no spaces to split on.
+    """
+    words = []
+    cjk_grams = []
+    for cjk_run, word in _TOKEN_RUN_RE.findall(normalize_text(text)):
+        if word:
+            words.append(word)
+        else:
+            cjk_grams.extend(cjk_run)
+            cjk_grams.extend(map(str.__add__, cjk_run, cjk_run[1:]))
+    return words, cjk_grams
+
+
+def _query_terms(text):
+    """Returns [(term, is_word)]. A CJK query segment only needs its bigrams (or the single char)."""
+    terms = []
+    for cjk_run, word in _TOKEN_RUN_RE.findall(normalize_text(text)):
+        if word:
+            terms.append((word, True))
+        elif len(cjk_run) == 1:
+            terms.append((cjk_run, False))
+        else:
+            terms.extend((gram, False) for gram in map(str.__add__, cjk_run, cjk_run[1:]))
+    return terms
+
+
+def extract_searchable_fields(game):
+    """Yields (field name, text) pairs for every searchable part of a GameRecord."""
+    if game.title:
+        yield 'title', game.title
+    for name in (game.japanese_name, game.english_name, game.chinese_name):
+        if name:
+            yield 'names', name
+    for alias in game.aliases:
+        yield 'aliases', alias
+    if game.series_name:
+        yield 'series_name', game.series_name
+    if game.developer:
+        yield 'developer', game.developer
+    if game.description:
+        yield 'description', str(game.description)[:DESCRIPTION_INDEX_CHARS]
+
+
+class SearchIndex:
+    """
+    term -> {doc number: weight} postings, plus a sorted vocabulary of word terms for prefix lookups.
+    Documents (GameRecords) are added, replaced and removed one game at a time, so single-file changes
+    don't require rebuilding the index.
+    """
+
+    def __init__(self):
+        self.postings = {}        # term -> {doc_no: weight}
+        self.word_vocabulary = [] # sorted word terms (CJK grams are only matched exactly)
+        self.doc_no_of_id = {}
+        self.id_of_doc_no = {}
+        self.doc_terms = {}       # doc_no -> tuple of terms, needed to remove a document
+        self._next_doc_no = 0
+        self._query_cache = {}
+
+    def __len__(self):
+        return len(self.doc_no_of_id)
+
+    @staticmethod
+    def _weigh_terms(game):
+        term_weights = {}
+        word_terms = set()
+        for field, text in extract_searchable_fields(game):
+            weight = FIELD_WEIGHTS[field]
+            words, cjk_grams = tokenize(text)
+            word_terms.update(words)
+            # A term found in several fields accumulates weight, but only once per field
+            for term in set(words).union(cjk_grams):
+                term_weights[term] = term_weights.get(term, 0.0) + weight
+        return term_weights, word_terms
+
+    def _add(self, game_id, game, keep_vocabulary_sorted):
+        doc_no = self._next_doc_no
+        self._next_doc_no += 1
+        self.doc_no_of_id[game_id] = doc_no
+        self.id_of_doc_no[doc_no] = game_id
+        term_weights, word_terms = self._weigh_terms(game)
+        self.doc_terms[doc_no] = tuple(term_weights)
+        for term, weight in term_weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if term in word_terms:
+                    if keep_vocabulary_sorted:
+                        bisect.insort(self.word_vocabulary, term)
+                    else:
+                        self.word_vocabulary.append(term)
+            posting[doc_no] = weight
+
+    def remove(self, game_id):
+        doc_no = self.doc_no_of_id.pop(game_id, None)
+        if doc_no is None:
+            return
+        self._query_cache.clear()
+        del self.id_of_doc_no[doc_no]
+        for term in self.doc_terms.pop(doc_no):
+            posting = self.postings[term]
+            posting.pop(doc_no, None)
+            if not posting:
+                del self.postings[term]
+                pos = bisect.bisect_left(self.word_vocabulary, term)
+                if pos < len(self.word_vocabulary) and self.word_vocabulary[pos] == term:
+                    del self.word_vocabulary[pos]
+
+    def update(self, game_id, game):
+        """Adds a game, replacing whatever was indexed under the same ID before."""
+        self.remove(game_id)
+        self._query_cache.clear()
+        self._add(game_id, game, keep_vocabulary_sorted=True)
+
+    def rebuild(self, games_by_id):
+        self.__init__()
+        for game_id, game in games_by_id.items():
+            self._add(game_id, game, keep_vocabulary_sorted=False)
+        self.word_vocabulary.sort() # One sort instead of an insort per new term
+
+    def _term_matches(self, term, is_word):
+        """Returns {doc_no: weight} for a query term; word terms also match as prefixes."""
+        exact = self.postings.get(term, {})
+        if not is_word:
+            return exact
+        pos = bisect.bisect_right(self.word_vocabulary, term) # Skips the exact term itself
+        if pos >= len(self.word_vocabulary) or not self.word_vocabulary[pos].startswith(term):
+            return exact
+        matches = dict(exact)
+        while pos < len(self.word_vocabulary) and self.word_vocabulary[pos].startswith(term):
+            for doc_no, weight in self.postings[self.word_vocabulary[pos]].items():
+                prefix_weight = weight * PREFIX_MATCH_FACTOR
+                if prefix_weight > matches.get(doc_no, 0.0):
+                    matches[doc_no] = prefix_weight
+            pos += 1
+        return matches
+
+    def search(self, query, limit=None):
+        """
+        Returns [(game_id, score)] sorted by descending score. Every query term has to match
+        (AND semantics); word terms also match longer words they are a prefix of.
+        """
+        terms = list(dict.fromkeys(_query_terms(query or ''))) # Dedupe, keep order
+        if not terms:
+            return []
+        cache_key = (tuple(terms), limit)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        per_term = sorted((self._term_matches(term, is_word) for term, is_word in terms), key=len)
+        scores = per_term[0]
+        for matches in per_term[1:]:
+            if not scores:
+                break
+            scores = {doc_no: score + matches[doc_no] for doc_no, score in scores.items() if doc_no in matches}
+
+        if limit is not None and limit < len(scores):
+            ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        else:
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = [(self.id_of_doc_no[doc_no], round(score, 3)) for doc_no, score in ranked]
+
+        if len(self._query_cache) >= QUERY_CACHE_SIZE:
+            self._query_cache.pop(next(iter(self._query_cache)))
+        self._query_cache[cache_key] = results
+        return results
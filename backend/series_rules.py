@@ -0,0 +1,181 @@
+# file: series_rules.py
+# Series name/tag inference driven by JSON rule packs (series_rules.json plus optional user packs).
+
+import os
+import re
+import json
+import hashlib
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "series_rules.json")
+
+# Tag right after a matched prefix, e.g. "nekopara vol. 3" -> "3", "steins;gate 0" -> "0"
+_PREFIX_TAG_RE = re.compile(r'^(ep\s*\d+|vol\.\s*\d+|\d+|[ivxlcdm]+)(?:\s|$)', re.IGNORECASE)
+# A numeric pattern tag becomes "EP<n>" unless the title says it's a volume/chapter/part
+_NON_EPISODE_KEYWORDS = ("vol", "volume", "chapter", "part")
+_TRIE_VALUE = ""  # Node key holding a rule; never collides with the single-character child keys
+
+
+@lru_cache(maxsize=None)
+def compile_title_pattern(pattern):
+    # Reloading rule packs only compiles patterns that weren't seen before
+    return re.compile(pattern, re.IGNORECASE)
+
+
+class PrefixTrie:
+    """Character trie that finds the longest stored prefix of a string in O(length of that prefix)."""
+
+    def __init__(self):
+        self._root = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, prefix, value):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        if _TRIE_VALUE not in node:
+            self._size += 1
+        node[_TRIE_VALUE] = value
+
+    def longest_prefix(self, text):
+        """Returns (prefix, value) for the longest stored prefix of text, or None."""
+        node = self._root
+        found = None
+        for depth, char in enumerate(text, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if _TRIE_VALUE in node:
+                found = (text[:depth], node[_TRIE_VALUE])
+        return found
+
+
+class SeriesRules:
+    """
+    Compiled rule set. Prefix rules go into a PrefixTrie (the longest matching prefix wins); title
+    patterns are tried in order only when no prefix matches. derive() only needs a game's title,
+    aliases and related works, so rules can be re-applied to cached games without reparsing their Markdown.
+    """
+
+    def __init__(self, prefix_rules=(), title_patterns=(), related_work_hints=(), sources=()):
+        self.prefix_trie = PrefixTrie()
+        for rule in prefix_rules:
+            self.prefix_trie.insert(rule['prefix'].lower(), (rule['series'], rule.get('tag_prefix')))
+        self.title_patterns = [(compile_title_pattern(p['pattern']), tuple(p.get('strip_suffixes') or ()))
+                               for p in title_patterns]
+        self.related_work_hints = tuple(related_work_hints)
+        self.sources = tuple(sources)
+        self.fingerprint = hashlib.sha1(json.dumps(
+            [list(prefix_rules), list(title_patterns), list(self.related_work_hints)], sort_keys=True, ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def load(cls, paths):
+        """
+        Merges rule packs in order: a later pack replaces earlier prefix rules with the same prefix,
+        its title patterns are tried before earlier ones, and its related-work hints are added.
+        Unreadable packs and invalid rules are logged and skipped.
+        """
+        prefix_rules = {}
+        title_patterns = []
+        related_work_hints = []
+        sources = []
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    pack = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load series rule pack {path}: {e}")
+                continue
+            sources.append(path)
+            for rule in pack.get('prefixes', []):
+                if not isinstance(rule, dict) or not rule.get('prefix') or not rule.get('series'):
+                    logger.warning(f"Ignoring invalid prefix rule {rule!r} in {path}")
+                    continue
+                prefix_rules[rule['prefix'].lower()] = rule
+            pack_patterns = []
+            for rule in pack.get('title_patterns', []):
+                try:
+                    compile_title_pattern(rule['pattern'])
+                except (TypeError, KeyError, re.error) as e:
+                    logger.warning(f"Ignoring invalid title pattern {rule!r} in {path}: {e}")
+                    continue
+                pack_patterns.append(rule)
+            title_patterns[:0] = pack_patterns
+            related_work_hints.extend(h for h in pack.get('related_work_hints', []) if h not in related_work_hints)
+        return cls(list(prefix_rules.values()), title_patterns, related_work_hints, sources)
+
+    def match_title(self, title_lower):
+        """Returns (series_name, series_tag) inferred from a lower-cased title, (None, None) if nothing matches."""
+        prefix_match = self.prefix_trie.longest_prefix(title_lower)
+        if prefix_match is not None:
+            prefix, (series_display_name, tag_prefix) = prefix_match
+            series_tag = None
+            # Try to extract a tag (e.g., episode number, volume number)
+            tag_match = _PREFIX_TAG_RE.match(title_lower[len(prefix):].strip())
+            if tag_match:
+                tag = tag_match.group(1).upper()
+                if tag_prefix and not tag.startswith(tag_prefix.upper()):
+                    series_tag = tag_prefix.strip() + " " + tag
+                elif not tag_prefix and tag.isdigit():
+                    series_tag = "EP" + tag # Default tag prefix for numbers
+                else:
+                    series_tag = tag
+            return series_display_name, series_tag
+
+        for pattern, strip_suffixes in self.title_patterns:
+            match = pattern.match(title_lower)
+            if not match:
+                continue
+            series_base_name = match.group(1).strip()
+            for suffix in strip_suffixes:
+                if series_base_name.lower().endswith(suffix):
+                    series_base_name = series_base_name[:-len(suffix)].strip()
+            if len(series_base_name) <= 2: # Avoid very short or empty series names
+                continue
+            tag_part = next((group for group in match.groups()[1:] if group), "").upper()
+            if tag_part.isdigit() and not any(kw in title_lower for kw in _NON_EPISODE_KEYWORDS):
+                tag_part = "EP" + tag_part
+            return series_base_name.title(), tag_part or None
+        return None, None
+
+    def series_from_related_work(self, title, aliases, work_type, work_name):
+        """A related work of a series-like type ('前作', '续作', ...) sharing the title's first word names the series."""
+        if not any(hint in work_type for hint in self.related_work_hints):
+            return None
+        current_title_base_for_series = (title or '').split(' ')[0].lower() # Often first word is series
+        related_name_for_series = work_name.split(' ')[0].lower()
+        if current_title_base_for_series and related_name_for_series and len(related_name_for_series) > 2:
+            if current_title_base_for_series.startswith(related_name_for_series) or \
+               related_name_for_series.startswith(current_title_base_for_series) or \
+               any(current_title_base_for_series.startswith(alias.split(' ')[0].lower()) for alias in aliases):
+                return work_name.split(' ')[0].strip().title() # Use the related work's base name, capitalized
+        return None
+
+    def derive(self, title, aliases, related_works):
+        """
+        Returns (series_name, series_tag) for a parsed game: a series-like related work first, then the title.
+        related_works is an iterable of (work type, work name) pairs. Only the finished record is used, so
+        cached records re-derive to the same result as a fresh parse: every alias counts, wherever the
+        names section is, and work names are the stored, stripped ones. A title that isn't a string (a
+        YAML number or date) raises AttributeError, which turns the parse into an error record.
+        """
+        title_lower = title.lower() if title else None # Before the related works, so such a title always fails
+        for work_type, work_name in related_works:
+            series_name = self.series_from_related_work(title, aliases, work_type, work_name)
+            if series_name:
+                logger.debug(f"Inferred series name '{series_name}' from related work '{work_name}' for '{title}'")
+                return series_name, None
+        if title_lower:
+            return self.match_title(title_lower)
+        return None, None
+
+def rule_pack_paths(extra_paths_setting):
+    """The bundled series_rules.json followed by the user packs listed in extra_paths_setting (os.pathsep separated)."""
+    return [DEFAULT_RULES_PATH] + [p for p in (extra_paths_setting or "").split(os.pathsep) if p.strip()]
@@ -0,0 +1,285 @@
+# file: snapshot_file.py
+# Versioned binary snapshot of a parsed library: every parsed file's record and fingerprint in one file
+# that can be copied to another machine and opened there without parsing any Markdown.
+#
+# Layout (little-endian):
+#   b"GALSNAP\0", format version (u32), directory length (u32), directory (UTF-8 JSON)
+#   sections, each starting on an 8-byte boundary, located through the directory
+# The directory holds the metadata (folder, parser version, ...) and {section name: [offset, length]}.
+# Records are stored column by column, one row per parsed file in directory listing order:
+#   strings.offsets / strings.data   string table, every distinct string stored once
+#   col.<field>                      u32 per row: 0 for None, else (string index + 1) << 1 | is_json
+#                                    (is_json marks a non-string value stored as its JSON text)
+#   col.duration_hours               f64 per row, NaN for None
+#   col.path / mtime_ns / size / sha1  the file (path relative to the folder, '/' separated) and its fingerprint
+#   list.<field>.offsets / .values   per row, a slice of a flat array of string refs
+#   index.by_id                      rows ordered by game ID, for lookups by binary search
+# Opening a snapshot maps it into memory and reads nothing but the directory; a row is decoded when asked for.
+
+import os
+import sys
+import json
+import math
+import mmap
+import time
+import struct
+from array import array
+
+from game_record import GameRecord
+
+MAGIC = b"GALSNAP\0"
+FORMAT_VERSION = 1
+FILE_EXTENSION = ".glsnap"
+_HEADER = struct.Struct("<8sII")
+
+# GameRecord slots stored as one string ref per row
+REF_FIELDS = (
+    'id', 'source_filename', 'title', 'abbrlink', 'date', 'cover_image',
+    'japanese_name', 'english_name', 'chinese_name', 'duration_str', 'duration_tier', 'developer',
+    'release_date', 'description', 'series_name', 'series_tag', 'parse_error', 'parse_warning', 'title_display',
+)
+# Tuple slots -> refs per item (related_works are (type, name), download_links (name, url, password))
+LIST_FIELDS = {'aliases': 1, 'platforms': 1, 'screenshots': 1, 'related_works': 2, 'download_links': 3}
+
+
+class SnapshotError(Exception):
+    """The file is not a snapshot this version can read."""
+
+
+def _stored_text(value):
+    # The string table entry for a non-None value
+    return value if type(value) is str else json.dumps(value, ensure_ascii=False, default=str)
+
+
+class _StringTableBuilder:
+    def __init__(self):
+        self.index = {}
+        self.data = bytearray()
+        self.offsets = array('Q', [0])
+
+    def ref(self, value):
+        if value is None:
+            return 0
+        text, is_json = _stored_text(value), int(type(value) is not str)
+        string_index = self.index.get(text)
+        if string_index is None:
+            string_index = self.index[text] = len(self.offsets) - 1
+            self.data += text.encode('utf-8', 'surrogatepass')
+            self.offsets.append(len(self.data))
+        return (string_index + 1) << 1 | is_json
+
+
+def _array_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path, meta, entries):
+    """
+    Writes entries, a list of (path relative to the folder, fingerprint tuple, GameRecord) in listing order,
+    with meta (a JSON-serializable dict) to path. The file is replaced atomically.
+    """
+    strings = _StringTableBuilder()
+    row_count = len(entries)
+    sections = {}
+
+    for field in REF_FIELDS:
+        sections[f"col.{field}"] = array('I', (strings.ref(getattr(record, field)) for _, _, record in entries))
+    sections["col.duration_hours"] = array('d', (math.nan if record.duration_hours is None else float(record.duration_hours)
+                                                 for _, _, record in entries))
+    for field, width in LIST_FIELDS.items():
+        offsets, values = array('I', [0]), array('I')
+        for _, _, record in entries:
+            for item in getattr(record, field):
+                values.extend(strings.ref(part) for part in (item if width > 1 else (item,)))
+            offsets.append(len(values))
+        sections[f"list.{field}.offsets"] = offsets
+        sections[f"list.{field}.values"] = values
+    sections["col.path"] = array('I', (strings.ref(relative_path) for relative_path, _, _ in entries))
+    sections["col.mtime_ns"] = array('q', (fingerprint[0] for _, fingerprint, _ in entries))
+    sections["col.size"] = array('q', (fingerprint[1] for _, fingerprint, _ in entries))
+    sections["col.sha1"] = array('I', (strings.ref(fingerprint[2]) for _, fingerprint, _ in entries))
+    sections["index.by_id"] = array('I', sorted(range(row_count), key=lambda row: _stored_text(entries[row][2].id or "")))
+    sections["strings.offsets"] = strings.offsets
+    sections["strings.data"] = bytes(strings.data)
+
+    payloads = [(name, value if isinstance(value, bytes) else _array_bytes(value)) for name, value in sections.items()]
+    meta = dict(meta, format_version=FORMAT_VERSION, rows=row_count, strings=len(strings.offsets) - 1,
+                created_at=meta.get('created_at') or time.strftime("%Y-%m-%dT%H:%M:%S"))
+    # Section offsets depend on the directory length and the directory lists them: grow until it fits
+    reserved = 0
+    while True:
+        position = _HEADER.size + reserved
+        directory = {"meta": meta, "sections": {}}
+        for name, data in payloads:
+            position += -position % 8
+            directory["sections"][name] = [position, len(data)]
+            position += len(data)
+        directory_bytes = json.dumps(directory, ensure_ascii=False).encode('utf-8')
+        if len(directory_bytes) <= reserved:
+            break
+        reserved = len(directory_bytes) + 64
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, reserved))
+        f.write(directory_bytes.ljust(reserved, b" "))
+        for name, data in payloads:
+            f.write(b"\0" * (directory["sections"][name][0] - f.tell()))
+            f.write(data)
+    os.replace(temp_path, path)
+    return meta
+
+
+class SnapshotReader:
+    """
+    A snapshot file mapped into memory. Columns are read in place; rows are turned into GameRecords only
+    when entry() or record() asks for them, and every distinct string is decoded at most once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e: # Empty file
+                raise SnapshotError(f"{path} is not a library snapshot: {e}") from None
+        self._views = [] # Every memoryview over the map, released before it is closed
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        if len(self._mmap) < _HEADER.size:
+            raise SnapshotError(f"{self.path} is not a library snapshot (file too short).")
+        magic, version, directory_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path} is not a library snapshot.")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{self.path} has snapshot format version {version}, this version reads {FORMAT_VERSION}.")
+        try:
+            directory = json.loads(bytes(self._mmap[_HEADER.size:_HEADER.size + directory_length]).decode('utf-8'))
+            self.meta = directory["meta"]
+            self._sections = directory["sections"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise SnapshotError(f"{self.path} has an unreadable directory: {e}") from None
+        self.row_count = self.meta["rows"]
+        self._string_offsets = self._column("strings.offsets", 'Q')
+        self._string_data = self._section("strings.data")
+        self._strings = [None] * (len(self._string_offsets) - 1)
+        self._columns = {field: self._column(f"col.{field}", 'I') for field in REF_FIELDS}
+        self._duration_hours = self._column("col.duration_hours", 'd')
+        self._lists = {field: (self._column(f"list.{field}.offsets", 'I'), self._column(f"list.{field}.values", 'I'))
+                       for field in LIST_FIELDS}
+        self._paths = self._column("col.path", 'I')
+        self._mtimes = self._column("col.mtime_ns", 'q')
+        self._sizes = self._column("col.size", 'q')
+        self._hashes = self._column("col.sha1", 'I')
+        self._by_id = self._column("index.by_id", 'I')
+
+    def _section(self, name):
+        try:
+            offset, length = self._sections[name]
+        except KeyError:
+            raise SnapshotError(f"{self.path} lacks the {name} section.") from None
+        if offset + length > len(self._mmap):
+            raise SnapshotError(f"{self.path} is truncated.")
+        view = memoryview(self._mmap)[offset:offset + length]
+        self._views.append(view)
+        return view
+
+    def _column(self, name, typecode):
+        view = self._section(name)
+        if sys.byteorder == 'big': # Columns are little-endian; a swapped copy is the price on big-endian machines
+            values = array(typecode, view.tobytes())
+            values.byteswap()
+            return values
+        column = view.cast(typecode)
+        self._views.append(column)
+        return column
+
+    @property
+    def folder_path(self):
+        return self.meta.get("folder_path")
+
+    @property
+    def parser_version(self):
+        return self.meta.get("parser_version")
+
+    def __len__(self):
+        return self.row_count
+
+    def _text(self, ref):
+        # The string table entry behind a non-zero ref
+        string_index = (ref >> 1) - 1
+        text = self._strings[string_index]
+        if text is None:
+            start, end = self._string_offsets[string_index], self._string_offsets[string_index + 1]
+            text = self._strings[string_index] = sys.intern(str(self._string_data[start:end], 'utf-8', 'surrogatepass'))
+        return text
+
+    def _value(self, ref):
+        if not ref:
+            return None
+        return json.loads(self._text(ref)) if ref & 1 else self._text(ref)
+
+    def _id_text(self, row):
+        ref = self._columns['id'][row]
+        return self._text(ref) if ref else ""
+
+    def record(self, row):
+        record = GameRecord.__new__(GameRecord)
+        for field in REF_FIELDS:
+            setattr(record, field, self._value(self._columns[field][row]))
+        duration_hours = self._duration_hours[row]
+        record.duration_hours = None if math.isnan(duration_hours) else duration_hours
+        for field, width in LIST_FIELDS.items():
+            offsets, values = self._lists[field]
+            items = [self._value(ref) for ref in values[offsets[row]:offsets[row + 1]]]
+            setattr(record, field, tuple(items) if width == 1 else tuple(zip(*[iter(items)] * width)))
+        return record
+
+    def relative_path(self, row):
+        return self._value(self._paths[row])
+
+    def fingerprint(self, row):
+        return (self._mtimes[row], self._sizes[row], self._value(self._hashes[row]))
+
+    def entry(self, row):
+        """(path relative to the folder, fingerprint tuple, GameRecord) of a row."""
+        return self.relative_path(row), self.fingerprint(row), self.record(row)
+
+    def entries(self):
+        for row in range(self.row_count):
+            yield self.entry(row)
+
+    def rows_for_id(self, game_id):
+        """Rows whose record has game_id, in listing order (a binary search over the ID index)."""
+        low, high = 0, self.row_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_text(self._by_id[middle]) < game_id:
+                low = middle + 1
+            else:
+                high = middle
+        rows = []
+        while low < self.row_count and self._id_text(self._by_id[low]) == game_id:
+            rows.append(self._by_id[low])
+            low += 1
+        return sorted(rows)
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,86 @@
+# file: snapshot_tool.py
+# Command-line export/import of parsed libraries as snapshot files (see snapshot_file.py).
+#
+# Usage (from the repository root):
+#   python backend/snapshot_tool.py export D:/Games/md library.glsnap     # parse (or restore) the folder, write a snapshot
+#   python backend/snapshot_tool.py info library.glsnap                   # show what a snapshot holds
+#   python backend/snapshot_tool.py import library.glsnap --folder /srv/games/md
+#       # seed this machine's parse cache from the snapshot; only files that differ from it get parsed
+# To serve a snapshot without its folder (read-only viewer): GALGAME_SNAPSHOTS=library.glsnap python backend/app.py
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("GALGAME_WATCH", "off") # One-shot command, nothing to watch
+
+import app as galgame_app  # noqa: E402
+from snapshot_file import SnapshotReader, SnapshotError  # noqa: E402
+
+
+def export_command(args):
+    folder_path = os.path.abspath(args.folder)
+    start = time.perf_counter()
+    library, md_files, _ = galgame_app.refresh_library(folder_path)
+    if md_files is None:
+        print(f"Could not read {folder_path}.", file=sys.stderr)
+        return 1
+    meta = library.export_snapshot(args.output)
+    print(f"Exported {meta['rows']} file(s), {meta['games']} game(s) of {folder_path} to {args.output} "
+          f"({os.path.getsize(args.output) / 2 ** 20:.1f} MiB) in {time.perf_counter() - start:.1f}s.")
+    return 0
+
+
+def info_command(args):
+    with SnapshotReader(args.snapshot) as reader:
+        for key, value in sorted(reader.meta.items()):
+            print(f"{key}: {value}")
+    return 0
+
+
+def import_command(args):
+    if galgame_app._parse_cache_store is None:
+        print("The parse cache is disabled (GALGAME_PARSE_CACHE=off), an import would be lost on exit.", file=sys.stderr)
+        return 1
+    folder_path = os.path.abspath(args.folder) if args.folder else None
+    start = time.perf_counter()
+    library = galgame_app.open_snapshot_library(args.snapshot, folder_path, read_only=False)
+    _, md_files, _ = galgame_app.refresh_library(library.folder_path)
+    if md_files is None:
+        print(f"Could not read {library.folder_path}; serve the snapshot read-only with GALGAME_SNAPSHOTS instead.", file=sys.stderr)
+        return 1
+    stats = library.last_load_stats
+    print(f"Imported {args.snapshot} into the parse cache for {library.folder_path} in {time.perf_counter() - start:.1f}s: "
+          f"{len(library.all_games)} game(s), {stats.files_parsed if stats else 0} file(s) parsed because they differ from the snapshot.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and import parsed libraries as snapshot files.")
+    commands = parser.add_subparsers(dest="command")
+    export_parser = commands.add_parser("export", help="Write the parsed library of a folder to a snapshot file")
+    export_parser.add_argument("folder", help="Markdown folder")
+    export_parser.add_argument("output", help="Snapshot file to write")
+    info_parser = commands.add_parser("info", help="Show a snapshot's metadata")
+    info_parser.add_argument("snapshot")
+    import_parser = commands.add_parser("import", help="Seed the parse cache of a folder from a snapshot")
+    import_parser.add_argument("snapshot")
+    import_parser.add_argument("--folder", help="Where the folder lives on this machine (default: the folder recorded in the snapshot)")
+    args = parser.parse_args()
+
+    handlers = {"export": export_command, "info": info_command, "import": import_command}
+    if args.command not in handlers:
+        parser.print_help()
+        return 2
+    try:
+        return handlers[args.command](args)
+    except (OSError, SnapshotError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        galgame_app._shutdown_parse_pool()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
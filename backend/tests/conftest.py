@@ -0,0 +1,33 @@
+# Shared setup for the backend tests: app.py reads its settings at import time, so nothing
+# may be written next to the sources and no folder watcher may outlive a test.
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault("GALGAME_PARSE_CACHE", "off")
+os.environ.setdefault("GALGAME_WATCH", "off")
+os.environ.setdefault("GALGAME_THUMBNAIL_CACHE", "off")
+os.environ.setdefault("GALGAME_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="galgame-test-snapshots-"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as galgame_app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return galgame_app.app.test_client()
+
+
+@pytest.fixture
+def md_folder(tmp_path):
+    """Returns write(name, text), which adds a Markdown file to a fresh folder; the folder is write.path."""
+    def write(name, text):
+        file_path = tmp_path / name
+        file_path.write_text(text, encoding='utf-8')
+        return str(file_path)
+    write.path = str(tmp_path)
+    return write
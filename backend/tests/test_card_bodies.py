@@ -0,0 +1,50 @@
+import json
+import os
+
+import app as galgame_app
+from response_bodies import encode_json
+
+
+def _cards_by_id(client, folder_path):
+    basic = client.post('/api/games_basic', json={"folder_path": folder_path}).get_json()["games"]
+    queried = client.post('/api/games/query', json={"folder_path": folder_path, "page_size": 100}).get_json()["games"]
+    return {card["id"]: card for card in basic}, {card["id"]: card for card in queried}
+
+
+def test_card_list_matches_index_when_a_stale_card_is_cached_meanwhile(client, md_folder):
+    game_path = md_folder("game.md", "---\ntitle: First Title\nabbrlink: game\n---\n")
+    md_folder("other.md", "---\ntitle: Other\nabbrlink: other\n---\n")
+    library, _, _ = galgame_app.refresh_library(md_folder.path)
+    stale_entry = library._card_cache["game"]
+
+    with open(game_path, 'w', encoding='utf-8') as f:
+        f.write("---\ntitle: Second Title\nabbrlink: game\n---\n")
+    os.utime(game_path, ns=(os.stat(game_path).st_mtime_ns + 10 ** 9,) * 2)
+    card_entry = library._card_entry
+
+    def card_entry_then_stale_write(game):
+        # A request thread caching the previous record's card right after the commit built the new one
+        entry = card_entry(game)
+        library._card_cache[game.id] = stale_entry
+        return entry
+    library._card_entry = card_entry_then_stale_write
+    try:
+        galgame_app.refresh_library(md_folder.path)
+    finally:
+        del library._card_entry
+
+    basic, queried = _cards_by_id(client, md_folder.path)
+    assert basic == queried
+    assert basic["game"]["title_display"] == "Second Title"
+
+
+def test_search_serves_the_snapshot_cards(client, md_folder):
+    md_folder("game.md", "---\ntitle: Searchable Title\nabbrlink: game\n---\n")
+    library, _, _ = galgame_app.refresh_library(md_folder.path)
+    cache_before = dict(library._card_cache)
+
+    results = client.get('/api/search', query_string={"q": "searchable", "folder_path": md_folder.path}).get_json()["results"]
+
+    assert [card["id"] for card in results] == ["game"]
+    assert {k: v for k, v in results[0].items() if k != "score"} == json.loads(encode_json(library.snapshot.card("game")))
+    assert library._card_cache == cache_before
@@ -0,0 +1,50 @@
+import threading
+import time
+
+from folder_watcher import FolderWatcher
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_polling_only_calls_back_when_the_listing_changes(tmp_path):
+    listing = {"a.md": (1, 10)}
+    polls = []
+    calls = []
+    called = threading.Event()
+
+    def list_folder(folder_path):
+        polls.append(folder_path)
+        return dict(listing)
+
+    def on_change(folder_path, changed_paths):
+        calls.append(changed_paths)
+        called.set()
+
+    watcher = FolderWatcher(str(tmp_path), on_change, poll_interval=0.01, use_watchdog=False, listing=list_folder)
+    watcher.start()
+    try:
+        assert called.wait(2) # The first poll always calls back
+        assert _wait_for(lambda: len(polls) >= 10)
+        assert calls == [None]
+        listing["b.md"] = (2, 20)
+        assert _wait_for(lambda: len(calls) == 2)
+        assert _wait_for(lambda: len(polls) >= 20)
+        assert calls == [None, None]
+    finally:
+        watcher.stop()
+
+
+def test_polling_without_listing_always_calls_back(tmp_path):
+    calls = []
+    watcher = FolderWatcher(str(tmp_path), lambda folder_path, changed_paths: calls.append(changed_paths),
+                            poll_interval=0.01, use_watchdog=False)
+    watcher.start()
+    try:
+        assert _wait_for(lambda: len(calls) >= 3)
+    finally:
+        watcher.stop()
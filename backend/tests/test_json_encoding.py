@@ -0,0 +1,107 @@
+import datetime
+import json
+import queue
+
+import pytest
+
+import app as galgame_app
+import response_bodies
+
+# YAML turns unquoted dates into datetime.date objects, which reach the records as they are
+DATE_VALUED_GAME = """---
+title: Dated Game
+abbrlink: 2021-02-03
+release_date: 2019-05-06
+---
+## 游戏信息
+- 发售日期：2019-05-06
+- 时长：10h
+"""
+# A title that isn't a string makes the file a parse error record, which must be served like any other
+DATE_TITLED_GAME = """---
+title: 2020-01-01
+---
+## 游戏信息
+- 相关作品：
+  - 前作：2020-01 Begins
+"""
+
+
+@pytest.fixture(params=["stdlib", "orjson"])
+def json_encoder(request, monkeypatch):
+    if request.param == "orjson" and response_bodies.orjson is None:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(response_bodies, "USE_ORJSON", request.param == "orjson")
+    return request.param
+
+
+def test_encoders_write_dates_as_text(json_encoder):
+    payload = {"date": datetime.date(2020, 1, 1), "datetime": datetime.datetime(2020, 1, 1, 3, 4, 5), "text": "日本語"}
+    assert json.loads(response_bodies.encode_json(payload)) == {
+        "date": "2020-01-01", "datetime": "2020-01-01 03:04:05", "text": "日本語"}
+
+
+def test_date_valued_frontmatter_is_served(json_encoder, client, md_folder):
+    md_folder("dated.md", DATE_VALUED_GAME)
+    md_folder("date_titled.md", DATE_TITLED_GAME)
+    md_folder("plain.md", "---\ntitle: Plain Game\n---\n")
+
+    response = client.post('/api/games_basic', json={"folder_path": md_folder.path})
+    assert response.status_code == 200
+    cards = response.get_json()["games"]
+    assert len(cards) == 3
+    assert {card["id"]: card["parse_error"] for card in cards} == {"2021-02-03": False, "date-titled-md": True, "plain-game": False}
+
+    stream_lines = [json.loads(line) for line in client.get('/api/games_stream', query_string={"folder_path": md_folder.path}).data.splitlines()]
+    assert [line for line in stream_lines if line["type"] == "error"] == []
+    assert stream_lines[-1] == {"type": "end", "total": 3}
+    assert {card["id"] for line in stream_lines if line["type"] == "games" for card in line["games"]} == {card["id"] for card in cards}
+
+    for card in cards:
+        response = client.get(f"/api/game_details/{card['uid']}")
+        assert response.status_code == 200
+        assert response.get_json()["id"] == card["id"]
+
+
+def test_live_delta_of_a_date_valued_record(json_encoder, md_folder):
+    md_folder("plain.md", "---\ntitle: Plain Game\n---\n")
+    library, _, _ = galgame_app.refresh_library(md_folder.path)
+    subscriber_queue = queue.Queue(maxsize=100)
+    with galgame_app._event_subscribers_lock:
+        galgame_app._event_subscribers.add(subscriber_queue)
+    try:
+        dated_path = md_folder("dated.md", DATE_VALUED_GAME)
+        library.refresh(changed_paths=[dated_path])
+    finally:
+        with galgame_app._event_subscribers_lock:
+            galgame_app._event_subscribers.discard(subscriber_queue)
+
+    event_name, data = subscriber_queue.get_nowait()
+    assert event_name == "delta"
+    assert [card["id"] for card in json.loads(data)["added"]] == ["2021-02-03"]
+
+
+class _RacingQueue(queue.Queue):
+    """A full queue whose stream reads everything right after empty() has said it wasn't empty."""
+
+    def empty(self):
+        was_empty = super().empty()
+        while not super().empty():
+            self.get()
+        return was_empty
+
+
+def test_full_subscriber_queue_drained_by_its_stream_gets_a_reload():
+    racing_queue, other_queue = _RacingQueue(maxsize=2), queue.Queue(maxsize=100)
+    racing_queue.put(("delta", "{}"))
+    racing_queue.put(("delta", "{}"))
+    with galgame_app._event_subscribers_lock:
+        galgame_app._event_subscribers.update((racing_queue, other_queue))
+    try:
+        galgame_app._publish_event("delta", {"folder_path": "/games", "library_id": "abc"})
+    finally:
+        with galgame_app._event_subscribers_lock:
+            galgame_app._event_subscribers.difference_update((racing_queue, other_queue))
+
+    assert racing_queue.get_nowait() == ("reload", '{"folder_path":"/games","library_id":"abc"}')
+    assert other_queue.get_nowait()[0] == "delta" # The other clients still get the event
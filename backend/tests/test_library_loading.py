@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+import threading
+
+import app as galgame_app
+
+GAME_COUNT = 200
+
+
+def _write_games(md_folder, version, mtime_ns=None):
+    for number in range(GAME_COUNT):
+        file_path = md_folder(f"game_{number:02d}.md", f"---\ntitle: Game {number} v{version}\nabbrlink: game-{number}\n---\n")
+        if mtime_ns is not None:
+            os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+
+def test_concurrent_loads_share_one_job(md_folder):
+    _write_games(md_folder, 1)
+    library = galgame_app.get_library(md_folder.path, create=True)
+
+    with library.lock: # Keeps the first job from getting anywhere while the second caller arrives
+        _, first_job = galgame_app.start_library_load(md_folder.path)
+        _, second_job = galgame_app.start_library_load(md_folder.path)
+        assert second_job is first_job
+        assert not first_job.finished
+
+    md_files, _ = first_job.wait()
+    assert len(md_files) == GAME_COUNT
+    assert first_job.files_parsed == GAME_COUNT # Parsed once, not once per caller
+    assert len(library.all_games) == GAME_COUNT
+
+    _, later_job = galgame_app.start_library_load(md_folder.path)
+    assert later_job is not first_job # A finished job isn't joined
+    later_job.wait()
+    assert later_job.files_parsed == 0
+
+
+def test_concurrent_refresh_library_callers_get_the_same_result(md_folder):
+    _write_games(md_folder, 1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(galgame_app.refresh_library(md_folder.path))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(library) for library, _, _ in results}) == 1
+    assert all(sorted(md_files) == sorted(results[0][1]) for _, md_files, _ in results)
+
+
+def _check_versions(snapshot):
+    versions = {game.title.rsplit(" v", 1)[1] for game in snapshot.games.values()}
+    assert len(versions) == 1, versions # Never half of one rescan's changes
+
+
+def _check_snapshot(library):
+    snapshot = library.snapshot
+    _check_versions(snapshot)
+    assert snapshot.index.ids == list(snapshot.games)
+    assert len(snapshot.card_fragments) == len(snapshot.index.cards)
+    for fragment, card in zip(snapshot.card_fragments, snapshot.index.cards):
+        assert json.loads(fragment)["title_display"] == card["title_display"]
+    body_versions = {card["title_display"].rsplit(" v", 1)[1] for card in json.loads(library.cards_body().data)["games"]}
+    assert len(body_versions) == 1, body_versions
+
+
+def test_readers_see_whole_snapshots_while_rescans_commit(md_folder):
+    _write_games(md_folder, 0)
+    library, _, _ = galgame_app.refresh_library(md_folder.path)
+    base_mtime_ns = os.stat(os.path.join(md_folder.path, "game_00.md")).st_mtime_ns
+    stop = threading.Event()
+    errors = []
+
+    def read_snapshots():
+        reads = 0
+        while not stop.is_set():
+            try:
+                _check_versions(library.snapshot)
+                if reads % 50 == 0:
+                    _check_snapshot(library)
+            except Exception as e:
+                errors.append(e)
+                return
+            reads += 1
+
+    readers = [threading.Thread(target=read_snapshots) for _ in range(2)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5) # Interleave readers and the committing thread as finely as possible
+    for reader in readers:
+        reader.start()
+    try:
+        for version in range(1, 8):
+            _write_games(md_folder, version, mtime_ns=base_mtime_ns + version * 10 ** 9)
+            library.refresh()
+            assert {game.title for game in library.all_games.values()} == {f"Game {n} v{version}" for n in range(GAME_COUNT)}
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
@@ -0,0 +1,64 @@
+import pytest
+
+import app as galgame_app
+
+
+@pytest.fixture
+def folders(tmp_path):
+    """Two folders with one game each."""
+    paths = []
+    for name in ("first", "second"):
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / f"{name}.md").write_text(f"---\ntitle: {name.title()} Game\nabbrlink: {name}\n---\n", encoding='utf-8')
+        paths.append(str(folder))
+    return paths
+
+
+@pytest.fixture
+def polling_watchers(monkeypatch):
+    # A real watcher per library, whose first poll never comes during the test
+    monkeypatch.setattr(galgame_app, "WATCH_MODE", "poll")
+    monkeypatch.setattr(galgame_app, "WATCH_POLL_INTERVAL", 3600)
+
+
+def test_memory_budget_evicts_the_least_recently_used_library(folders, polling_watchers, monkeypatch):
+    first_path, second_path = folders
+    first, _, _ = galgame_app.refresh_library(first_path)
+    watcher = first._watcher
+    assert watcher is not None and watcher._poll_thread.is_alive()
+
+    monkeypatch.setattr(galgame_app, "LIBRARY_MEMORY_BUDGET_BYTES", 1) # Only the most recent library fits
+    second, _, _ = galgame_app.refresh_library(second_path)
+
+    assert galgame_app.get_library(first_path) is None
+    assert first.closed and first._watcher is None
+    watcher._poll_thread.join(timeout=2)
+    assert not watcher._poll_thread.is_alive()
+    assert galgame_app.get_library(second_path) is second # The most recent one stays, even over budget
+    assert second._watcher is not None
+
+    # An evicted folder loads again as a new library, and the other one makes room for it
+    reloaded, md_files, _ = galgame_app.refresh_library(first_path)
+    assert reloaded is not first and len(md_files) == 1
+    assert [game.title for game in reloaded.all_games.values()] == ["First Game"]
+    assert galgame_app.get_library(second_path) is None and second.closed
+    galgame_app._discard_library(reloaded)
+
+
+def test_libraries_within_the_budget_stay_loaded(folders, polling_watchers, monkeypatch):
+    monkeypatch.setattr(galgame_app, "LIBRARY_MEMORY_BUDGET_BYTES", 1 << 40)
+    first, _, _ = galgame_app.refresh_library(folders[0])
+    second, _, _ = galgame_app.refresh_library(folders[1])
+    assert galgame_app.get_library(folders[0]) is first and not first.closed
+    assert galgame_app.get_library(folders[1]) is second and not second.closed
+    for library in (first, second):
+        galgame_app._discard_library(library)
+    assert first.closed and second.closed
+
+
+@pytest.mark.parametrize("folder_path", ["relative/folder", "/tmp/../etc"])
+def test_game_details_rejects_unsafe_folder_path(client, folder_path):
+    response = client.get('/api/game_details/anything', query_string={"folder_path": folder_path})
+    assert response.status_code == 400
+    assert galgame_app.get_library(folder_path) is None
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import app as galgame_app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loads a folder and prints its card IDs and the ETag of /api/games_basic
+LOAD_SCRIPT = """
+import sys
+import app as galgame_app
+response = galgame_app.app.test_client().post('/api/games_basic', json={"folder_path": sys.argv[1]})
+print(response.headers["ETag"], [card["id"] for card in response.get_json()["games"]])
+"""
+
+
+def _write_games(md_folder, count=30):
+    for number in range(count):
+        md_folder(f"game_{number:02d}.md", f"---\ntitle: Game {number}\nabbrlink: id-{(number * 7) % count}\n---\n")
+    # Two files claiming one ID: the card sits where the first of them is listed
+    md_folder("game_99.md", "---\ntitle: Duplicate\nabbrlink: id-0\n---\n")
+
+
+def _listing_order_ids(library):
+    ids = []
+    for file_path in sorted(library.file_order, key=library.file_order.get):
+        game_id = library.parsed_files[file_path].id
+        if game_id not in ids:
+            ids.append(game_id)
+    return ids
+
+
+def test_cards_follow_file_order(md_folder):
+    _write_games(md_folder)
+    library, _, _ = galgame_app.refresh_library(md_folder.path)
+    assert list(library.all_games) == _listing_order_ids(library)
+    assert [card["id"] for card in library.index.cards] == _listing_order_ids(library)
+
+
+def test_card_order_and_etag_are_the_same_in_every_process(md_folder, tmp_path):
+    _write_games(md_folder)
+    outputs = set()
+    for hash_seed in ("1", "2", "3"):
+        for parse_cache in ("off", str(tmp_path / "parse_cache.sqlite3")): # Fresh parse, then restore from the store
+            env = dict(os.environ, PYTHONHASHSEED=hash_seed, GALGAME_PARSE_CACHE=parse_cache, GALGAME_WATCH="off",
+                       GALGAME_THUMBNAIL_CACHE="off")
+            result = subprocess.run([sys.executable, "-c", LOAD_SCRIPT, md_folder.path], cwd=BACKEND_DIR, env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True, check=True)
+            outputs.add(result.stdout)
+    assert len(outputs) == 1, outputs
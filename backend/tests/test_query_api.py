@@ -0,0 +1,32 @@
+import pytest
+
+import app as galgame_app
+
+
+@pytest.fixture
+def loaded_folder(md_folder):
+    md_folder("first.md", "---\ntitle: First Game\nabbrlink: first\n---\n## 游戏信息\n- 开发者：Studio A\n")
+    md_folder("second.md", "---\ntitle: Second Game\nabbrlink: second\n---\n## 游戏信息\n- 开发者：Studio B\n")
+    galgame_app.refresh_library(md_folder.path)
+    return md_folder.path
+
+
+@pytest.mark.parametrize("endpoint", ["/api/games/query", "/api/games/facets"])
+@pytest.mark.parametrize("favorite_ids", [[{}], [1], [["first"]], "first", {"first": True}])
+def test_malformed_favorite_ids_are_rejected(client, loaded_folder, endpoint, favorite_ids):
+    response = client.post(endpoint, json={"folder_path": loaded_folder, "favorite_ids": favorite_ids})
+    assert response.status_code == 400
+    assert "favorite_ids" in response.get_json()["error"]
+
+
+def test_favorite_ids_filter_by_id_or_uid(client, loaded_folder):
+    uid = galgame_app.make_game_uid(galgame_app.library_id_for(loaded_folder), "first")
+    for favorite_ids in (["first"], [uid]):
+        response = client.post('/api/games/query', json={"folder_path": loaded_folder, "favorite_ids": favorite_ids})
+        assert response.status_code == 200
+        assert [card["uid"] for card in response.get_json()["games"]] == [uid]
+    # Across libraries a uid names one game; a plain ID matches that game in every library
+    response = client.post('/api/games/query', json={"scope": "all", "favorite_ids": [uid], "page_size": 100})
+    assert [card["uid"] for card in response.get_json()["games"]] == [uid]
+    response = client.post('/api/games/query', json={"scope": "all", "favorite_ids": ["first"], "page_size": 100})
+    assert uid in [card["uid"] for card in response.get_json()["games"]]
@@ -0,0 +1,129 @@
+import os
+
+import pytest
+
+import app as galgame_app
+from snapshot_file import SnapshotReader
+
+GAMES = {
+    "alpha.md": "---\ntitle: Alpha Story\nabbrlink: alpha\n---\n## 游戏信息\n- 开发者：Studio A\n- 平台：PC\n",
+    "beta.md": "---\ntitle: Beta Story\nabbrlink: beta\n---\n## 游戏简介\nA searchable description.\n",
+}
+
+
+def _card_fields(card):
+    # What a card says about the game, apart from the library it was served from
+    return {k: v for k, v in card.items() if k not in ("uid", "library_id")}
+
+
+@pytest.fixture
+def exported_snapshot(client, md_folder, tmp_path):
+    for name, text in GAMES.items():
+        md_folder(name, text)
+    response = client.get('/api/libraries/export', query_string={"folder_path": md_folder.path})
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"].endswith(".glsnap")
+    snapshot_path = str(tmp_path / "copied.glsnap")
+    with open(snapshot_path, 'wb') as f:
+        f.write(response.data)
+    return md_folder.path, snapshot_path
+
+
+@pytest.fixture
+def viewer_folder(tmp_path):
+    """A folder path that doesn't exist on this machine; its read-only library is dropped afterwards."""
+    folder_path = str(tmp_path / "not-copied")
+    yield folder_path
+    library_id = galgame_app.library_id_for(folder_path)
+    library = galgame_app.get_library_by_id(library_id)
+    if library is not None:
+        library.start_load().wait()
+        galgame_app._discard_library(library)
+    source = galgame_app._read_only_snapshots.pop(library_id, None)
+    if source is not None:
+        source[1].close()
+
+
+def test_import_serves_a_read_only_library_without_its_folder(client, exported_snapshot, viewer_folder):
+    original_folder, snapshot_path = exported_snapshot
+    original_cards = client.post('/api/games_basic', json={"folder_path": original_folder}).get_json()["games"]
+
+    response = client.post('/api/libraries/import', json={"path": snapshot_path, "folder_path": viewer_folder})
+    assert response.status_code == 202
+    assert response.get_json()["read_only"] is True
+    viewer_id = galgame_app.library_id_for(viewer_folder)
+    # Details are answered from the snapshot, loaded or not
+    response = client.get(f"/api/game_details/{viewer_id}:alpha")
+    assert response.status_code == 200 and response.get_json()["title"] == "Alpha Story"
+
+    response = client.post('/api/games_basic', json={"folder_path": viewer_folder})
+    assert response.status_code == 200
+    cards = response.get_json()["games"]
+    assert sorted(map(_card_fields, cards), key=lambda c: c["id"]) == sorted(map(_card_fields, original_cards), key=lambda c: c["id"])
+    assert {card["uid"] for card in cards} == {f"{viewer_id}:alpha", f"{viewer_id}:beta"}
+
+    status = client.get('/api/libraries/status', query_string={"folder_path": viewer_folder}).get_json()
+    assert status["read_only"] is True and status["loaded"] is True and status["games"] == 2
+    results = client.get('/api/search', query_string={"q": "searchable", "folder_path": viewer_folder}).get_json()["results"]
+    assert [card["id"] for card in results] == ["beta"]
+    assert client.get(f"/api/game_details/{viewer_id}:missing").status_code == 404
+    assert not os.path.exists(viewer_folder) # Nothing was created for it
+
+
+def test_read_only_library_can_be_exported_again(client, exported_snapshot, viewer_folder, tmp_path):
+    _, snapshot_path = exported_snapshot
+    assert client.post('/api/libraries/import', json={"path": snapshot_path, "folder_path": viewer_folder}).status_code == 202
+    response = client.get('/api/libraries/export', query_string={"folder_path": viewer_folder})
+    assert response.status_code == 200
+    re_exported_path = str(tmp_path / "again.glsnap")
+    with open(re_exported_path, 'wb') as f:
+        f.write(response.data)
+    with SnapshotReader(snapshot_path) as original, SnapshotReader(re_exported_path) as again:
+        assert list(again.entries()) == list(original.entries())
+
+
+@pytest.mark.parametrize("body, status_code", [
+    ({}, 400),
+    ({"path": "relative.glsnap"}, 400),
+    ({"path": "/no/such/snapshot.glsnap"}, 400),
+    ({"path": "/abs.glsnap", "folder_path": "relative/folder"}, 400),
+])
+def test_import_rejects_bad_requests(client, body, status_code):
+    assert client.post('/api/libraries/import', json=body).status_code == status_code
+
+
+def test_import_rejects_files_that_are_not_snapshots(client, tmp_path):
+    not_a_snapshot = tmp_path / "notes.glsnap"
+    not_a_snapshot.write_text("just text", encoding='utf-8')
+    response = client.post('/api/libraries/import', json={"path": str(not_a_snapshot)})
+    assert response.status_code == 400
+    assert "snapshot" in response.get_json()["error"]
+
+
+def test_export_of_a_missing_folder_is_not_found(client, tmp_path):
+    response = client.get('/api/libraries/export', query_string={"folder_path": str(tmp_path / "missing")})
+    assert response.status_code == 404
+
+
+def test_replaced_snapshots_are_closed(client, exported_snapshot, viewer_folder):
+    _, snapshot_path = exported_snapshot
+    first = galgame_app.open_snapshot_library(snapshot_path, viewer_folder)
+    first_reader = first.snapshot_file
+    second = galgame_app.open_snapshot_library(snapshot_path, viewer_folder)
+    assert first_reader._mmap.closed and first.snapshot_file is None
+    assert not second.snapshot_file._mmap.closed
+    assert first.start_load().wait() == (None, []) # The replaced library has nothing left to load
+    viewer_id = galgame_app.library_id_for(viewer_folder)
+    assert client.get(f"/api/game_details/{viewer_id}:alpha").get_json()["title"] == "Alpha Story"
+
+
+def test_snapshot_is_closed_once_restored(exported_snapshot):
+    original_folder, snapshot_path = exported_snapshot
+    unloaded = galgame_app.open_snapshot_library(snapshot_path, original_folder)
+    unloaded_reader = unloaded.snapshot_file
+    library = galgame_app.open_snapshot_library(snapshot_path, original_folder)
+    reader = library.snapshot_file
+    assert unloaded_reader._mmap.closed and not reader._mmap.closed
+    md_files, _ = library.start_load().wait()
+    assert len(md_files) == 2 and len(library.all_games) == 2
+    assert reader._mmap.closed and library.snapshot_file is None
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from game_record import GameRecord
+from snapshot_file import SnapshotReader, SnapshotError, write_snapshot, FORMAT_VERSION
+
+
+def _record(**fields):
+    game = {
+        'id': 'game', 'source_filename': 'game.md', 'title': 'Game', 'abbrlink': 'game', 'date': None,
+        'cover_image': None, 'names': {'japanese': None, 'english': None, 'chinese': None, 'aliases': []},
+        'info': {'duration_str': None, 'duration_hours': None, 'duration_tier': '未知时长', 'developer': None,
+                 'release_date': None, 'platforms': [], 'related_works': []},
+        'download_links': [], 'screenshots': [], 'description': None, 'series_name': None, 'series_tag': None,
+        'parse_error': False, 'parse_warning': None, 'title_display': 'Game',
+    }
+    for name, value in fields.items():
+        if name in game['names']:
+            game['names'][name] = value
+        elif name in game['info']:
+            game['info'][name] = value
+        else:
+            game[name] = value
+    return GameRecord.from_dict(game)
+
+
+EDGE_ENTRIES = [
+    ("a.md", (1, 10, None), _record(
+        id='full', title='完全版 Full', japanese='フル', english='', chinese='全',
+        aliases=['Alias', 'Alias', ''], duration_str='12h', duration_hours=12.5, developer='Studio',
+        release_date='2020-01-01', platforms=['PC', 'Switch'],
+        related_works=[{'type': '前作', 'name': 'Prequel'}], description='line 1\nline 2\x00after NUL',
+        download_links=[{'name': 'Mirror', 'url': 'https://example.com/a?b=c', 'password': None}],
+        screenshots=['s1.png', 's2.png'], series_name='Series', series_tag='EP2')),
+    # Strings and the JSON text of non-string values must not be confused: "12" vs 12, "true" vs True
+    ("sub/目录/b.md", (1 << 60, 0, "da39a3ee5e6b4b0d3255bfef95601890afd80709"), _record(
+        id='json-values', abbrlink=12, title='12', date={'year': 2020}, parse_error=True, parse_warning='true',
+        duration_hours=0.0)),
+    ("c.md", (3, 30, None), _record(id='json-values', abbrlink='12', title=None, title_display=None, parse_error=None)),
+    ("d.md", (4, 40, ''), _record(id='lone-surrogate', title='bad \ud800 text', description='')),
+    ("e.md", (5, 50, None), _record(id=None, title='No ID')),
+]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "library.glsnap")
+
+
+def test_round_trip_keeps_every_value(snapshot_path):
+    meta = write_snapshot(snapshot_path, {"folder_path": "/games", "parser_version": "2"}, EDGE_ENTRIES)
+    assert not os.path.exists(snapshot_path + ".tmp")
+    assert meta["rows"] == len(EDGE_ENTRIES)
+
+    with SnapshotReader(snapshot_path) as reader:
+        assert len(reader) == len(EDGE_ENTRIES)
+        assert reader.folder_path == "/games" and reader.parser_version == "2"
+        assert reader.meta["format_version"] == FORMAT_VERSION
+        entries = list(reader.entries())
+        assert [(path, fingerprint) for path, fingerprint, _ in entries] == [(p, f) for p, f, _ in EDGE_ENTRIES]
+        for (_, _, expected), (_, _, actual) in zip(EDGE_ENTRIES, entries):
+            assert actual == expected
+            assert actual.to_dict() == expected.to_dict()
+            assert type(actual.abbrlink) is type(expected.abbrlink)
+        assert reader.record(3).title == 'bad \ud800 text'
+
+
+def test_string_table_stores_each_string_once(snapshot_path):
+    repeated = [(f"{n}.md", (n, n, None), _record(id=f"game-{n}", developer='Shared Studio', platforms=['PC']))
+                for n in range(50)]
+    meta = write_snapshot(snapshot_path, {}, repeated)
+    with SnapshotReader(snapshot_path) as reader:
+        assert meta["strings"] < 50 * 3
+        assert reader.record(0).developer is reader.record(49).developer # Decoded once, then shared
+
+
+def test_rows_for_id_uses_the_id_index(snapshot_path):
+    write_snapshot(snapshot_path, {}, EDGE_ENTRIES)
+    with SnapshotReader(snapshot_path) as reader:
+        assert reader.rows_for_id('json-values') == [1, 2] # Duplicates in listing order
+        assert reader.rows_for_id('full') == [0]
+        assert reader.rows_for_id('missing') == []
+        assert reader.entry(reader.rows_for_id('lone-surrogate')[0])[0] == "d.md"
+
+
+def test_empty_snapshot(snapshot_path):
+    write_snapshot(snapshot_path, {"folder_path": "/empty"}, [])
+    with SnapshotReader(snapshot_path) as reader:
+        assert len(reader) == 0
+        assert list(reader.entries()) == []
+        assert reader.rows_for_id('anything') == []
+
+
+def _rewrite(path, change):
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    data = change(data)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:len(data) // 2],                          # Truncated: sections end past the file
+    lambda data: data[:10],                                      # Shorter than the header
+    lambda data: bytearray(),                                    # Empty file
+    lambda data: b"NOTSNAP\0" + data[8:],                        # Wrong magic
+    lambda data: data[:8] + (FORMAT_VERSION + 1).to_bytes(4, 'little') + data[12:], # Newer format
+    lambda data: data[:16] + b"{not json" + data[25:],           # Unreadable directory
+])
+def test_corrupt_files_raise_snapshot_error(snapshot_path, corrupt):
+    write_snapshot(snapshot_path, {}, EDGE_ENTRIES)
+    _rewrite(snapshot_path, corrupt)
+    with pytest.raises(SnapshotError):
+        SnapshotReader(snapshot_path)
+    os.remove(snapshot_path) # Nothing is left mapped
+
+
+def test_missing_file_raises_os_error(tmp_path):
+    with pytest.raises(OSError):
+        SnapshotReader(str(tmp_path / "missing.glsnap"))
@@ -0,0 +1,196 @@
+# file: thumbnails.py
+# Resized variants of local cover/screenshot images, generated on a worker pool and kept in a
+# content-addressed disk cache with a size limit.
+
+import os
+import re
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps, features # Optional: without Pillow no thumbnails are offered
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Widths a client may ask for; anything else would let requests fill the cache with arbitrary variants
+ALLOWED_WIDTHS = (160, 320, 480, 640, 1280)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp")
+MIME_TYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+# Bump when the resize/encode settings change so old variants stop being served
+THUMBNAIL_VERSION = "1"
+_KEY_RE = re.compile(r'^[0-9a-f]{40}\.(webp|jpg)$')
+_URL_SCHEME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:') # http:, https:, data:, ...
+_SOURCE_DIGEST_MEMO_SIZE = 20000
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def is_local_image_ref(ref):
+    """True for references that point at a file next to the Markdown (relative or absolute path), not a URL."""
+    if not ref or not isinstance(ref, str) or ref.startswith("//"):
+        return False
+    if re.match(r'^[a-zA-Z]:[\\/]', ref): # Windows absolute path
+        return ref.lower().endswith(IMAGE_EXTENSIONS)
+    return not _URL_SCHEME_RE.match(ref) and ref.lower().split('?', 1)[0].endswith(IMAGE_EXTENSIONS)
+
+
+def resolve_local_image(folder_path, ref):
+    """Absolute path of a local image reference, or None if it isn't one or lies outside folder_path."""
+    if not is_local_image_ref(ref):
+        return None
+    candidate = ref.split('?', 1)[0]
+    if not os.path.isabs(candidate):
+        candidate = os.path.join(folder_path, candidate)
+    candidate = os.path.realpath(candidate)
+    root = os.path.realpath(folder_path)
+    try:
+        if os.path.commonpath([root, candidate]) != root:
+            return None
+    except ValueError: # Different drives on Windows
+        return None
+    return candidate if os.path.isfile(candidate) else None
+
+
+class ThumbnailCache:
+    """
+    Thumbnails are named after the SHA-1 of (source bytes, width, format), so a changed image gets a new
+    name and a served file never changes; that is what makes year-long browser caching safe.
+    Concurrent requests for the same variant share one generation job. When the files on disk exceed
+    max_bytes, the least recently served ones are deleted.
+    """
+
+    def __init__(self, cache_dir, max_bytes, workers=2, quality=80):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.enabled = Image is not None
+        self.webp_supported = self.enabled and features.check('webp')
+        self._inflight = {} # key -> Future
+        self._lock = threading.Lock()
+        self._source_digests = {} # (path, mtime_ns, size) -> sha1 hex of the file
+        self._total_bytes = 0
+        self._executor = None
+        if not self.enabled:
+            logger.info("Pillow is not installed, image thumbnails are disabled.")
+            return
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._total_bytes = sum(size for _, size, _ in self._cached_files())
+        except OSError as e:
+            logger.error(f"Thumbnails disabled, could not use cache directory {cache_dir}: {e}")
+            self.enabled = False
+            return
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="thumbnail")
+
+    def output_format(self, accept_webp):
+        return "webp" if accept_webp and self.webp_supported else "jpg"
+
+    def path_for_key(self, key):
+        """Cache file for a key, or None if the key is malformed (keys come from URLs)."""
+        if not _KEY_RE.match(key or ""):
+            return None
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _source_digest(self, source_path):
+        stat_result = os.stat(source_path)
+        memo_key = (source_path, stat_result.st_mtime_ns, stat_result.st_size)
+        digest = self._source_digests.get(memo_key)
+        if digest is None:
+            with open(source_path, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            if len(self._source_digests) >= _SOURCE_DIGEST_MEMO_SIZE:
+                self._source_digests.clear()
+            self._source_digests[memo_key] = digest
+        return digest
+
+    def get_thumbnail(self, source_path, width, fmt, timeout=30):
+        """Returns the cache key of source_path resized to width, generating it first if needed."""
+        if not self.enabled:
+            raise ThumbnailError("Thumbnails are disabled.")
+        try:
+            source_digest = self._source_digest(source_path)
+        except OSError as e:
+            raise ThumbnailError(f"Could not read {source_path}: {e}")
+        key = hashlib.sha1(f"{source_digest}:{width}:{fmt}:{THUMBNAIL_VERSION}".encode('ascii')).hexdigest() + "." + fmt
+        target_path = self.path_for_key(key)
+        if os.path.exists(target_path):
+            try:
+                os.utime(target_path) # Eviction drops the least recently served files first
+            except OSError:
+                pass
+            return key
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._generate, source_path, width, fmt, target_path)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _, key=key: self._forget_inflight(key))
+        try:
+            future.result(timeout=timeout)
+        except ThumbnailError:
+            raise
+        except Exception as e:
+            raise ThumbnailError(f"Could not create a thumbnail of {source_path}: {e}")
+        return key
+
+    def _forget_inflight(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _generate(self, source_path, width, fmt, target_path):
+        with Image.open(source_path) as image:
+            image.draft('RGB', (width, width * 4)) # Lets the JPEG decoder downscale while decoding
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            if fmt == "jpg" and image.mode != "RGB":
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255)) # JPEG has no alpha channel
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            temp_path = f"{target_path}.{threading.get_ident()}.tmp"
+            image.save(temp_path, "WEBP" if fmt == "webp" else "JPEG", quality=self.quality, optimize=True)
+        os.replace(temp_path, target_path) # Readers never see a partially written file
+        with self._lock:
+            self._total_bytes += os.path.getsize(target_path)
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _cached_files(self):
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                stat_result = entry.stat()
+                yield entry.path, stat_result.st_size, stat_result.st_mtime
+
+    def _evict(self):
+        # Down to 90% of the budget, so a full cache isn't rescanned on every new thumbnail
+        files = sorted(self._cached_files(), key=lambda item: item[2])
+        total_bytes = sum(size for _, size, _ in files)
+        target_bytes = self.max_bytes * 0.9
+        removed = 0
+        for path, size, _ in files:
+            if total_bytes <= target_bytes:
+                break
+            try:
+                os.remove(path)
+                total_bytes -= size
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._total_bytes = total_bytes
+        logger.info(f"Evicted {removed} thumbnail(s); cache now {total_bytes // 1024} KiB.")
@@ -12,6 +12,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const filterDeveloperSelect = document.getElementById('filterDeveloper');
     const filterDurationTierSelect = document.getElementById('filterDurationTier');
     const filterSeriesSelect = document.getElementById('filterSeries');
+    const filterPlatformSelect = document.getElementById('filterPlatform');
+    const filterYearSelect = document.getElementById('filterYear');
     const filterFavoritesCheckbox = document.getElementById('filterFavorites');
     const clearFiltersBtn = document.getElementById('clearFiltersBtn');
 
@@ -34,6 +36,14 @@ document.addEventListener('DOMContentLoaded', () => {
     const itemsPerPage = 12; // Increased items per page slightly
     let lazyLoadObserver;
     let currentSearchTerm = ''; // Store the active search term for highlighting
+    let liveUpdatesSource = null; // EventSource for /api/events (folder watcher deltas)
+    let loadedFolderPath = ''; // Folder the current allGamesBasicData came from
+    const gameDetailsCache = new Map(); // uid (or plain gameId) -> full game object from /api/game_details
+    let searchMatchIds = null; // Set of IDs matching currentSearchTerm (from /api/search), null if not searching
+    const streamedCardIndexById = new Map(); // game ID -> index in allGamesBasicData while a streaming load runs
+    const STREAM_RENDER_INTERVAL_MS = 300; // Re-render at most this often while cards are streaming in
+    const LOAD_PROGRESS_POLL_MS = 500; // How often a non-streaming load asks the backend for parse progress
+    let facetRequestSeq = 0; // Only the answer to the latest /api/games/facets request is shown
 
     // SVG Icons
     const SVG_BOOKMARK_OUTLINE = `<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="currentColor" width="22" height="22"><path d="M17 3H7c-1.1 0-2 .9-2 2v16l7-3 7 3V5c0-1.1-.9-2-2-2zm0 15l-5-2.18L7 18V5h10v13z"/><path d="M0 0h24v24H0z" fill="none"/></svg>`;
@@ -77,6 +87,8 @@ document.addEventListener('DOMContentLoaded', () => {
         filterDeveloperSelect.addEventListener('change', applyFiltersAndSort);
         filterDurationTierSelect.addEventListener('change', applyFiltersAndSort);
         filterSeriesSelect.addEventListener('change', applyFiltersAndSort);
+        filterPlatformSelect.addEventListener('change', applyFiltersAndSort);
+        filterYearSelect.addEventListener('change', applyFiltersAndSort);
         filterFavoritesCheckbox.addEventListener('change', applyFiltersAndSort);
         clearFiltersBtn.addEventListener('click', handleClearFilters);
 
@@ -92,7 +104,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     function validateCriticalElements() {
         const elements = { folderPathInput, loadGamesBtn, searchInput, searchBtn, sortOrderSelect,
-            filterDeveloperSelect, filterDurationTierSelect, filterSeriesSelect, filterFavoritesCheckbox,
+            filterDeveloperSelect, filterDurationTierSelect, filterSeriesSelect, filterPlatformSelect, filterYearSelect, filterFavoritesCheckbox,
             clearFiltersBtn, gamesListDiv, statusMessageDiv, paginationControlsDiv, gameDetailModal, modalBody,
             modalLoader, settingsFab, folderPathContainer, hideFolderPathBtn };
         for (const key in elements) {
@@ -130,6 +142,8 @@ document.addEventListener('DOMContentLoaded', () => {
         filterDeveloperSelect.disabled = disabled;
         filterDurationTierSelect.disabled = disabled;
         filterSeriesSelect.disabled = disabled;
+        filterPlatformSelect.disabled = disabled;
+        filterYearSelect.disabled = disabled;
         filterFavoritesCheckbox.disabled = disabled;
         clearFiltersBtn.disabled = disabled;
     }
@@ -220,37 +234,45 @@ document.addEventListener('DOMContentLoaded', () => {
         gamesListDiv.innerHTML = '<div class="loading-spinner-container"><div class="loading-spinner"></div><p>数据加载中，请稍候...</p></div>';
         paginationControlsDiv.innerHTML = '';
         allGamesBasicData = [];
+        streamedCardIndexById.clear();
+        loadedFolderPath = ''; // Ignore live deltas until this load has finished
         currentFilteredAndSortedGames = [];
         currentPage = 1;
+        gameDetailsCache.clear();
         populateSelect(filterDeveloperSelect, new Set(), "所有开发商", true);
         populateSelect(filterSeriesSelect, new Set(), "所有系列", true);
+        populateSelect(filterPlatformSelect, new Set(), "所有平台", true);
+        populateSelect(filterYearSelect, new Set(), "所有年份", true);
 
         try {
-            const response = await fetch('http://127.0.0.1:7500/api/games_basic', {
-                method: 'POST', headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ folder_path: folderPath }),
-            });
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => ({ error: `服务器响应错误: ${response.status}` }));
-                throw new Error(errorData.error || `服务器响应错误: ${response.status}`);
+            let data;
+            if (supportsStreamingLoad()) {
+                // Cards arrive in batches while the backend is still parsing; show them as they come
+                let lastRenderTime = 0;
+                data = await streamGamesBasic(folderPath, (games) => {
+                    mergeCardRecords(games);
+                    const now = Date.now();
+                    if (now - lastRenderTime < STREAM_RENDER_INTERVAL_MS) return;
+                    lastRenderTime = now;
+                    populateFilterOptions(allGamesBasicData);
+                    applyFiltersAndSort();
+                    setStatus(`已加载 ${allGamesBasicData.length} 个游戏，仍在加载...`, 'loading');
+                });
+                data.games = allGamesBasicData;
+            } else {
+                const stopProgress = watchLoadProgress(folderPath);
+                try {
+                    data = await fetchGamesBasic(folderPath);
+                } finally {
+                    stopProgress();
+                }
+                if (data.games && Array.isArray(data.games)) allGamesBasicData = data.games.map(normalizeCardRecord);
             }
-            const data = await response.json();
 
             if (data.games && Array.isArray(data.games)) {
-                // Backend now sends full game objects, so mapping is simpler.
-                // Ensure defaults for any potentially missing crucial fields if backend doesn't guarantee them.
-                allGamesBasicData = data.games.map(game => ({
-                    ...game, // Spread all properties from the backend
-                    id: game.id || `unknown-id-${Math.random().toString(36).substr(2, 9)}`,
-                    // title_display should be provided by backend
-                    // developer, release_date, duration_tier, duration_hours are top-level from backend
-                    // series_name, series_tag are top-level
-                    // parse_error is top-level
-                    // names, info, description, screenshots, download_links, source_filename, abbrlink
-                    // should now all be present as sent by backend.
-                    // Ensure 'info' object exists for consistent access, even if backend guarantees it
-                    info: game.info || { developer: null, release_date: null, duration_tier: "未知时长", duration_hours: null, platforms: [], related_works: [] },
-                }));
+                // Backend sends compact card records; full details are fetched when a modal opens.
+                loadedFolderPath = folderPath;
+                connectLiveUpdates();
 
                 let statusMsg = "";
                 if (allGamesBasicData.length > 0) {
@@ -294,34 +316,169 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    async function fetchGameDetails(gameId) { // Game object from cache now has full details
-        const game = allGamesBasicData.find(g => g.id === gameId);
-        if (game) {
-            return Promise.resolve(game);
+    function supportsStreamingLoad() {
+        return typeof TextDecoder !== 'undefined' && typeof ReadableStream !== 'undefined';
+    }
+
+    // Shows "parsed x / y" from /api/libraries/status while a non-streaming load is waiting. Returns a stop function.
+    function watchLoadProgress(folderPath) {
+        const timer = setInterval(async () => {
+            try {
+                const response = await fetch(`http://127.0.0.1:7500/api/libraries/status?folder_path=${encodeURIComponent(folderPath)}`);
+                if (!response.ok) return; // Not registered yet
+                const load = (await response.json()).load;
+                if (load && load.state === 'running' && load.files_to_parse > 0) {
+                    setStatus(`正在解析 ${load.files_parsed} / ${load.files_to_parse} 个文件...`, 'loading');
+                }
+            } catch (error) {
+                // Progress is only informational
+            }
+        }, LOAD_PROGRESS_POLL_MS);
+        return () => clearInterval(timer);
+    }
+
+    async function fetchGamesBasic(folderPath) {
+        // GET so the browser can revalidate with If-None-Match and reuse its cached copy on a 304
+        const response = await fetch(`http://127.0.0.1:7500/api/games_basic?folder_path=${encodeURIComponent(folderPath)}`, {
+            cache: 'no-cache',
+        });
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({ error: `服务器响应错误: ${response.status}` }));
+            throw new Error(errorData.error || `服务器响应错误: ${response.status}`);
+        }
+        return response.json();
+    }
+
+    // Reads /api/games_stream (newline-delimited JSON), calling onGames for every batch of cards.
+    // Resolves with the trailer ({total, warnings, message}).
+    async function streamGamesBasic(folderPath, onGames) {
+        const response = await fetch(`http://127.0.0.1:7500/api/games_stream?folder_path=${encodeURIComponent(folderPath)}`);
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({ error: `服务器响应错误: ${response.status}` }));
+            throw new Error(errorData.error || `服务器响应错误: ${response.status}`);
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+            let newlineIndex;
+            while ((newlineIndex = buffered.indexOf('\n')) >= 0) {
+                const line = buffered.slice(0, newlineIndex).trim();
+                buffered = buffered.slice(newlineIndex + 1);
+                if (!line) continue;
+                const message = JSON.parse(line);
+                if (message.type === 'games') onGames(message.games || []);
+                else if (message.type === 'error') throw new Error(message.error || '加载失败');
+                else if (message.type === 'end') return message;
+            }
+        }
+        throw new Error('加载过程中连接中断，请重试。');
+    }
+
+    function mergeCardRecords(games) {
+        // A card sent again for the same ID (e.g. after duplicate detection) replaces the earlier one
+        games.forEach(game => {
+            const card = normalizeCardRecord(game);
+            const existingIndex = streamedCardIndexById.get(card.id);
+            if (existingIndex === undefined) {
+                streamedCardIndexById.set(card.id, allGamesBasicData.length);
+                allGamesBasicData.push(card);
+            } else {
+                allGamesBasicData[existingIndex] = card;
+            }
+        });
+    }
+
+    function normalizeCardRecord(game) {
+        // Card fields: id, uid, library_id, title_display, cover_image, cover_thumbnail, developer, release_date, duration_tier, duration_hours,
+        // platforms, series_name, series_tag, source_filename, parse_error, parse_warning
+        return {
+            ...game, // Spread all properties from the backend
+            id: game.id || `unknown-id-${Math.random().toString(36).substr(2, 9)}`,
+            platforms: game.platforms || [],
+        };
+    }
+
+    // Live updates: the backend watches the folder and pushes added/updated/removed games
+    function connectLiveUpdates() {
+        if (liveUpdatesSource || typeof EventSource === 'undefined') return;
+        liveUpdatesSource = new EventSource('http://127.0.0.1:7500/api/events');
+        liveUpdatesSource.addEventListener('delta', (event) => {
+            try { applyLiveDelta(JSON.parse(event.data)); }
+            catch (e) { console.error('Invalid live update:', e); }
+        });
+        liveUpdatesSource.addEventListener('reload', (event) => {
+            const data = JSON.parse(event.data || '{}');
+            if (data.folder_path === loadedFolderPath) handleLoadGames(false);
+        });
+        // EventSource reconnects by itself after errors; nothing else to do here
+    }
+
+    function applyLiveDelta(delta) {
+        if (!delta || delta.folder_path !== loadedFolderPath) return;
+        const changedGames = [...(delta.added || []), ...(delta.updated || [])];
+        const dropIds = new Set([...(delta.removed || []), ...changedGames.map(g => g.id)]);
+        allGamesBasicData = allGamesBasicData.filter(game => !dropIds.has(game.id));
+        changedGames.forEach(game => allGamesBasicData.push(normalizeCardRecord(game)));
+        dropIds.forEach(id => { // Details are refetched on next open (cached under the uid the card was opened with)
+            gameDetailsCache.delete(id);
+            if (delta.library_id) gameDetailsCache.delete(`${delta.library_id}:${id}`);
+        });
+        if (currentSearchTerm) triggerSearch(); // Search matches come from the server, refresh them
+
+        const pageBeforeUpdate = currentPage;
+        populateFilterOptions(allGamesBasicData);
+        applyFiltersAndSort();
+        // Stay on the page the user was looking at instead of jumping back to page 1
+        const totalPages = Math.max(1, Math.ceil(currentFilteredAndSortedGames.length / itemsPerPage));
+        currentPage = Math.min(pageBeforeUpdate, totalPages);
+        renderPage();
+        console.log(`Live update: +${(delta.added || []).length} ~${(delta.updated || []).length} -${(delta.removed || []).length}`);
+    }
+
+    async function fetchGameDetails(gameId) { // Cards don't carry descriptions/links/screenshots, load them on demand
+        if (gameDetailsCache.has(gameId)) return gameDetailsCache.get(gameId);
+        const response = await fetch(`http://127.0.0.1:7500/api/game_details/${encodeURIComponent(gameId)}`, { cache: 'no-cache' });
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({ error: `服务器响应错误: ${response.status}` }));
+            throw new Error(errorData.error || `游戏 (ID: ${gameId}) 详情加载失败。`);
         }
-        // This part should ideally not be reached if all games are preloaded.
-        const errorMsg = `游戏 (ID: ${gameId}) 未在预加载数据中找到。弹窗无法显示。`;
-        console.error(errorMsg);
-        // Optionally, you could still try to fetch from /api/game_details/ here as a last resort
-        // but the design is to preload everything with /api/games_basic.
-        return Promise.reject(new Error(errorMsg));
+        const game = await response.json();
+        gameDetailsCache.set(gameId, game);
+        return game;
     }
 
     // ==========================================================================
     // 6. Filtering & Sorting Logic
     // ==========================================================================
-    function triggerSearch() {
+    async function triggerSearch() {
         currentSearchTerm = searchInput.value.toLowerCase().trim(); // Update global search term
+        searchMatchIds = null;
+        if (currentSearchTerm) {
+            // Names, aliases and descriptions aren't in the card records, so matching is done by the backend index
+            try {
+                const response = await fetch(`http://127.0.0.1:7500/api/search?ids_only=1&q=${encodeURIComponent(currentSearchTerm)}&folder_path=${encodeURIComponent(loadedFolderPath)}`);
+                if (response.ok) searchMatchIds = new Set((await response.json()).ids || []);
+            } catch (error) {
+                console.warn('后端搜索失败，改用本地标题匹配:', error);
+            }
+        }
         applyFiltersAndSort();
     }
 
     function handleClearFilters() {
         searchInput.value = '';
         currentSearchTerm = ''; // Clear global search term
+        searchMatchIds = null;
         sortOrderSelect.value = 'title_display_asc';
         filterDeveloperSelect.value = '';
         filterDurationTierSelect.value = '';
         filterSeriesSelect.value = '';
+        filterPlatformSelect.value = '';
+        filterYearSelect.value = '';
         filterFavoritesCheckbox.checked = false;
         applyFiltersAndSort();
         if (allGamesBasicData.length > 0) {
@@ -338,17 +495,17 @@ document.addEventListener('DOMContentLoaded', () => {
         const selectedDev = filterDeveloperSelect.value;
         const selectedDuration = filterDurationTierSelect.value; // This is correct (value from select)
         const selectedSeries = filterSeriesSelect.value;
+        const selectedPlatform = filterPlatformSelect.value;
+        const selectedYear = filterYearSelect.value;
         const showOnlyFavorites = filterFavoritesCheckbox.checked;
         const sortValue = sortOrderSelect.value;
 
         if (showOnlyFavorites) filtered = filtered.filter(game => favorites.has(game.id));
-        if (searchTermToUse) {
+        if (searchTermToUse && searchMatchIds) {
+            filtered = filtered.filter(game => searchMatchIds.has(game.id));
+        } else if (searchTermToUse) { // Backend search unavailable: plain substring match on card fields
             filtered = filtered.filter(game => {
-                const searchFields = [
-                    game.title_display, game.developer, game.series_name,
-                    game.title_original, game.names?.chinese, game.names?.japanese,
-                    game.names?.english, ...(game.names?.aliases || [])
-                ];
+                const searchFields = [game.title_display, game.developer, game.series_name];
                 return searchFields.some(field => field && String(field).toLowerCase().includes(searchTermToUse));
             });
         }
@@ -356,6 +513,8 @@ document.addEventListener('DOMContentLoaded', () => {
         // Filter by duration_tier (which is now top-level in game objects)
         if (selectedDuration) filtered = filtered.filter(game => game.duration_tier === selectedDuration);
         if (selectedSeries) filtered = filtered.filter(game => game.series_name === selectedSeries);
+        if (selectedPlatform) filtered = filtered.filter(game => game.platforms.includes(selectedPlatform));
+        if (selectedYear) filtered = filtered.filter(game => releaseYearOf(game) === selectedYear);
 
         const [sortField, sortDirection] = sortValue.split('_');
         const asc = sortDirection === 'asc';
@@ -403,7 +562,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (allGamesBasicData.length > 0) {
                 if (filtered.length === 0) {
                      setStatus('没有符合当前筛选条件的游戏。', 'info');
-                } else if (searchTermToUse || selectedDev || selectedDuration || selectedSeries || showOnlyFavorites) {
+                } else if (searchTermToUse || selectedDev || selectedDuration || selectedSeries || selectedPlatform || selectedYear || showOnlyFavorites) {
                      setStatus(`筛选出 ${filtered.length} 个游戏。`, 'info');
                 } else {
                      // Preserve success status if it was set by initial load
@@ -415,18 +574,90 @@ document.addEventListener('DOMContentLoaded', () => {
                 setStatus('', 'info');
             }
         }
+        refreshFacetCounts();
+    }
+
+    function releaseYearOf(game) {
+        // Same rule as the backend "year" facet: the leading four digits of release_date
+        const match = String(game.release_date || '').match(/^\s*(\d{4})/);
+        return match ? match[1] : '';
     }
 
     function populateFilterOptions(games) {
         const developers = new Set();
         const seriesNames = new Set();
+        const platforms = new Set();
+        const years = new Set();
         games.forEach(game => {
             // developer is top-level
             if (game.developer) developers.add(game.developer);
             if (game.series_name) seriesNames.add(game.series_name);
+            game.platforms.forEach(platform => { if (platform) platforms.add(platform); });
+            const year = releaseYearOf(game);
+            if (year) years.add(year);
         });
         populateSelect(filterDeveloperSelect, developers, "所有开发商");
         populateSelect(filterSeriesSelect, seriesNames, "所有系列");
+        populateSelect(filterPlatformSelect, platforms, "所有平台");
+        populateSelect(filterYearSelect, years, "所有年份");
+    }
+
+    async function refreshFacetCounts() {
+        // Option counts come from the backend facet indexes; each dropdown is counted under the other active filters
+        if (!loadedFolderPath) return; // Still loading: the plain option lists have to do until then
+        const requestSeq = ++facetRequestSeq;
+        const requestBody = {
+            folder_path: loadedFolderPath,
+            developer: filterDeveloperSelect.value,
+            duration_tier: filterDurationTierSelect.value,
+            series: filterSeriesSelect.value,
+            platform: filterPlatformSelect.value,
+            year: filterYearSelect.value,
+        };
+        if (currentSearchTerm && searchMatchIds) requestBody.search = currentSearchTerm;
+        if (filterFavoritesCheckbox.checked) requestBody.favorite_ids = Array.from(favorites);
+        try {
+            const response = await fetch('http://127.0.0.1:7500/api/games/facets', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(requestBody),
+            });
+            if (!response.ok) return;
+            const data = await response.json();
+            if (requestSeq !== facetRequestSeq || !data.facets) return; // A newer request is on its way
+            setOptionCounts(filterDeveloperSelect, data.facets.developer, "所有开发商");
+            setOptionCounts(filterSeriesSelect, data.facets.series, "所有系列");
+            setOptionCounts(filterPlatformSelect, data.facets.platform, "所有平台");
+            setOptionCounts(filterYearSelect, data.facets.year, "所有年份");
+            setFixedOptionCounts(filterDurationTierSelect, data.facets.duration_tier);
+        } catch (error) {
+            console.warn('获取筛选项计数失败，保留不带计数的选项:', error);
+        }
+    }
+
+    function setOptionCounts(selectElement, counts, defaultOptionText) {
+        // Lists only the values that still have matches (the selected one always stays), each with its count
+        if (!counts) return;
+        const currentValue = selectElement.value;
+        selectElement.innerHTML = `<option value="">${defaultOptionText}</option>`;
+        Object.keys(counts)
+            .sort((a, b) => a.toLowerCase().localeCompare(b.toLowerCase()))
+            .forEach(optionValue => {
+                const option = document.createElement('option');
+                option.value = optionValue; option.textContent = `${optionValue} (${counts[optionValue]})`;
+                selectElement.appendChild(option);
+            });
+        selectElement.value = currentValue in counts ? currentValue : "";
+    }
+
+    function setFixedOptionCounts(selectElement, counts) {
+        // For selects with a fixed option list (duration tiers): keep every option, append its count
+        if (!counts) return;
+        Array.from(selectElement.options).forEach(option => {
+            if (!option.value) return;
+            if (!option.dataset.label) option.dataset.label = option.textContent;
+            option.textContent = `${option.dataset.label} (${counts[option.value] || 0})`;
+        });
     }
 
     function populateSelect(selectElement, optionsSet, defaultOptionText, forceClear = false) {
@@ -530,7 +761,8 @@ document.addEventListener('DOMContentLoaded', () => {
             placeholder.classList.add('game-cover-placeholder');
             coverWrapper.appendChild(placeholder); // Add placeholder first
             if (game.cover_image) {
-                coverImg.dataset.src = game.cover_image;
+                // Local covers come as resized thumbnails from the backend; remote URLs are used as they are
+                coverImg.dataset.src = game.cover_thumbnail ? `http://127.0.0.1:7500${game.cover_thumbnail}` : game.cover_image;
                 observeElementForLazyLoad(coverImg);
                 coverWrapper.insertBefore(coverImg, placeholder); // Insert image before placeholder
                 placeholder.textContent = '封面加载中...'; placeholder.style.display = 'flex';
@@ -546,8 +778,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 seriesTagHtml = `<p class="game-series-tag-card">${highlightText(game.series_name, currentSearchTerm)}${game.series_tag ? ` <small>(${highlightText(game.series_tag, currentSearchTerm)})</small>` : ''}</p>`;
             }
             
-            // game.info.platforms (info object is now passed through and guaranteed by map)
-            const platforms = game.info?.platforms;
+            // platforms is a top-level card field (normalized to an array by normalizeCardRecord)
+            const platforms = game.platforms;
             let platformsHtml = '';
             if (platforms && Array.isArray(platforms) && platforms.length > 0) {
                 platformsHtml = `<p class="game-platforms-card">平台: ${platforms.map(p => highlightText(p, currentSearchTerm)).join(', ')}</p>`;
@@ -566,7 +798,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 ${game.developer ? `<p class="game-developer">${highlightText(game.developer, currentSearchTerm)}</p>` : ''}
                 ${platformsHtml}
                 ${seriesTagHtml}
-                <button class="details-button" data-game-id="${game.id || ''}" aria-label="查看 ${displayTitle} 的详情">查看详情</button>
+                <button class="details-button" data-game-id="${game.uid || game.id || ''}" aria-label="查看 ${displayTitle} 的详情">查看详情</button>
             `;
             card.appendChild(coverWrapper); card.appendChild(cardContent);
             gamesListDiv.appendChild(card);
@@ -712,7 +944,13 @@ document.addEventListener('DOMContentLoaded', () => {
         // game.screenshots is now available
         if (game.screenshots && game.screenshots.length > 0) {
             screenshotsHtml = '<div class="modal-screenshots">';
-            game.screenshots.filter(ss => ss).forEach(ssUrl => { screenshotsHtml += `<div class="modal-screenshot-item"><img src="${ssUrl}" alt="截图" loading="lazy" onclick="window.open('${ssUrl}', '_blank', 'noopener,noreferrer')" tabindex="0" role="button"></div>`; });
+            game.screenshots.forEach((ssUrl, index) => {
+                if (!ssUrl) return;
+                const thumbnail = game.screenshot_thumbnails && game.screenshot_thumbnails[index];
+                const previewUrl = thumbnail ? `http://127.0.0.1:7500${thumbnail}` : ssUrl;
+                const fullUrl = thumbnail ? `${previewUrl}?w=1280` : ssUrl; // Local files can't be opened directly from the page
+                screenshotsHtml += `<div class="modal-screenshot-item"><img src="${previewUrl}" alt="截图" loading="lazy" onclick="window.open('${fullUrl}', '_blank', 'noopener,noreferrer')" tabindex="0" role="button"></div>`;
+            });
             screenshotsHtml += '</div>';
         }
         
@@ -731,7 +969,7 @@ document.addEventListener('DOMContentLoaded', () => {
         downloadsHtml += '</ul>';
 
         modalBody.innerHTML = `
-            ${game.cover_image ? `<img src="${game.cover_image}" alt="${displayTitleInModal}封面" class="modal-cover-image" loading="lazy">` : ''}
+            ${game.cover_image ? `<img src="${game.cover_thumbnail ? `http://127.0.0.1:7500${game.cover_thumbnail}?w=640` : game.cover_image}" alt="${displayTitleInModal}封面" class="modal-cover-image" loading="lazy">` : ''}
             ${errorWarningMessages}
             ${buildSection('基本信息', namesHtml + infoHtml)}
             ${buildSection('游戏简介', descriptionHtml)}